@@ -0,0 +1,7 @@
+#!/usr/bin/env python3
+"""`python3 bag_export.py` from a checkout; the code is in phone_sensor_bridge/bag_export.py"""
+
+from phone_sensor_bridge.bag_export import main
+
+if __name__ == '__main__':
+    main()
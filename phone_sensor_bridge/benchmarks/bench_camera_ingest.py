@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Frames/s and CPU per frame for getting a 720p JPEG from the wire into a
+CompressedImage: base64 data URLs (original and current decoding), binary
+Socket.IO attachments and the MJPEG stream. The message stage compares the
+original `msg.data = bytes` assignment with CompressedImageTemplate and is
+skipped when sensor_msgs is not importable.
+
+    python3 benchmarks/bench_camera_ingest.py [--frames 500] [--frame-kb 150]
+"""
+
+import argparse
+import base64
+import io
+import os
+import sys
+import time
+
+BRIDGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BRIDGE_DIR)
+
+from phone_sensor_bridge.camera_source import jpeg_from_payload  # noqa: E402
+from phone_sensor_bridge.mjpeg_stream import MjpegDemuxer  # noqa: E402
+
+WIDTH, HEIGHT = 1280, 720
+
+
+def make_jpeg(frame_kb):
+    """A real 720p JPEG when OpenCV is available, else a JPEG-sized blob"""
+    try:
+        import cv2
+        import numpy as np
+    except ImportError:
+        body = os.urandom(frame_kb * 1024 - 4)
+        return b'\xff\xd8' + body + b'\xff\xd9'
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+    image[:, :, 0] = np.linspace(0, 255, WIDTH, dtype=np.uint8)
+    return cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes()
+
+
+def mjpeg_stream(jpeg, frames):
+    """The multipart body server.js writes for `frames` parts"""
+    part = (b'--frame\r\nContent-Type: image/jpeg\r\nX-Timestamp: 0\r\n'
+            b'Content-Length: %d\r\n\r\n' % len(jpeg)) + jpeg + b'\r\n'
+    return part * frames
+
+
+def legacy_base64(payloads):
+    for payload in payloads:
+        image_data = payload['data']
+        if ',' in image_data:
+            image_data = image_data.split(',')[1]
+        yield base64.b64decode(image_data)
+
+
+def current(payloads):
+    for payload in payloads:
+        yield jpeg_from_payload(payload['data'])
+
+
+def mjpeg(body):
+    demuxer = MjpegDemuxer()
+    stream = io.BytesIO(body)
+    while True:
+        count, frames = demuxer.readinto(stream)
+        if not count:
+            break
+        yield from frames
+    yield from demuxer.flush()
+
+
+def measure(name, frames, wire_bytes, images, sink):
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    count = 0
+    for image in images:
+        sink(image)
+        count += 1
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+    assert count == frames, (name, count)
+    print(f"{name:28s} {frames / wall:9.0f} frames/s {cpu * 1e6 / frames:9.1f} us CPU/frame "
+          f"{wire_bytes / 1024:8.1f} KiB/frame on the wire")
+
+
+def message_sinks():
+    """(name, sink) pairs publishing-side fills, or [] without ROS"""
+    try:
+        from sensor_msgs.msg import CompressedImage
+        from phone_sensor_bridge.message_factory import CompressedImageTemplate
+    except ImportError:
+        return []
+
+    def legacy_fill(image):
+        msg = CompressedImage()
+        msg.header.frame_id = 'phone_base_link_camera'
+        msg.format = 'jpeg'
+        msg.data = bytes(image)
+
+    template = CompressedImageTemplate('phone_base_link_camera')
+    return [('msg.data = bytes', legacy_fill),
+            ('CompressedImageTemplate', lambda image: template.fill(0, image))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--frames', type=int, default=500)
+    parser.add_argument('--frame-kb', type=int, default=150,
+                        help='size of the synthetic frame when OpenCV is not installed')
+    args = parser.parse_args()
+
+    jpeg = make_jpeg(args.frame_kb)
+    data_url = 'data:image/jpeg;base64,' + base64.b64encode(jpeg).decode('ascii')
+    text_payloads = [{'data': data_url, 'width': WIDTH, 'height': HEIGHT}] * args.frames
+    binary_payloads = [{'data': jpeg, 'width': WIDTH, 'height': HEIGHT}] * args.frames
+    body = mjpeg_stream(jpeg, args.frames)
+    print(f"{WIDTH}x{HEIGHT} JPEG, {len(jpeg) / 1024:.1f} KiB, {args.frames} frames")
+
+    print("wire -> JPEG bytes")
+    discard = len
+    measure('base64 (split + b64decode)', args.frames, len(data_url), legacy_base64(text_payloads), discard)
+    measure('base64 (a2b_base64)', args.frames, len(data_url), current(text_payloads), discard)
+    measure('binary attachment', args.frames, len(jpeg), current(binary_payloads), discard)
+    measure('mjpeg demuxer', args.frames, len(body) / args.frames, mjpeg(body), discard)
+
+    sinks = message_sinks()
+    if not sinks:
+        print("JPEG bytes -> CompressedImage: skipped (sensor_msgs not importable)")
+        return
+    print("JPEG bytes -> CompressedImage")
+    for name, sink in sinks:
+        measure(name, args.frames, len(jpeg), iter([jpeg] * args.frames), sink)
+
+
+if __name__ == '__main__':
+    main()
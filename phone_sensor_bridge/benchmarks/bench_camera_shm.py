@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Frames/s, MB/s and CPU per frame for handing camera frames to a consumer
+process: through the shared-memory FrameRing (frame copied once, a JSON
+descriptor sent) versus a copying transport. With rclpy the copying path
+is the CompressedImage one (CDR serialize, send, deserialize); without it a
+raw copy over the same pipe stands in, which is a lower bound for DDS.
+
+Both paths keep at most `--slots - 1` frames in flight so the ring is never
+overrun, and the consumer touches every frame (crc32 with --checksum).
+
+    python3 benchmarks/bench_camera_shm.py [--frames 300] [--frame-mb 1 4 8] [--checksum]
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+import zlib
+
+BRIDGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BRIDGE_DIR)
+
+from phone_sensor_bridge.frame_ring import (FrameRingReader, FrameRingWriter, decode_descriptor,  # noqa: E402
+                        encode_descriptor)
+
+RING_NAME = f'bench_camera_shm_{os.getpid()}'
+
+
+def ros_codec():
+    """(encode, decode) for CompressedImage CDR, or None without rclpy"""
+    try:
+        from rclpy.serialization import deserialize_message, serialize_message
+        from sensor_msgs.msg import CompressedImage
+        from phone_sensor_bridge.message_factory import CompressedImageTemplate
+    except ImportError:
+        return None
+    template = CompressedImageTemplate('phone_base_link_camera')
+    return (lambda frame: serialize_message(template.fill(0, frame)),
+            lambda data: deserialize_message(data, CompressedImage).data)
+
+
+def consume(mode, conn, checksum):
+    """Consumer process: read frames until None, ack each, report CPU time"""
+    touch = zlib.crc32 if checksum else len
+    reader = codec = None
+    if mode == 'shm':
+        reader = FrameRingReader(RING_NAME)
+    elif mode == 'ros':
+        codec = ros_codec()
+    cpu = time.process_time()
+    skipped = 0
+    while True:
+        message = conn.recv_bytes()
+        if message == b'':
+            break
+        if reader is not None:
+            descriptor = decode_descriptor(message)
+            view = reader.read(descriptor)
+            if view is not None:
+                touch(view)
+                view.release()
+            if view is None or not reader.valid(descriptor):
+                skipped += 1
+        elif codec is not None:
+            touch(memoryview(codec[1](message)))
+        else:
+            touch(message)
+        conn.send_bytes(b'a')
+    conn.send((time.process_time() - cpu, skipped))
+    if reader is not None:
+        reader.close()
+
+
+def run(mode, frame, frames, slots, checksum):
+    parent, child = multiprocessing.Pipe()
+    writer = None
+    if mode == 'shm':
+        writer = FrameRingWriter(RING_NAME, slots, len(frame))
+    encode = ros_codec()[0] if mode == 'ros' else None
+    process = multiprocessing.Process(target=consume, args=(mode, child, checksum))
+    process.start()
+
+    window = max(1, slots - 1)
+    in_flight = 0
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    for i in range(frames):
+        if in_flight >= window:
+            parent.recv_bytes()
+            in_flight -= 1
+        if writer is not None:
+            parent.send_bytes(encode_descriptor(writer.write(frame, i)).encode())
+        elif encode is not None:
+            parent.send_bytes(encode(frame))
+        else:
+            parent.send_bytes(frame)
+        in_flight += 1
+    for _ in range(in_flight):
+        parent.recv_bytes()
+    wall = time.perf_counter() - wall
+    cpu = time.process_time() - cpu
+    parent.send_bytes(b'')
+    consumer_cpu, skipped = parent.recv()
+    process.join()
+    if writer is not None:
+        writer.close()
+    return wall, cpu, consumer_cpu, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--frame-mb', type=float, nargs='+', default=[1.0, 4.0, 8.0])
+    parser.add_argument('--slots', type=int, default=8)
+    parser.add_argument('--checksum', action='store_true', help='crc32 every frame in the consumer')
+    args = parser.parse_args()
+
+    copy_mode = 'ros' if ros_codec() is not None else 'pipe'
+    copy_name = 'CompressedImage (CDR)' if copy_mode == 'ros' else 'pipe copy (no rclpy)'
+    print(f"{args.frames} frames per run, {args.slots} slots, consumer "
+          f"{'crc32' if args.checksum else 'len'} per frame")
+    for frame_mb in args.frame_mb:
+        frame = os.urandom(int(frame_mb * 1024 * 1024))
+        print(f"{len(frame) / 1e6:.1f} MB frames")
+        for name, mode in ((copy_name, copy_mode), ('shm ring', 'shm')):
+            wall, cpu, consumer_cpu, skipped = run(mode, frame, args.frames, args.slots, args.checksum)
+            print(f"  {name:24s} {args.frames / wall:8.0f} frames/s {args.frames * len(frame) / wall / 1e6:9.0f} MB/s "
+                  f"CPU/frame {cpu * 1e6 / args.frames:8.0f} us producer {consumer_cpu * 1e6 / args.frames:8.0f} us consumer"
+                  + (f"  ({skipped} overwritten)" if skipped else ''))
+
+
+if __name__ == '__main__':
+    main()
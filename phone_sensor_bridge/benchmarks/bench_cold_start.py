@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Cold-start wall time of the bridge, each stage in a fresh interpreter:
+bare Python startup, the bridge's non-ROS modules (checked to leave numpy
+and OpenCV unloaded), the numpy + OpenCV imports listen.py used to pay on
+every start, and, when rclpy is importable, importing listen.py and the time
+until a PhoneSensorBridge has published its first phone/imu message.
+
+    python3 benchmarks/bench_cold_start.py [--runs 7]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BRIDGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must not be loaded unless a camera or batch feature is used
+HEAVY_MODULES = ('numpy', 'cv2', 'socketio', 'websocket')
+
+LIGHT_MODULES = ('bridge_stats', 'camera_source', 'clock_sync', 'connection', 'conversions',
+                 'decoders', 'frame_ring', 'ingest_queue', 'mjpeg_stream', 'plugins', 'transports')
+
+REPORT = f"""
+import sys, time
+print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))
+print(time.time())
+"""
+
+STAGES = [
+    ('python startup', 'pass', None),
+    ('bridge modules (no ROS)', f'from phone_sensor_bridge import {", ".join(LIGHT_MODULES)}', None),
+    ('numpy + cv2 (old eager imports)', 'import numpy\ntry:\n    import cv2\nexcept ImportError:\n    pass',
+     'numpy'),
+    ('import listen (rclpy)', 'from phone_sensor_bridge import listen', 'rclpy'),
+    ('first phone/imu message (rclpy)', """
+import rclpy
+from rclpy.parameter import Parameter
+from phone_sensor_bridge import listen
+rclpy.init()
+bridge = listen.PhoneSensorBridge(connect=False,
+                                  parameter_overrides=[Parameter('ingest_queue', value=False)])
+bridge.receive_sensor_data({'accelerometer': {'x': 0.0, 'y': 0.0, 'z': 1.0},
+                            'gyroscope': {'x': 0.0, 'y': 0.0, 'z': 0.0}})
+assert bridge.stats.topic('imu').messages == 1
+""", 'rclpy'),
+]
+
+
+def importable(module):
+    return subprocess.run([sys.executable, '-c', f'import {module}'], cwd=BRIDGE_DIR,
+                          capture_output=True).returncode == 0
+
+
+def run_stage(code):
+    """Seconds from spawning the interpreter to the end of `code`, and heavy modules it loaded"""
+    start = time.time()
+    result = subprocess.run([sys.executable, '-c', code + REPORT], cwd=BRIDGE_DIR,
+                            capture_output=True, text=True, check=True)
+    loaded, end = result.stdout.splitlines()[-2:]
+    return float(end) - start, loaded.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"median of {args.runs} fresh interpreters ({sys.executable})")
+    for name, code, requires in STAGES:
+        if requires and not importable(requires):
+            print(f"{name:34s} skipped ({requires} not importable)")
+            continue
+        run_stage(code)  # warm the page cache and __pycache__
+        times = []
+        for _ in range(args.runs):
+            elapsed, loaded = run_stage(code)
+            times.append(elapsed)
+        print(f"{name:34s} {statistics.median(times) * 1000:8.1f} ms"
+              f"   loaded: {', '.join(loaded) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
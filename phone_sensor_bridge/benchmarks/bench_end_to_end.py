@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test of the bridges against a local stand-in server.
+
+benchmarks/load_server.js stands in for server.js with --phones simulated
+phones sending sensorData (synthetic, or replayed from the given logs) and
+camera frames from test_stream.mjpg. Each bridge runs as its own process
+against it (PhoneSensorBridge over Socket.IO and over the raw WebSocket,
+which is also what ros_websocket_bridge.py runs), and the per-phone rate is
+stepped through --rates. At
+every step, after --warmup seconds, --duration seconds are measured:
+
+- delivered: phone/imu messages a subscriber here received / IMU packets sent
+- latency: subscriber receive time - header stamp. The stand-in sends its
+  send time as the phone's, so with timestamp_source 'phone' (the default)
+  the stamp is the send time and this is server -> ROS subscriber latency
+- CPU (% of one core) and RSS of the bridge and the stand-in, from /proc
+
+A step is sustained when at least --min-delivered is delivered with p95
+latency under --max-latency ms and the stand-in kept its schedule; the
+sweep stops at the first step that is not. Results go to --json as one
+document per run, and --baseline compares a run with an earlier one (exit
+status 1 on a regression beyond --tolerance).
+
+Needs Linux (/proc), rclpy, node with the server's npm dependencies
+(`npm install` here), and each bridge's client library; what is missing is
+reported as skipped.
+
+    python3 benchmarks/bench_end_to_end.py [--bridges listen listen_websocket]
+        [--phones 1] [--rates 25 50 100 200 400 800] [--camera-rate 0]
+        [--duration 10] [--json results.json] [--baseline old.json] [logs ...]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+BRIDGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOAD_SERVER = os.path.join(BRIDGE_DIR, 'benchmarks', 'load_server.js')
+
+# name: (script, modules it needs, ROS parameters); {port} is the stand-in's
+BRIDGES = {
+    'listen': ('listen.py', 'socketio', {'websocket_url': 'http://127.0.0.1:{port}'}),
+    'listen_websocket': ('listen.py', 'websocket', {'transport': 'websocket',
+                                                    'websocket_url': 'ws://127.0.0.1:{port}'}),
+}
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+
+def importable(module):
+    return subprocess.run([sys.executable, '-c', f'import {module}'], cwd=BRIDGE_DIR,
+                          capture_output=True).returncode == 0
+
+
+def node_ready():
+    """None when node and the server's npm dependencies are available, else why not"""
+    if shutil.which('node') is None:
+        return 'node not found'
+    check = subprocess.run(['node', '-e', "require.resolve('socket.io'); require.resolve('ws')"],
+                           cwd=BRIDGE_DIR, capture_output=True)
+    if check.returncode != 0:
+        return "socket.io / ws not installed (run `npm install` in phone_sensor_bridge)"
+    return None
+
+
+def process_usage(pid):
+    """(CPU seconds, RSS MB, peak RSS MB) of a process, from /proc"""
+    with open(f'/proc/{pid}/stat') as f:
+        # Fields after the parenthesized command name; utime and stime are the 12th and 13th
+        fields = f.read().rsplit(')', 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    rss = peak = 0.0
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                rss = int(line.split()[1]) / 1024.0
+            elif line.startswith('VmHWM:'):
+                peak = int(line.split()[1]) / 1024.0
+    return cpu, rss, peak
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+class LoadServer:
+    """load_server.js as a child process, controlled over its stdin/stdout"""
+
+    def __init__(self, phones, rate, camera_rate, logs):
+        self.process = subprocess.Popen(
+            ['node', LOAD_SERVER, '--phones', str(phones), '--rate', str(rate),
+             '--camera-rate', str(camera_rate)] + list(logs),
+            cwd=BRIDGE_DIR, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1)
+        ready = self.read()
+        if ready.get('event') != 'listening':
+            raise RuntimeError(f"load_server.js did not start: {ready}")
+        self.port = ready['port']
+        self.frames = ready['frames']
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    def read(self):
+        line = self.process.stdout.readline()
+        if not line:
+            raise RuntimeError("load_server.js exited")
+        return json.loads(line)
+
+    def command(self, **command):
+        self.process.stdin.write(json.dumps(command) + '\n')
+        return self.read()
+
+    def set_rate(self, rate, camera_rate):
+        self.command(rate=rate, cameraRate=camera_rate)
+
+    def stats(self):
+        return self.command(stats=True)
+
+    def stop(self):
+        self.process.stdin.close()
+        try:
+            self.process.wait(5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+class Probe:
+    """Subscriber counting phone/imu and camera messages and the imu stamp latency"""
+
+    def __init__(self, node):
+        from rclpy.qos import QoSProfile, ReliabilityPolicy
+        from sensor_msgs.msg import CompressedImage, Imu
+        from std_msgs.msg import String
+        # Best effort matches both the best-effort and the reliable bridge publishers
+        qos = QoSProfile(depth=1000, reliability=ReliabilityPolicy.BEST_EFFORT)
+        node.create_subscription(Imu, '/phone/imu', self.on_imu, qos)
+        node.create_subscription(CompressedImage, '/phone/camera/compressed', self.on_camera, qos)
+        node.create_subscription(String, '/phone/bridge_stats', self.on_bridge_stats, qos)
+        self.lock = threading.Lock()
+        self.first_imu = threading.Event()
+        self.bridge_stats = None
+        self.start()
+
+    def start(self):
+        with self.lock:
+            self.imu = 0
+            self.camera = 0
+            self.latencies = []
+
+    def take(self):
+        with self.lock:
+            return self.imu, self.camera, self.latencies
+
+    def on_imu(self, msg):
+        received_ns = time.time_ns()
+        stamp = msg.header.stamp
+        with self.lock:
+            self.imu += 1
+            self.latencies.append((received_ns - stamp.sec * 1000000000 - stamp.nanosec) / 1e6)
+        self.first_imu.set()
+
+    def on_camera(self, msg):
+        with self.lock:
+            self.camera += 1
+
+    def on_bridge_stats(self, msg):
+        try:
+            self.bridge_stats = json.loads(msg.data)
+        except ValueError:
+            pass
+
+
+def start_bridge(name, port, log):
+    script, _module, parameters = BRIDGES[name]
+    ros_args = []
+    for key, value in parameters.items():
+        ros_args += ['-p', f"{key}:={str(value).format(port=port)}"]
+    return subprocess.Popen([sys.executable, script, '--ros-args'] + ros_args,
+                            cwd=BRIDGE_DIR, stdout=log, stderr=subprocess.STDOUT)
+
+
+def stop_bridge(process):
+    process.send_signal(signal.SIGINT)
+    try:
+        process.wait(10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def tail(log, lines=10):
+    log.flush()
+    log.seek(0)
+    return log.read().decode(errors='replace').splitlines()[-lines:]
+
+
+def measure_step(args, server, bridge, probe, rate):
+    server.set_rate(rate, args.camera_rate)
+    time.sleep(args.warmup)
+    bridge_start, server_start = process_usage(bridge.pid), process_usage(server.pid)
+    wall_start = time.monotonic()
+    before = server.stats()
+    probe.start()
+    time.sleep(args.duration)
+    received, camera, latencies = probe.take()
+    after = server.stats()
+    wall = time.monotonic() - wall_start
+    bridge_end, server_end = process_usage(bridge.pid), process_usage(server.pid)
+
+    sent = after['sent']['imu'] - before['sent']['imu']
+    camera_sent = after['sent']['camera'] - before['sent']['camera']
+    latencies.sort()
+    latency = ({'p50': percentile(latencies, 0.5), 'p95': percentile(latencies, 0.95),
+                'p99': percentile(latencies, 0.99), 'max': latencies[-1],
+                'mean': statistics.fmean(latencies)} if latencies else None)
+    delivered = received / sent if sent else 0.0
+    step = {
+        'rate': rate,
+        'total_rate': rate * args.phones,
+        'sent': sent,
+        'received': received,
+        'delivered': delivered,
+        'received_rate': received / wall,
+        'latency_ms': latency,
+        'camera_sent': camera_sent,
+        'camera_received': camera,
+        'cpu_percent': (bridge_end[0] - bridge_start[0]) / wall * 100.0,
+        'rss_mb': bridge_end[1],
+        'peak_rss_mb': bridge_end[2],
+        'server_cpu_percent': (server_end[0] - server_start[0]) / wall * 100.0,
+        'server_lag': after['lag'],
+    }
+    step['sustained'] = (delivered >= args.min_delivered and latency is not None
+                         and latency['p95'] <= args.max_latency and after['lag'] == 0)
+    return step
+
+
+def run_bridge(args, name, probe):
+    """Sweep one bridge over the rates; a result dict with status 'ok', 'failed' or 'skipped'"""
+    module = BRIDGES[name][1]
+    if not importable(module):
+        return {'status': 'skipped', 'reason': f"{module} not importable"}
+    server = LoadServer(args.phones, args.rates[0], args.camera_rate, args.logs)
+    log = tempfile.TemporaryFile()
+    bridge = start_bridge(name, server.port, log)
+    probe.first_imu.clear()
+    probe.bridge_stats = None
+    try:
+        if not probe.first_imu.wait(args.connect_timeout):
+            return {'status': 'failed', 'reason': 'no phone/imu message', 'log': tail(log)}
+        steps = []
+        for rate in args.rates:
+            step = measure_step(args, server, bridge, probe, rate)
+            if bridge.poll() is not None:
+                return {'status': 'failed', 'reason': f"bridge exited at {rate} Hz", 'steps': steps,
+                        'log': tail(log)}
+            steps.append(step)
+            print_step(name, step)
+            if not step['sustained']:
+                break
+        sustained = [step['rate'] for step in steps if step['sustained']]
+        return {'status': 'ok', 'steps': steps,
+                'max_sustained_rate': max(sustained) if sustained else 0,
+                'max_sustained_total_rate': max(sustained) * args.phones if sustained else 0,
+                'bridge_stats': probe.bridge_stats}
+    finally:
+        stop_bridge(bridge)
+        server.stop()
+        log.close()
+
+
+def print_step(name, step):
+    latency = step['latency_ms'] or {'p50': float('nan'), 'p95': float('nan')}
+    print(f"{name:22s} {step['rate']:6d} Hz {step['delivered']:8.1%} "
+          f"{latency['p50']:8.2f} {latency['p95']:8.2f} ms {step['cpu_percent']:6.1f}% "
+          f"{step['rss_mb']:7.1f} MB  server {step['server_cpu_percent']:5.1f}%"
+          f"{'' if step['sustained'] else '  not sustained'}", flush=True)
+
+
+def environment():
+    def output(command):
+        try:
+            return subprocess.run(command, cwd=BRIDGE_DIR, capture_output=True, text=True).stdout.strip() or None
+        except OSError:
+            return None
+    return {
+        'created': datetime.now(timezone.utc).isoformat(),
+        'commit': output(['git', 'rev-parse', '--short', 'HEAD']),
+        'host': platform.node(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'python': platform.python_version(),
+        'node': output(['node', '--version']),
+    }
+
+
+def compare(result, baseline, tolerance):
+    """Regressions of `result` against `baseline` (same document layout), as messages"""
+    regressions = []
+    for name, current in result['bridges'].items():
+        old = baseline.get('bridges', {}).get(name)
+        if current.get('status') != 'ok' or not old or old.get('status') != 'ok':
+            continue
+        if current['max_sustained_rate'] < old['max_sustained_rate']:
+            regressions.append(f"{name}: max sustained rate {old['max_sustained_rate']} -> "
+                               f"{current['max_sustained_rate']} Hz")
+        old_steps = {step['rate']: step for step in old['steps']}
+        for step in current['steps']:
+            before = old_steps.get(step['rate'])
+            if not before or not before['sustained']:
+                continue
+            for key, label in (('cpu_percent', 'CPU %'), ('peak_rss_mb', 'peak RSS MB')):
+                if step[key] > before[key] * (1.0 + tolerance):
+                    regressions.append(f"{name} @ {step['rate']} Hz: {label} {before[key]:.1f} -> {step[key]:.1f}")
+            if step['latency_ms'] and before['latency_ms'] \
+                    and step['latency_ms']['p95'] > before['latency_ms']['p95'] * (1.0 + tolerance):
+                regressions.append(f"{name} @ {step['rate']} Hz: p95 latency "
+                                   f"{before['latency_ms']['p95']:.2f} -> {step['latency_ms']['p95']:.2f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--bridges', nargs='+', choices=list(BRIDGES), default=list(BRIDGES))
+    parser.add_argument('--phones', type=int, default=1)
+    parser.add_argument('--rates', type=int, nargs='+', default=[25, 50, 100, 200, 400, 800],
+                        help='sensorData packets per second per phone, in increasing order')
+    parser.add_argument('--camera-rate', type=float, default=0.0, help='camera frames per second per phone')
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--warmup', type=float, default=2.0)
+    parser.add_argument('--connect-timeout', type=float, default=30.0)
+    parser.add_argument('--min-delivered', type=float, default=0.95)
+    parser.add_argument('--max-latency', type=float, default=100.0, help='p95 latency bound in ms')
+    parser.add_argument('--json', help="write the results here ('-' for stdout)")
+    parser.add_argument('--baseline', help='earlier --json output to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    parser.add_argument('logs', nargs='*', help='replay these sensor_logs instead of synthetic packets')
+    args = parser.parse_args()
+
+    result = {'benchmark': 'end_to_end', 'environment': environment(),
+              'config': {key: value for key, value in vars(args).items() if key not in ('json', 'baseline')},
+              'bridges': {}}
+    missing = None
+    if not os.path.exists('/proc/self/stat'):
+        missing = 'needs /proc (Linux)'
+    elif not importable('rclpy'):
+        missing = 'rclpy not importable'
+    else:
+        missing = node_ready()
+
+    out = sys.stderr if args.json == '-' else sys.stdout
+    if missing:
+        print(f"skipped: {missing}", file=out)
+        result['bridges'] = {name: {'status': 'skipped', 'reason': missing} for name in args.bridges}
+    else:
+        import rclpy
+        from rclpy.executors import SingleThreadedExecutor
+        rclpy.init()
+        node = rclpy.create_node('bench_end_to_end_probe')
+        probe = Probe(node)
+        executor = SingleThreadedExecutor()
+        executor.add_node(node)
+        spinner = threading.Thread(target=executor.spin, daemon=True)
+        spinner.start()
+        stdout, sys.stdout = sys.stdout, out
+        try:
+            print(f"{args.phones} phone(s), camera {args.camera_rate:g} fps, "
+                  f"{'replayed logs' if args.logs else 'synthetic packets'}, {args.duration:g} s per step")
+            print(f"{'bridge':22s} {'rate':>9s} {'deliv.':>8s} {'p50':>8s} {'p95':>8s}    "
+                  f"{'CPU':>6s}  {'RSS':>7s}")
+            for name in args.bridges:
+                result['bridges'][name] = outcome = run_bridge(args, name, probe)
+                if outcome['status'] != 'ok':
+                    print(f"{name:22s} {outcome['status']}: {outcome['reason']}")
+                    for line in outcome.get('log', ()):
+                        print(f"    {line}")
+                else:
+                    print(f"{name:22s} max sustained {outcome['max_sustained_rate']} Hz per phone")
+        finally:
+            sys.stdout = stdout
+            executor.shutdown()
+            node.destroy_node()
+            rclpy.shutdown()
+
+    if args.json == '-':
+        json.dump(result, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        for message in regressions:
+            print(f"regression: {message}", file=out)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Bytes on the wire and bridge decode CPU per sensorData packet: the full
+Socket.IO sensorData blob against field-subscription deltas (JSON and
+MessagePack) rebuilt by DeltaState, over the recorded sensor_logs. Deltas
+are produced by field_stream.DeltaEncoder (the Python port of server.js's
+encoder) for the fields of the default converters.
+
+    python3 benchmarks/bench_field_stream.py [--repeat 5] [logs ...]
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+BRIDGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BRIDGE_DIR)
+
+from phone_sensor_bridge.clock_sync import parse_time  # noqa: E402
+from phone_sensor_bridge.decoders import make_decoder, make_msgpack_decoder, msgspec  # noqa: E402
+from phone_sensor_bridge.field_stream import DeltaEncoder, DeltaState  # noqa: E402
+
+DEFAULT_LOGS = sorted(glob.glob(os.path.join(BRIDGE_DIR, 'sensor_logs', '*.jsonl')))
+
+# subscription() of the default converters with battery_max_rate 0.2
+DEFAULT_FIELDS = {'accelerometer': 0, 'gyroscope': 0, 'orientation': 0, 'gps': 0,
+                  'battery': 0.2, 'deviceMotion': 0}
+
+# Socket.IO event packets: text '42[...]', binary '451-[...]' + one attachment
+SENSOR_DATA_PREFIX = b'42["sensorData",'
+DELTA_PREFIX = b'42["sensorDelta",'
+BINARY_DELTA_HEADER = b'451-["sensorDelta",{"_placeholder":true,"num":0}]'
+
+
+def dumps(obj):
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+
+def load_records(paths):
+    records = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    stamp = parse_time(record['timestamp'])
+                    records.append((stamp, record['data']))
+    return records
+
+
+def make_streams(records):
+    """(full packets, JSON delta packets, (header, MessagePack attachment) pairs)"""
+    encoder = DeltaEncoder(DEFAULT_FIELDS)
+    full, json_deltas, msgpack_deltas = [], [], []
+    encode = msgspec.msgpack.encode if msgspec is not None else None
+    for stamp, data in records:
+        full.append(SENSOR_DATA_PREFIX + dumps(data) + b']')
+        delta = encoder.delta(data, stamp)
+        if delta is None:
+            continue
+        json_deltas.append(DELTA_PREFIX + dumps(delta) + b']')
+        if encode is not None:
+            msgpack_deltas.append((BINARY_DELTA_HEADER, encode(delta)))
+    return full, json_deltas, msgpack_deltas
+
+
+def best_of(repeat, run):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.process_time()
+        run()
+        best = min(best, time.process_time() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('logs', nargs='*', default=DEFAULT_LOGS)
+    args = parser.parse_args()
+
+    records = load_records(args.logs)
+    full, json_deltas, msgpack_deltas = make_streams(records)
+    loads = make_decoder()
+    count = len(records)
+    print(f"{count} sensorData packets, {len(json_deltas)} deltas "
+          f"(fields: {', '.join(DEFAULT_FIELDS)})")
+
+    def decode_full():
+        for packet in full:
+            loads(packet[2:])
+
+    def decode_json_deltas():
+        state = DeltaState()
+        for packet in json_deltas:
+            state.apply(loads(packet[2:])[1])
+
+    unpack = make_msgpack_decoder()
+
+    def decode_msgpack_deltas():
+        state = DeltaState()
+        for header, attachment in msgpack_deltas:
+            loads(header[4:])
+            state.apply(unpack(attachment))
+
+    rows = [('full sensorData (JSON)', sum(map(len, full)), decode_full),
+            ('deltas (JSON)', sum(map(len, json_deltas)), decode_json_deltas)]
+    if msgpack_deltas and unpack is not None:
+        rows.append(('deltas (MessagePack)', sum(len(h) + len(a) for h, a in msgpack_deltas),
+                     decode_msgpack_deltas))
+    else:
+        print("MessagePack: skipped (msgspec not installed)")
+
+    baseline_bytes = rows[0][1]
+    baseline_cpu = None
+    print(f"{'stream':24s} {'bytes/packet':>12s} {'vs full':>8s} {'CPU us/packet':>14s} {'vs full':>8s}")
+    for name, size, run in rows:
+        cpu = best_of(args.repeat, run)
+        baseline_cpu = baseline_cpu or cpu
+        print(f"{name:24s} {size / count:12.1f} {size / baseline_bytes:8.2f} "
+              f"{cpu / count * 1e6:14.2f} {cpu / baseline_cpu:8.2f}")
+
+
+if __name__ == '__main__':
+    main()
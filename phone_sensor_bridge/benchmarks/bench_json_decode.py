@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Decode every recorded sensor_logs packet with each available JSON backend
+and report time and retained allocations per packet.
+
+    python3 benchmarks/bench_json_decode.py [--repeat 5]
+"""
+
+import argparse
+import gc
+import glob
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+BRIDGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BRIDGE_DIR)
+
+from phone_sensor_bridge.decoders import available_backends, make_decoder  # noqa: E402
+
+DEFAULT_LOGS = sorted(glob.glob(os.path.join(BRIDGE_DIR, 'sensor_logs', '*.jsonl')))
+
+
+def load_packets(paths):
+    """Re-encode the logged payloads as the bytes a bridge receives"""
+    packets = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            for line in f:
+                packets.append(json.dumps(json.loads(line)['data'], separators=(',', ':')).encode())
+    return packets
+
+
+def measure(decode, packets, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for packet in packets:
+            decode(packet)
+        best = min(best, time.perf_counter() - start)
+
+    # Memory still held by the decoded objects, and blocks allocated while decoding
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    snapshot_before = tracemalloc.take_snapshot()
+    decoded = [decode(packet) for packet in packets]
+    after, _ = tracemalloc.get_traced_memory()
+    snapshot_after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in snapshot_after.compare_to(snapshot_before, 'filename'))
+    del decoded
+    return best, (after - before) / len(packets), blocks / len(packets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('logs', nargs='*', default=DEFAULT_LOGS)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    packets = load_packets(args.logs)
+    total = sum(len(p) for p in packets)
+    print(f"{len(packets)} packets, {total / 1e6:.1f} MB, {total / len(packets):.0f} B/packet")
+
+    # stdlib first: it is what both bridges used before pluggable decoding
+    variants = [('stdlib', False)] + [(backend, False) for backend in available_backends()
+                                      if backend != 'stdlib']
+    if 'msgspec' in available_backends():
+        variants.append(('msgspec', True))
+
+    baseline = None
+    for backend, typed in variants:
+        elapsed, retained, blocks = measure(make_decoder(backend, typed), packets, args.repeat)
+        baseline = baseline or elapsed
+        name = f"{backend}{' typed' if typed else ''}"
+        print(f"{name:<14} {elapsed / len(packets) * 1e6:7.2f} us/packet  "
+              f"{total / elapsed / 1e6:7.1f} MB/s  {retained:7.0f} B retained/packet  "
+              f"{blocks:6.1f} blocks/packet  {baseline / elapsed:4.1f}x")
+
+
+if __name__ == '__main__':
+    main()
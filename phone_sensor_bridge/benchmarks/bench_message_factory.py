@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Per-sample CPU cost of building PhoneSensorBridge messages: the original
+fresh-message code versus the preallocated templates in message_factory,
+over the recorded sensor_logs. Publishing is left out; it serializes the
+same message either way.
+
+    python3 benchmarks/bench_message_factory.py [--repeat 3]
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import sys
+import time
+
+BRIDGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BRIDGE_DIR)
+
+from builtin_interfaces.msg import Time as ROSTime  # noqa: E402
+from geometry_msgs.msg import QuaternionStamped  # noqa: E402
+from sensor_msgs.msg import Imu, NavSatFix, BatteryState  # noqa: E402
+from std_msgs.msg import Header  # noqa: E402
+
+from phone_sensor_bridge.message_factory import (  # noqa: E402
+    ImuTemplate, NavSatFixTemplate, BatteryStateTemplate, QuaternionStampedTemplate,
+    UNKNOWN_COVARIANCE,
+)
+
+DEFAULT_LOGS = sorted(glob.glob(os.path.join(BRIDGE_DIR, 'sensor_logs', '*.jsonl')))
+FRAME = 'phone_base_link'
+DEG_TO_RAD = math.pi / 180.0
+
+
+def load_samples(paths):
+    samples = []
+    for path in paths:
+        with open(path) as f:
+            samples.extend(json.loads(line)['data'] for line in f)
+    return samples
+
+
+def euler_to_quaternion(roll, pitch, yaw):
+    cy, sy = math.cos(yaw * 0.5), math.sin(yaw * 0.5)
+    cp, sp = math.cos(pitch * 0.5), math.sin(pitch * 0.5)
+    cr, sr = math.cos(roll * 0.5), math.sin(roll * 0.5)
+    return (cy * cp * sr - sy * sp * cr,
+            sy * cp * sr + cy * sp * cr,
+            sy * cp * cr - cy * sp * sr,
+            cy * cp * cr + sy * sp * sr)
+
+
+def legacy(samples, stamp_ns):
+    """Fresh messages per sample, as listen.py built them before templates"""
+    for data in samples:
+        header = Header()
+        stamp = ROSTime()
+        stamp.sec, stamp.nanosec = divmod(stamp_ns, 1000000000)
+        header.stamp = stamp
+        header.frame_id = FRAME
+
+        imu_msg = Imu()
+        imu_msg.header = header
+        accel, gyro, orient = data['accelerometer'], data['gyroscope'], data['orientation']
+        imu_msg.linear_acceleration.x = float(accel.get('x', 0.0)) * 9.81
+        imu_msg.linear_acceleration.y = float(accel.get('y', 0.0)) * 9.81
+        imu_msg.linear_acceleration.z = float(accel.get('z', 0.0)) * 9.81
+        imu_msg.angular_velocity.x = math.radians(float(gyro.get('x', 0.0)))
+        imu_msg.angular_velocity.y = math.radians(float(gyro.get('y', 0.0)))
+        imu_msg.angular_velocity.z = math.radians(float(gyro.get('z', 0.0)))
+        q = euler_to_quaternion(math.radians(float(orient.get('beta', 0.0))),
+                                math.radians(float(orient.get('gamma', 0.0))),
+                                math.radians(float(orient.get('alpha', 0.0))))
+        imu_msg.orientation.x, imu_msg.orientation.y, imu_msg.orientation.z, imu_msg.orientation.w = q
+        imu_msg.orientation_covariance[0] = -1.0
+        imu_msg.angular_velocity_covariance[0] = 0.01
+        imu_msg.linear_acceleration_covariance[0] = 0.01
+
+        gps = data.get('gps')
+        if gps and gps.get('latitude') is not None:
+            gps_msg = NavSatFix()
+            gps_msg.header = header
+            gps_msg.latitude = float(gps.get('latitude', 0.0))
+            gps_msg.longitude = float(gps.get('longitude', 0.0))
+            gps_msg.altitude = float(gps.get('altitude', 0.0))
+            gps_msg.status.status = 0
+            gps_msg.status.service = 1
+            accuracy = float(gps.get('accuracy', 10.0))
+            gps_msg.position_covariance[0] = accuracy * accuracy
+            gps_msg.position_covariance[4] = accuracy * accuracy
+            gps_msg.position_covariance[8] = accuracy * accuracy
+            gps_msg.position_covariance_type = 2
+
+        battery_msg = BatteryState()
+        battery_msg.header = header
+        battery_msg.percentage = float(data['battery'].get('level', 0.0))
+        battery_msg.voltage = float(data['battery'].get('voltage', 0.0))
+        battery_msg.present = True
+        battery_msg.power_supply_status = BatteryState.POWER_SUPPLY_STATUS_NOT_CHARGING
+
+        quat_msg = QuaternionStamped()
+        quat_msg.header = header
+        q = euler_to_quaternion(math.radians(float(orient.get('gamma', 0.0))),
+                                math.radians(float(orient.get('beta', 0.0))),
+                                math.radians(float(orient.get('alpha', 0.0))))
+        quat_msg.quaternion.x, quat_msg.quaternion.y, quat_msg.quaternion.z, quat_msg.quaternion.w = q
+
+
+def templated(samples, stamp_ns):
+    """Preallocated templates, as listen.py builds messages now"""
+    imu = ImuTemplate(FRAME, UNKNOWN_COVARIANCE, (0.01,) + (0.0,) * 8, (0.01,) + (0.0,) * 8)
+    gps_template = NavSatFixTemplate(FRAME)
+    battery = BatteryStateTemplate(FRAME)
+    orientation = QuaternionStampedTemplate(FRAME)
+    for data in samples:
+        accel, gyro, orient = data['accelerometer'], data['gyroscope'], data['orientation']
+        alpha = float(orient.get('alpha', 0.0)) * DEG_TO_RAD
+        beta = float(orient.get('beta', 0.0)) * DEG_TO_RAD
+        gamma = float(orient.get('gamma', 0.0)) * DEG_TO_RAD
+        imu.fill(stamp_ns,
+                 float(accel.get('x', 0.0)) * 9.81,
+                 float(accel.get('y', 0.0)) * 9.81,
+                 float(accel.get('z', 0.0)) * 9.81,
+                 float(gyro.get('x', 0.0)) * DEG_TO_RAD,
+                 float(gyro.get('y', 0.0)) * DEG_TO_RAD,
+                 float(gyro.get('z', 0.0)) * DEG_TO_RAD,
+                 euler_to_quaternion(beta, gamma, alpha))
+
+        gps = data.get('gps')
+        if gps and gps.get('latitude') is not None:
+            accuracy = float(gps.get('accuracy', 10.0))
+            gps_template.fill(stamp_ns,
+                              float(gps.get('latitude', 0.0)),
+                              float(gps.get('longitude', 0.0)),
+                              float(gps.get('altitude', 0.0)),
+                              accuracy * accuracy)
+
+        battery.fill(stamp_ns,
+                     float(data['battery'].get('level', 0.0)),
+                     float(data['battery'].get('voltage', 0.0)),
+                     BatteryState.POWER_SUPPLY_STATUS_NOT_CHARGING)
+        orientation.fill(stamp_ns, euler_to_quaternion(gamma, beta, alpha))
+
+
+def run(name, func, samples, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.process_time()
+        func(samples, time.time_ns())
+        best = min(best, time.process_time() - start)
+    print(f"{name:<10} {best / len(samples) * 1e6:8.1f} us CPU/sample  {len(samples) / best:9.0f} samples/s")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('logs', nargs='*', default=DEFAULT_LOGS)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    samples = load_samples(args.logs)
+    print(f"{len(samples)} samples, __debug__={__debug__} (run with python3 -O to skip setter checks)")
+    before = run('legacy', legacy, samples, args.repeat)
+    after = run('templates', templated, samples, args.repeat)
+    print(f"CPU per sample: {after / before * 100:.0f}% of legacy")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Replay test_stream.mjpg through the original preview loop and MjpegDemuxer
+and report MB/s and frames/s for each.
+
+    python3 benchmarks/bench_mjpeg_demux.py [--chunk-size 1024] [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+BRIDGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BRIDGE_DIR)
+
+from phone_sensor_bridge.mjpeg_stream import MjpegDemuxer  # noqa: E402
+
+DEFAULT_STREAM = os.path.join(BRIDGE_DIR, 'test_stream.mjpg')
+
+
+def chunks_of(data, chunk_size):
+    view = memoryview(data)
+    for offset in range(0, len(data), chunk_size):
+        # iter_content hands out bytes objects, so do the same here
+        yield bytes(view[offset:offset + chunk_size])
+
+
+def legacy_loop(data, chunk_size):
+    """The original preview_mjpeg_stream.py extraction loop, minus decoding"""
+    frames = 0
+    bytes_data = b''
+    for chunk in chunks_of(data, chunk_size):
+        bytes_data += chunk
+        a = bytes_data.find(b'\xff\xd8')
+        b = bytes_data.find(b'\xff\xd9')
+        if a != -1 and b != -1 and b > a:
+            jpg = bytes_data[a:b+2]
+            bytes_data = bytes_data[b+2:]
+            frames += 1
+    return frames
+
+
+def demuxer_loop(data, chunk_size):
+    demuxer = MjpegDemuxer()
+    frames = 0
+    for _frame in demuxer.iter_frames(chunks_of(data, chunk_size)):
+        frames += 1
+    return frames
+
+
+def run(name, func, data, chunk_size, repeat):
+    best = float('inf')
+    frames = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        frames = func(data, chunk_size)
+        best = min(best, time.perf_counter() - start)
+    mb_per_s = len(data) / best / 1e6
+    print(f"{name:<10} {frames:>7d} frames  {best * 1000:8.1f} ms  "
+          f"{mb_per_s:8.1f} MB/s  {frames / best:10.0f} frames/s")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('stream', nargs='?', default=DEFAULT_STREAM)
+    parser.add_argument('--chunk-size', type=int, default=1024)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with open(args.stream, 'rb') as f:
+        data = f.read()
+
+    print(f"{os.path.basename(args.stream)}: {len(data) / 1e6:.1f} MB, chunk size {args.chunk_size}")
+    legacy = run('legacy', legacy_loop, data, args.chunk_size, args.repeat)
+    demux = run('demuxer', demuxer_loop, data, args.chunk_size, args.repeat)
+    print(f"speedup: {legacy / demux:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
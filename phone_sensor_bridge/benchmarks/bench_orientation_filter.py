@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Cost and accuracy of orientation_filter.OrientationFilter.
+
+- speed: microseconds per update() and the share of one core at 200 Hz
+- synthetic: a 200 Hz trajectory with known orientation, gyro noise and
+  bias; RMS error of the filter against the truth for gravity-only
+  correction (accelerometer including gravity; tilt error, as yaw is not
+  observable) and for a noisy 10 Hz DeviceOrientation reference, next to
+  plain gyro integration and to copying the latest reference (what
+  phone/imu publishes without the filter). `2σ` is the share of per-axis
+  errors within twice the reported standard deviation.
+- logs: the browser's orientation changes in only some packets (phone.js
+  repeats the last reading). Every --holdout'th fresh reading is given to
+  the filter as its reference; at the other fresh readings the filter's
+  estimate and the previous reading are compared with the new one.
+
+    python3 benchmarks/bench_orientation_filter.py [--seconds 60] [--holdout 2] [logs ...]
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import time
+
+BRIDGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BRIDGE_DIR)
+
+from phone_sensor_bridge.clock_sync import parse_time  # noqa: E402
+from phone_sensor_bridge.conversions import DEG_TO_RAD, GRAVITY, euler_to_quaternion, orientation_angles  # noqa: E402
+from phone_sensor_bridge.orientation_filter import OrientationFilter  # noqa: E402
+
+DEFAULT_LOGS = sorted(glob.glob(os.path.join(BRIDGE_DIR, 'sensor_logs', '*.jsonl')))
+RATE = 200.0
+
+
+def multiply(a, b):
+    ax, ay, az, aw = a
+    bx, by, bz, bw = b
+    return (aw * bx + ax * bw + ay * bz - az * by,
+            aw * by - ax * bz + ay * bw + az * bx,
+            aw * bz + ax * by - ay * bx + az * bw,
+            aw * bw - ax * bx - ay * by - az * bz)
+
+
+def conjugate(q):
+    return (-q[0], -q[1], -q[2], q[3])
+
+
+def rotate(q, v):
+    """v rotated by q (body to world)"""
+    x, y, z, _ = multiply(multiply(q, (v[0], v[1], v[2], 0.0)), conjugate(q))
+    return x, y, z
+
+
+def error_vector(estimate, truth):
+    """World-frame rotation vector (rad) from estimate to truth"""
+    x, y, z, w = multiply(truth, conjugate(estimate))
+    if w < 0.0:
+        x, y, z, w = -x, -y, -z, -w
+    s = math.sqrt(x * x + y * y + z * z)
+    if s < 1e-12:
+        return 0.0, 0.0, 0.0
+    angle = 2.0 * math.atan2(s, w)
+    return x / s * angle, y / s * angle, z / s * angle
+
+
+def angle(estimate, truth):
+    return math.sqrt(sum(e * e for e in error_vector(estimate, truth)))
+
+
+def tilt(estimate, truth):
+    """Angle between the gravity directions (body frame) of two orientations"""
+    a = rotate(conjugate(estimate), (0.0, 0.0, 1.0))
+    b = rotate(conjugate(truth), (0.0, 0.0, 1.0))
+    return math.acos(max(-1.0, min(1.0, sum(x * y for x, y in zip(a, b)))))
+
+
+def integrate(q, wx, wy, wz, dt):
+    """q advanced by the exact rotation of body rates over dt"""
+    rate = math.sqrt(wx * wx + wy * wy + wz * wz)
+    if rate < 1e-12:
+        return q
+    half = 0.5 * rate * dt
+    s = math.sin(half) / rate
+    return multiply(q, (wx * s, wy * s, wz * s, math.cos(half)))
+
+
+def trajectory(seconds, seed=0):
+    """[(stamp_ns, true q, true body rates)] at RATE Hz"""
+    rng = random.Random(seed)
+    phases = [rng.uniform(0, math.pi) for _ in range(3)]
+    q = euler_to_quaternion(30.0, 20.0, -10.0)
+    samples = []
+    dt = 1.0 / RATE
+    for i in range(int(seconds * RATE)):
+        t = i * dt
+        rates = (0.8 * math.sin(0.5 * t + phases[0]),
+                 0.6 * math.sin(0.7 * t + phases[1]),
+                 0.5 * math.sin(0.3 * t + phases[2]))
+        samples.append((int(t * 1e9), q, rates))
+        q = integrate(q, *rates, dt)
+    return samples
+
+
+def run_synthetic(samples, gravity, reference_rate, gyro_noise=0.005, bias=(0.02, -0.01, 0.015),
+                  accel_noise=0.2, reference_noise=2.0, seed=1):
+    """
+    RMS error (deg) of the filter, plain gyro integration and reference hold,
+    and 2σ coverage; tilt errors only when there is no reference
+    """
+    rng = random.Random(seed)
+    f = OrientationFilter()
+    noise = gyro_noise * math.sqrt(RATE)
+    every = int(RATE / reference_rate) if reference_rate else 0
+    gyro_q = samples[0][1]
+    held = None
+    sq_filter = sq_gyro = sq_hold = 0.0
+    covered = checked = 0
+    for i, (stamp_ns, truth, rates) in enumerate(samples):
+        gx, gy, gz = (r + b + rng.gauss(0.0, noise) for r, b in zip(rates, bias))
+        if gravity:
+            ax, ay, az = rotate(conjugate(truth), (0.0, 0.0, GRAVITY))
+        else:
+            ax = ay = az = 0.0
+        ax, ay, az = (a + rng.gauss(0.0, accel_noise) for a in (ax, ay, az))
+        reference = None
+        if every and i % every == 0:
+            noise_angles = [rng.gauss(0.0, reference_noise * DEG_TO_RAD) for _ in range(3)]
+            reference = held = multiply(integrate((0.0, 0.0, 0.0, 1.0), *noise_angles, 1.0), truth)
+        q, variance = f.update(stamp_ns, ax, ay, az, gx, gy, gz, reference)
+        if i:
+            gyro_q = integrate(gyro_q, gx, gy, gz, 1.0 / RATE)
+        if i < RATE:
+            continue  # convergence
+        errors = error_vector(q, truth)
+        if every:
+            sq_filter += sum(e * e for e in errors)
+            sq_gyro += angle(gyro_q, truth) ** 2
+        else:
+            sq_filter += tilt(q, truth) ** 2
+            sq_gyro += tilt(gyro_q, truth) ** 2
+            errors = errors[:2]
+        if held is not None:
+            sq_hold += angle(held, truth) ** 2
+        for e, v in zip(errors, variance):
+            covered += e * e <= 4.0 * v
+            checked += 1
+    count = len(samples) - int(RATE)
+    rms = lambda total: math.degrees(math.sqrt(total / count))  # noqa: E731
+    return rms(sq_filter), rms(sq_gyro), rms(sq_hold) if held is not None else None, covered / checked
+
+
+def load_log(path):
+    """[(stamp_ns, data)] of a recorded log, stamped with the phone's send time"""
+    records = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            data = record['data']
+            stamp = data.get('timestamp') or record['timestamp']
+            records.append((int(parse_time(stamp) * 1e9), data))
+    return records
+
+
+def run_log(records, holdout, accel_scale=GRAVITY):
+    """Median and p95 error (deg) at held-out fresh readings: filter, previous reading; 2σ coverage"""
+    f = OrientationFilter()
+    filter_errors, hold_errors = [], []
+    covered = checked = 0
+    held = previous = None
+    fresh = 0
+    for stamp_ns, data in records:
+        if 'accelerometer' not in data or 'gyroscope' not in data or 'orientation' not in data:
+            continue
+        accel, gyro = data['accelerometer'], data['gyroscope']
+        reference = None
+        browser = euler_to_quaternion(*orientation_angles(data['orientation']))
+        is_fresh = browser != previous
+        previous = browser
+        if is_fresh:
+            fresh += 1
+            if fresh % holdout == 0:
+                reference = browser
+        q, variance = f.update(stamp_ns, accel.get('x', 0.0) * accel_scale, accel.get('y', 0.0) * accel_scale,
+                               accel.get('z', 0.0) * accel_scale, gyro.get('x', 0.0) * DEG_TO_RAD,
+                               gyro.get('y', 0.0) * DEG_TO_RAD, gyro.get('z', 0.0) * DEG_TO_RAD, reference)
+        if reference is not None:
+            held = reference
+            continue
+        if held is None or not is_fresh:
+            continue
+        errors = error_vector(q, browser)
+        filter_errors.append(math.degrees(math.sqrt(sum(e * e for e in errors))))
+        hold_errors.append(math.degrees(angle(held, browser)))
+        for e, v in zip(errors, variance):
+            covered += e * e <= 4.0 * v
+            checked += 1
+
+    def summary(errors):
+        errors = sorted(errors)
+        return statistics.median(errors), errors[int(0.95 * (len(errors) - 1))]
+    return len(filter_errors), summary(filter_errors), summary(hold_errors), covered / max(checked, 1)
+
+
+def measure_speed(samples, gravity):
+    f = OrientationFilter()
+    update = f.update
+    reference = (0.0, 0.0, 0.0, 1.0)
+    inputs = [(stamp_ns, 0.1, 0.2, GRAVITY if gravity else 0.3, rates[0], rates[1], rates[2],
+               None if gravity else reference) for stamp_ns, _q, rates in samples]
+    best = float('inf')
+    for _ in range(3):
+        start = time.process_time()
+        for args in inputs:
+            update(*args)
+        best = min(best, time.process_time() - start)
+    return best / len(inputs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=60.0)
+    parser.add_argument('--holdout', type=int, default=2,
+                        help='give the filter every Nth fresh orientation reading')
+    parser.add_argument('logs', nargs='*', default=DEFAULT_LOGS)
+    args = parser.parse_args()
+
+    samples = trajectory(args.seconds)
+
+    print("speed")
+    for name, gravity in (('gravity correction', True), ('reference correction', False)):
+        seconds = measure_speed(samples, gravity)
+        print(f"  {name:22s} {seconds * 1e6:6.2f} us/update, {seconds * RATE * 100:.2f}% of a core at 200 Hz")
+
+    print(f"synthetic, {args.seconds:.0f} s at {RATE:.0f} Hz (RMS error, deg)")
+    filtered, gyro, _, coverage = run_synthetic(samples, gravity=True, reference_rate=0)
+    print(f"  gravity only (tilt):     filter {filtered:6.2f}   gyro only {gyro:6.2f}   2σ {coverage:.0%}")
+    filtered, gyro, held, coverage = run_synthetic(samples, gravity=False, reference_rate=10.0)
+    print(f"  10 Hz reference (2 deg): filter {filtered:6.2f}   gyro only {gyro:6.2f}   "
+          f"latest reference {held:6.2f}   2σ {coverage:.0%}")
+
+    print(f"recorded logs, every {args.holdout} fresh readings as reference "
+          "(error vs the other readings, deg: median / p95)")
+    for path in args.logs:
+        count, filtered, held, coverage = run_log(load_log(path), args.holdout)
+        if not count:
+            continue
+        print(f"  {os.path.basename(path)}: {count} held-out readings   filter {filtered[0]:6.2f} / {filtered[1]:6.2f}"
+              f"   previous reading {held[0]:6.2f} / {held[1]:6.2f}   2σ {coverage:.0%}")
+
+
+if __name__ == '__main__':
+    main()
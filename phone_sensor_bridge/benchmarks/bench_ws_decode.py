@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Feed the recorded sensor_logs as WebSocket text frames through
+WebSocketTransport.on_message (decode, stamp, convert, publish) and compare
+throughput with per-packet logging (verbosity 'debug', what
+ros_websocket_bridge.py used to do for every message) against the periodic
+summary ('summary', the default) and no logging at all ('quiet').
+
+    python3 benchmarks/bench_ws_decode.py [--limit 2000] 2>/dev/null
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+BRIDGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BRIDGE_DIR)
+
+import rclpy  # noqa: E402
+from rclpy.parameter import Parameter  # noqa: E402
+
+from phone_sensor_bridge.listen import PhoneSensorBridge  # noqa: E402
+from phone_sensor_bridge.transports import WebSocketTransport  # noqa: E402
+
+DEFAULT_LOGS = sorted(glob.glob(os.path.join(BRIDGE_DIR, 'sensor_logs', '*.jsonl')))
+
+
+def load_messages(paths, limit):
+    """Re-serialize the logged payloads the way they arrive over the socket"""
+    messages = []
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                messages.append(json.dumps(json.loads(line)['data']))
+                if limit and len(messages) >= limit:
+                    return messages
+    return messages
+
+
+def run(verbosity, messages):
+    node = PhoneSensorBridge(connect=False, parameter_overrides=[
+        # Unreachable on purpose: the benchmark drives on_message directly
+        Parameter('websocket_url', value='ws://127.0.0.1:9'),
+        Parameter('transport', value='websocket'),
+        Parameter('verbosity', value=verbosity),
+        # Publish on the calling thread so the whole path is timed
+        Parameter('ingest_queue', value=False),
+    ])
+    transport = WebSocketTransport(node)
+    try:
+        start = time.perf_counter()
+        for message in messages:
+            transport.on_message(None, message)
+        elapsed = time.perf_counter() - start
+        return elapsed, sum(node.stats.report()['decode_failures'].values())
+    finally:
+        node.destroy_node()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('logs', nargs='*', default=DEFAULT_LOGS)
+    parser.add_argument('--limit', type=int, default=2000, help='messages per run (0 = all)')
+    args = parser.parse_args()
+
+    messages = load_messages(args.logs, args.limit)
+    rclpy.init()
+    try:
+        results = {verbosity: run(verbosity, messages) for verbosity in ('debug', 'summary', 'quiet')}
+    finally:
+        rclpy.shutdown()
+
+    for verbosity, (elapsed, failures) in results.items():
+        print(f"{verbosity:<8} {len(messages) / elapsed:9.0f} msg/s  "
+              f"{elapsed / len(messages) * 1e6:8.1f} us/msg  {failures} decode failures")
+    print(f"speedup summary vs debug: {results['debug'][0] / results['summary'][0]:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
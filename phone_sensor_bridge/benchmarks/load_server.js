@@ -0,0 +1,246 @@
+#!/usr/bin/env node
+// Stand-in for server.js driven by bench_end_to_end.py: N simulated phones
+// emitting sensorData (synthetic or replayed from sensor_logs) and camera
+// frames at set rates, over the same interfaces the bridges read:
+//   - Socket.IO: sensorData, sensorDelta for field subscribers (the real
+//     classes/FieldSubscriptions.js), cameraFrame / cameraFrameBinary, pong
+//   - raw WebSocket: every packet as a JSON text frame, plus /api/latest-data
+// Plain HTTP, so TLS stays out of the numbers.
+//
+// Every packet carries its send time as both `phoneTimestamp` and
+// `timestamp`, so a bridge stamping with timestamp_source 'phone' (the
+// default) puts the send time in each header and a subscriber reads the
+// end-to-end latency off the stamp.
+//
+//   node benchmarks/load_server.js [--port 0] [--phones 1] [--rate 50]
+//        [--camera-rate 0] [--mjpeg test_stream.mjpg] [sensor_logs/*.jsonl ...]
+//
+// Control is line-delimited JSON: stdin takes {"rate": Hz per phone,
+// "cameraRate": fps per phone} (restarts the counters) and {"stats": true};
+// stdout prints {"event": "listening", "port"} once and answers each command
+// with {"event": "stats", "elapsed", "sent", "lag"}.
+
+const http = require('http');
+const fs = require('fs');
+const path = require('path');
+const readline = require('readline');
+const { Server } = require('socket.io');
+const WebSocket = require('ws');
+const FieldSubscriptions = require('../classes/FieldSubscriptions');
+
+const BINARY_CAMERA_ROOM = 'camera-binary';
+const FIELD_SUBSCRIBER_ROOM = 'field-subscribers';
+const TICK_MS = 1;
+
+function parseArgs(argv) {
+    const options = {
+        port: 0,
+        phones: 1,
+        rate: 50,
+        cameraRate: 0,
+        mjpeg: path.join(__dirname, '..', 'test_stream.mjpg'),
+        logs: []
+    };
+    for (let i = 0; i < argv.length; i++) {
+        const arg = argv[i];
+        if (arg === '--port') options.port = Number(argv[++i]);
+        else if (arg === '--phones') options.phones = Number(argv[++i]);
+        else if (arg === '--rate') options.rate = Number(argv[++i]);
+        else if (arg === '--camera-rate') options.cameraRate = Number(argv[++i]);
+        else if (arg === '--mjpeg') options.mjpeg = argv[++i];
+        else options.logs.push(arg);
+    }
+    return options;
+}
+
+// sensorData payloads of recorded logs, without the fields the stand-in sets
+function loadRecorded(paths) {
+    const packets = [];
+    for (const file of paths) {
+        for (const line of fs.readFileSync(file, 'utf8').split('\n')) {
+            if (!line.trim()) continue;
+            const { data } = JSON.parse(line);
+            delete data.timestamp;
+            delete data.phoneTimestamp;
+            delete data.connectionId;
+            packets.push(data);
+        }
+    }
+    return packets;
+}
+
+// Shaped like server.js's sensorData after SensorProcessor, values changing every packet
+function syntheticPacket(phone, count) {
+    const t = count / 50 + phone;
+    const ax = 0.1 * Math.sin(t), ay = 0.1 * Math.cos(1.3 * t), az = 1 + 0.05 * Math.sin(2.1 * t);
+    const second = Math.floor(count / 50);
+    return {
+        accelerometer: { x: ax, y: ay, z: az, magnitude: Math.sqrt(ax * ax + ay * ay + az * az) },
+        gyroscope: { x: 20 * Math.sin(0.7 * t), y: 15 * Math.cos(0.4 * t), z: 5 * Math.sin(t) },
+        orientation: { alpha: (10 * t) % 360, beta: 30 * Math.sin(0.2 * t), gamma: 20 * Math.cos(0.3 * t), absolute: false },
+        dataCount: count,
+        gps: { latitude: 12.9716 + 1e-6 * second, longitude: 77.5946 + 1e-6 * phone, altitude: 920, accuracy: 5 },
+        battery: { level: 0.8, charging: false, chargingTime: 0, dischargingTime: 0 },
+        network: { effectiveType: '4g', downlink: 10, rtt: 100, saveData: false },
+        device: { userAgent: 'load_server.js', platform: 'Linux', language: 'en', onLine: true, hardwareConcurrency: 8 },
+        motion: { isMoving: true, intensity: 9.8, type: 'walking' },
+        serverLatency: 0
+    };
+}
+
+// JPEG frames of a multipart MJPEG file (Content-Length framed, as mjpeg_stream.py writes them)
+function loadFrames(file, limit = 50) {
+    if (!file || !fs.existsSync(file)) return [];
+    const stream = fs.readFileSync(file);
+    const frames = [];
+    let offset = 0;
+    while (frames.length < limit) {
+        const header = stream.indexOf('Content-Length: ', offset, 'latin1');
+        if (header < 0) break;
+        const end = stream.indexOf('\r\n\r\n', header, 'latin1');
+        const length = parseInt(stream.toString('latin1', header + 16, end), 10);
+        const jpeg = stream.subarray(end + 4, end + 4 + length);
+        frames.push({ jpeg, dataUrl: 'data:image/jpeg;base64,' + jpeg.toString('base64') });
+        offset = end + 4 + length;
+    }
+    return frames;
+}
+
+const options = parseArgs(process.argv.slice(2));
+const recorded = loadRecorded(options.logs);
+const frames = loadFrames(options.mjpeg);
+
+const server = http.createServer((req, res) => {
+    if (req.url === '/api/latest-data') {
+        res.writeHead(200, { 'Content-Type': 'application/json' });
+        res.end(JSON.stringify(latestSensorData));
+        return;
+    }
+    res.writeHead(404);
+    res.end();
+});
+const io = new Server(server, { cors: { origin: '*' }, maxHttpBufferSize: 16 * 1024 * 1024 });
+const wss = new WebSocket.Server({ server, perMessageDeflate: false });
+const fieldSubscriptions = new FieldSubscriptions();
+let latestSensorData = {};
+
+io.on('connection', (socket) => {
+    socket.on('ping', (timestamp) => {
+        socket.emit('pong', { clientTimestamp: timestamp, serverTimestamp: Date.now() });
+    });
+    socket.on('cameraBinary', (enabled) => {
+        if (enabled) socket.join(BINARY_CAMERA_ROOM);
+        else socket.leave(BINARY_CAMERA_ROOM);
+    });
+    socket.on('subscribe', (request) => {
+        const subscriber = fieldSubscriptions.subscribe(socket, request);
+        socket.join(FIELD_SUBSCRIBER_ROOM);
+        socket.emit('subscribed', { fields: Object.keys(subscriber.fields), encoding: subscriber.encoding });
+        if (Object.keys(latestSensorData).length > 0) {
+            fieldSubscriptions.send(subscriber, latestSensorData);
+        }
+    });
+    socket.on('resync', (request) => {
+        const id = request && request.id;
+        const subscriber = fieldSubscriptions.resync(socket, id);
+        if (subscriber && latestSensorData.connectionId === id) {
+            fieldSubscriptions.send(subscriber, latestSensorData);
+        }
+    });
+    if (Object.keys(latestSensorData).length > 0) {
+        socket.emit('sensorData', latestSensorData);
+    }
+    socket.on('disconnect', () => fieldSubscriptions.unsubscribe(socket));
+});
+
+wss.on('connection', (ws) => {
+    ws.send(JSON.stringify({ type: 'welcome', message: 'Connected to load_server.js', serverTime: Date.now() }));
+});
+
+function broadcastRaw(json) {
+    for (const client of wss.clients) {
+        if (client.readyState === WebSocket.OPEN) client.send(json);
+    }
+}
+
+// Pacing: every tick sends whatever is due since the rate was set
+let rate = options.rate;
+let cameraRate = options.cameraRate;
+let started = process.hrtime.bigint();
+let packets = 0;
+let cameraTicks = 0;
+let counts = { sensorData: 0, imu: 0, camera: 0 };
+let total = 0;
+
+function sendSensorData(phone) {
+    total += 1;
+    const base = recorded.length > 0 ? recorded[(total + phone * 997) % recorded.length] : syntheticPacket(phone, total);
+    const sent = new Date().toISOString();
+    const data = { ...base, phoneTimestamp: sent, timestamp: sent, connectionId: phone + 1 };
+    latestSensorData = data;
+    io.except(FIELD_SUBSCRIBER_ROOM).emit('sensorData', data);
+    fieldSubscriptions.publish(data);
+    if (wss.clients.size > 0) broadcastRaw(JSON.stringify(data));
+    counts.sensorData += 1;
+    if (data.accelerometer && data.gyroscope) counts.imu += 1;
+}
+
+function sendCameraFrame(phone) {
+    const frame = frames[(cameraTicks + phone) % frames.length];
+    const header = { timestamp: Date.now(), facingMode: 'environment', width: 320, height: 240, connectionId: phone + 1 };
+    io.except(BINARY_CAMERA_ROOM).emit('cameraFrame', { ...header, data: frame.dataUrl });
+    io.to(BINARY_CAMERA_ROOM).emit('cameraFrameBinary', { ...header, data: frame.jpeg });
+    if (wss.clients.size > 0) broadcastRaw(JSON.stringify({ type: 'cameraFrame', ...header, data: frame.dataUrl }));
+    counts.camera += 1;
+}
+
+function elapsedSeconds() {
+    return Number(process.hrtime.bigint() - started) / 1e9;
+}
+
+setInterval(() => {
+    const elapsed = elapsedSeconds();
+    const due = Math.floor(elapsed * rate);
+    while (packets < due) {
+        for (let phone = 0; phone < options.phones; phone++) sendSensorData(phone);
+        packets += 1;
+    }
+    if (frames.length > 0) {
+        const cameraDue = Math.floor(elapsed * cameraRate);
+        while (cameraTicks < cameraDue) {
+            for (let phone = 0; phone < options.phones; phone++) sendCameraFrame(phone);
+            cameraTicks += 1;
+        }
+    }
+}, TICK_MS);
+
+function report() {
+    const elapsed = elapsedSeconds();
+    // Ticks behind schedule when the command arrived: > 0 means the generator is the bottleneck
+    const lag = Math.max(0, Math.floor(elapsed * rate) - packets);
+    console.log(JSON.stringify({ event: 'stats', elapsed, sent: counts, lag, frames: frames.length }));
+}
+
+readline.createInterface({ input: process.stdin }).on('line', (line) => {
+    let command;
+    try {
+        command = JSON.parse(line);
+    } catch (error) {
+        console.error(`Ignoring command: ${line}`);
+        return;
+    }
+    if (command.rate !== undefined || command.cameraRate !== undefined) {
+        if (command.rate !== undefined) rate = Number(command.rate);
+        if (command.cameraRate !== undefined) cameraRate = Number(command.cameraRate);
+        report();
+        started = process.hrtime.bigint();
+        packets = cameraTicks = 0;
+        counts = { sensorData: 0, imu: 0, camera: 0 };
+        return;
+    }
+    report();
+}).on('close', () => process.exit(0));
+
+server.listen(options.port, '127.0.0.1', () => {
+    console.log(JSON.stringify({ event: 'listening', port: server.address().port, recorded: recorded.length, frames: frames.length }));
+});
@@ -0,0 +1,124 @@
+// MessagePack is optional: without it every subscriber gets JSON deltas
+let msgpack = null;
+try {
+    msgpack = require('@msgpack/msgpack');
+} catch (error) {
+    console.warn('@msgpack/msgpack not installed, field subscriptions will use JSON');
+}
+
+// Sent along with every delta so subscribers can stamp and clock-sync samples
+const STAMP_FIELDS = ['timestamp', 'phoneTimestamp', 'serverLatency'];
+
+// Clients that subscribed to fields instead of the full sensorData broadcast.
+// A subscriber names the sensorData fields it uses with a max rate for each
+// (0 for every change) and receives 'sensorDelta' events carrying only the
+// fields that changed since its previous delta for that phone:
+//   { id: connectionId, seq, set: { field: value }, unset: [field], full: true }
+// `full` marks a snapshot (first delta per phone, after a resubscribe or
+// after a resync of that phone); `seq` counts the deltas of one phone so a
+// client can detect a gap and resync just that phone.
+class FieldSubscriptions {
+    constructor() {
+        this.subscribers = new Map();
+    }
+
+    get size() {
+        return this.subscribers.size;
+    }
+
+    // request: { fields: { name: maxRateHz } or [name, ...], encoding: 'msgpack' | 'json' }
+    subscribe(socket, request) {
+        const fields = {};
+        const requested = (request && request.fields) || {};
+        const entries = Array.isArray(requested) ? requested.map(field => [field, 0]) : Object.entries(requested);
+        for (const [field, rate] of entries) {
+            if (typeof field === 'string' && !STAMP_FIELDS.includes(field)) {
+                // Minimum interval between two deltas carrying the field, in ms
+                fields[field] = rate > 0 ? 1000 / rate : 0;
+            }
+        }
+        const encoding = request && request.encoding === 'msgpack' && msgpack ? 'msgpack' : 'json';
+        // Resubscribing starts over with snapshots
+        const subscriber = { socket, fields, encoding, phones: new Map() };
+        this.subscribers.set(socket.id, subscriber);
+        return subscriber;
+    }
+
+    unsubscribe(socket) {
+        this.subscribers.delete(socket.id);
+    }
+
+    // Start one phone over: its next delta to this subscriber is a snapshot
+    resync(socket, id) {
+        const subscriber = this.subscribers.get(socket.id);
+        if (subscriber) subscriber.phones.delete(id);
+        return subscriber;
+    }
+
+    // Send the changed subscribed fields of a sensorData packet to every subscriber
+    publish(data) {
+        if (this.subscribers.size === 0) return;
+        const now = Date.now();
+        // Field values serialized once per packet for the change checks of all subscribers
+        const serialized = new Map();
+        for (const subscriber of this.subscribers.values()) {
+            this.send(subscriber, data, serialized, now);
+        }
+    }
+
+    send(subscriber, data, serialized = new Map(), now = Date.now()) {
+        const id = data.connectionId;
+        let phone = subscriber.phones.get(id);
+        const full = phone === undefined;
+        if (full) {
+            phone = { seq: 0, sent: {}, sentAt: {} };
+            subscriber.phones.set(id, phone);
+        }
+
+        const set = {};
+        const unset = [];
+        let changed = false;
+        for (const field in subscriber.fields) {
+            const value = data[field];
+            if (value === undefined) {
+                if (field in phone.sent) {
+                    delete phone.sent[field];
+                    unset.push(field);
+                    changed = true;
+                }
+                continue;
+            }
+            let json = serialized.get(field);
+            if (json === undefined) {
+                json = JSON.stringify(value);
+                serialized.set(field, json);
+            }
+            if (json === phone.sent[field]) continue;
+            // Rate-limited fields stay pending until a packet arrives after their interval
+            if (!full && now - (phone.sentAt[field] || 0) < subscriber.fields[field]) continue;
+            phone.sent[field] = json;
+            phone.sentAt[field] = now;
+            set[field] = value;
+            changed = true;
+        }
+        if (!changed && !full) return;
+
+        for (const field of STAMP_FIELDS) {
+            if (data[field] !== undefined) set[field] = data[field];
+        }
+        phone.seq += 1;
+        const delta = { id, seq: phone.seq, set };
+        if (unset.length > 0) delta.unset = unset;
+        if (full) delta.full = true;
+
+        if (subscriber.encoding === 'msgpack') {
+            const encoded = msgpack.encode(delta);
+            // Sent as a Socket.IO binary attachment
+            subscriber.socket.emit('sensorDelta', Buffer.from(encoded.buffer, encoded.byteOffset, encoded.byteLength));
+        } else {
+            subscriber.socket.emit('sensorDelta', delta);
+        }
+    }
+}
+
+module.exports = FieldSubscriptions;
@@ -0,0 +1,7 @@
+#!/usr/bin/env python3
+"""`python3 fleet_bridge.py` from a checkout; the code is in phone_sensor_bridge/fleet_bridge.py"""
+
+from phone_sensor_bridge.fleet_bridge import main
+
+if __name__ == '__main__':
+    main()
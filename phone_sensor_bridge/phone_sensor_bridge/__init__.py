@@ -0,0 +1,10 @@
+"""
+ROS 2 bridge publishing the phone sensors streamed by server.js.
+
+listen.py is the bridge node; async_bridge.py and fleet_bridge.py are its
+asyncio and multi-phone variants, ros_websocket_bridge.py runs it over the
+raw WebSocket endpoint, and replay.py, sensor_store.py and bag_export.py
+work on the recorded sensor_logs. Converters and transports are extended
+through the 'phone_sensor_bridge.converters' and
+'phone_sensor_bridge.transports' entry point groups (see plugins.py).
+"""
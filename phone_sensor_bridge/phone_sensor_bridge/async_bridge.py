@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+asyncio front end for PhoneSensorBridge.
+
+Every phone connection is a socketio.AsyncClient on one event loop, and
+each bridge's ingest queue is drained by a coroutine on the same loop (as
+fleet_bridge.py's ServerLink.consume does), so N phones cost coroutines
+rather than client or publish threads. Received payloads enter the bridge
+through its receive_* methods like any other transport's, so they are
+stamped, clock-synced and counted in BridgeStats on arrival, and the ingest
+queue drops the oldest samples per topic when publishing falls behind
+instead of letting the socket buffers grow. Clock pings go out every
+clock_ping_period. The rclpy executor spins on a single helper thread, so
+node startup never waits on the network and timers keep running while
+servers are unreachable.
+
+Run with one or more Socket.IO server URLs (one node per phone, namespaced
+phone0, phone1, ... when more than one is given):
+
+    python3 async_bridge.py https://192.168.1.11:3000 https://192.168.1.12:3000
+"""
+
+import asyncio
+import sys
+import threading
+
+import rclpy
+from rclpy.executors import SingleThreadedExecutor
+from rclpy.parameter import Parameter
+from rclpy.utilities import remove_ros_args
+import socketio
+
+from .connection import Backoff, TransportMemory
+from .decoders import JsonModule
+from .listen import PhoneSensorBridge
+
+TRANSPORTS = ['websocket', 'polling']
+
+
+class AsyncSocketIOIngest:
+    """Feeds one PhoneSensorBridge from a socketio.AsyncClient"""
+
+    def __init__(self, bridge, url, retry_delay=2.0):
+        self.bridge = bridge
+        self.url = url
+        self.retry_delay = retry_delay
+        self.ping_period = bridge.get_parameter('clock_ping_period').value
+        self.sio = socketio.AsyncClient(ssl_verify=False, logger=False, engineio_logger=False,
+                                        json=JsonModule(bridge.get_parameter('json_backend').value,
+                                                        observer=bridge.stats.on_decode,
+                                                        on_error=lambda: bridge.stats.decode_failed('socketio')))
+        self.setup_handlers()
+
+    def setup_handlers(self):
+        bridge = self.bridge
+        logger = bridge.get_logger()
+
+        @self.sio.event
+        async def connect():
+            bridge.connected = True
+            logger.info(f"Connected to Socket.IO server {self.url}")
+            # Camera frames as raw JPEG attachments rather than base64 data URLs
+            await self.sio.emit('cameraBinary', True)
+
+        @self.sio.event
+        async def connect_error(data):
+            bridge.connected = False
+            logger.error(f"Connection to {self.url} failed: {data}")
+
+        @self.sio.event
+        async def disconnect():
+            bridge.connected = False
+            logger.warn(f"Disconnected from Socket.IO server {self.url}")
+
+        # Handlers only stamp and enqueue; drain() publishes
+        @self.sio.on('sensorData')
+        async def on_sensor_data(data):
+            self.receive(bridge.receive_sensor_data, data)
+
+        @self.sio.on('sensorBatch')
+        async def on_sensor_batch(data):
+            self.receive(bridge.receive_sensor_batch, data)
+
+        @self.sio.on('cameraFrame')
+        async def on_camera_frame(data):
+            self.receive(bridge.receive_camera_frame, data)
+
+        self.sio.on('cameraFrameBinary', on_camera_frame)
+
+        @self.sio.on('pong')
+        async def on_pong(data):
+            try:
+                bridge.receive_pong(float(data['clientTimestamp']), float(data['serverTimestamp']))
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warn(f"Ignoring malformed pong: {e}")
+
+    def receive(self, handler, data):
+        try:
+            handler(data)
+        except Exception as e:
+            self.bridge.get_logger().error(f"Error processing {handler.__name__} payload: {e}")
+
+    async def connect(self):
+        """
+        Try each transport in turn (the one that worked last first), retrying
+        with jittered backoff until connected. Later drops are handled by the
+        AsyncClient's own reconnection.
+        """
+        logger = self.bridge.get_logger()
+        backoff = Backoff(self.retry_delay)
+        memory = TransportMemory()
+        remembered = memory.get(self.url)
+        transports = sorted(TRANSPORTS, key=lambda transport: transport != remembered)
+        attempt = 0
+        while not self.sio.connected:
+            for transport in transports:
+                try:
+                    logger.info(f"Attempting connection to {self.url} with {transport} transport")
+                    await self.sio.connect(self.url, transports=[transport])
+                    logger.info(f"Successfully connected using {transport}")
+                    memory.remember(self.url, transport)
+                    return
+                except socketio.exceptions.ConnectionError as e:
+                    logger.warn(f"Failed to connect to {self.url} with {transport}: {e}")
+                except Exception as e:
+                    # Anything else (a malformed URL, TLS setup) is retried like a refused connection
+                    logger.error(f"Error connecting to {self.url} with {transport}: {e!r}")
+            await asyncio.sleep(backoff.delay(attempt))
+            attempt += 1
+
+    async def ping(self):
+        """Ask the server for its clock every ping_period; answered by 'pong'"""
+        while True:
+            await asyncio.sleep(self.ping_period)
+            if self.sio.connected:
+                await self.sio.emit('ping', self.bridge.get_clock().now().nanoseconds / 1e6)
+
+    async def run(self):
+        pinger = asyncio.create_task(self.ping())
+        try:
+            await self.connect()
+            await self.sio.wait()
+        finally:
+            pinger.cancel()
+            if self.sio.connected:
+                await self.sio.disconnect()
+
+
+def log_failures(logger, urls, results):
+    """Log the exceptions gather(return_exceptions=True) returned, with the URL each belongs to"""
+    for url, result in zip(urls, results):
+        if isinstance(result, Exception):
+            logger.error(f"Bridge for {url} stopped: {result!r}")
+
+
+async def drain(bridge):
+    """Publish a bridge's ingest queue on the event loop, yielding to the sockets between batches"""
+    ingest = bridge.ingest
+    wakeup = asyncio.Event()
+    # Puts come from the socket handlers, on this loop's thread
+    ingest.on_put = wakeup.set
+    while not ingest.closed:
+        wakeup.clear()
+        items, due = ingest.poll()
+        for item in items:
+            bridge.publish_item(item)
+        if items:
+            await asyncio.sleep(0)
+            continue
+        try:
+            # Rate-limited lanes release their held sample once it falls due
+            await asyncio.wait_for(wakeup.wait(), due)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_bridges(urls):
+    """Create one bridge per URL and run them all on the current event loop"""
+    namespaced = len(urls) > 1
+    bridges = [
+        PhoneSensorBridge(
+            connect=False,
+            namespace=f'phone{i}' if namespaced else '',
+            parameter_overrides=[Parameter('websocket_url', value=url),
+                                 # Publishing is drained from the ingest queue by drain()
+                                 Parameter('ingest_queue', value=True)])
+        for i, url in enumerate(urls)
+    ]
+
+    executor = SingleThreadedExecutor()
+    for bridge in bridges:
+        executor.add_node(bridge)
+    # Timers and services spin beside the loop
+    spin_thread = threading.Thread(target=executor.spin, name='rclpy-executor', daemon=True)
+    spin_thread.start()
+
+    ingests = [AsyncSocketIOIngest(bridge, bridge.websocket_url) for bridge in bridges]
+    try:
+        # One phone failing leaves the others running
+        results = await asyncio.gather(*(ingest.run() for ingest in ingests),
+                                       *(drain(bridge) for bridge in bridges), return_exceptions=True)
+        log_failures(bridges[0].get_logger(), [bridge.websocket_url for bridge in bridges] * 2, results)
+    finally:
+        executor.shutdown()
+        for bridge in bridges:
+            bridge.destroy_node()
+
+
+def main(args=None):
+    rclpy.init(args=args)
+    urls = remove_ros_args(args if args is not None else sys.argv)[1:] or ['https://localhost:3000']
+    try:
+        asyncio.run(run_bridges(urls))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        rclpy.try_shutdown()
+
+
+if __name__ == '__main__':
+    main()
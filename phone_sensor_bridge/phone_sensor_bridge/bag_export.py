@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Batch export of recorded sensor_logs into a rosbag2, without a live node.
+
+Messages are built by the bridge's own PhoneSensorPublishers, so the bag
+holds exactly what PhoneSensorBridge would have published live (phone/imu,
+phone/gps, phone/battery, phone/orientation, phone/motion), except that
+header stamps and bag times are the recorded `timestamp` of each line
+rather than the time of replay. Publishers are swapped for BagTopic
+writers, which serialize straight into the bag.
+
+    python3 bag_export.py sensor_logs/sensors_2025-06-15.jsonl -o phone_2025-06-15
+    python3 bag_export.py sensor_logs/sensors_2025-06-15.jsonl -o morning --storage mcap \\
+        --start 2025-06-15T05:51:00Z --end 2025-06-15T06:00:00Z
+"""
+
+import argparse
+import logging
+import time
+
+import rosbag2_py
+from rclpy.serialization import serialize_message
+
+from .conversions import GRAVITY
+from .decoders import make_decoder
+from .listen import PhoneSensorPublishers
+from .sensor_store import to_ns
+
+
+def message_type_name(msg_type):
+    """'sensor_msgs/msg/Imu' for sensor_msgs.msg.Imu"""
+    return f"{msg_type.__module__.split('.')[0]}/msg/{msg_type.__name__}"
+
+
+class BagTopic:
+    """Publisher lookalike that writes serialized messages into a bag"""
+
+    def __init__(self, writer, name, msg_type):
+        self.writer = writer
+        self.name = name
+        self.msg_type = msg_type
+        self.created = False
+        self.count = 0
+
+    def publish(self, msg):
+        if not self.created:
+            # Topics are only added to the bag once they carry data
+            self.writer.bag.create_topic(rosbag2_py.TopicMetadata(
+                name=self.name, type=message_type_name(self.msg_type), serialization_format='cdr'))
+            self.created = True
+        self.writer.bag.write(self.name, serialize_message(msg), self.writer.time_ns)
+        self.count += 1
+
+
+class RecordClock:
+    """Clock lookalike reporting the time of the record being exported"""
+
+    def __init__(self, writer):
+        self.writer = writer
+
+    def now(self):
+        return self
+
+    @property
+    def nanoseconds(self):
+        return self.writer.time_ns
+
+
+class BagWriter:
+    """
+    Quacks like the Node that PhoneSensorPublishers expects: every
+    create_publisher() call returns a BagTopic on the open bag.
+    """
+
+    def __init__(self, uri, storage_id='sqlite3'):
+        self.bag = rosbag2_py.SequentialWriter()
+        self.bag.open(rosbag2_py.StorageOptions(uri=uri, storage_id=storage_id),
+                      rosbag2_py.ConverterOptions(input_serialization_format='cdr',
+                                                  output_serialization_format='cdr'))
+        self.time_ns = 0
+        self.topics = []
+        self.logger = logging.getLogger('bag_export')
+
+    def create_publisher(self, msg_type, topic, qos):
+        bag_topic = BagTopic(self, '/' + topic.lstrip('/'), msg_type)
+        self.topics.append(bag_topic)
+        return bag_topic
+
+    def get_clock(self):
+        return RecordClock(self)
+
+    def get_logger(self):
+        return self.logger
+
+
+def iter_records(paths, start_ns=None, end_ns=None):
+    """Yield (timestamp ns, payload) for the lines of `paths` within [start, end)"""
+    loads = make_decoder()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = loads(line)
+                stamp_ns = to_ns(record['timestamp'])
+                if (start_ns is not None and stamp_ns < start_ns) or (end_ns is not None and stamp_ns >= end_ns):
+                    continue
+                yield stamp_ns, record['data']
+
+
+def export_logs(paths, uri, storage_id='sqlite3', start=None, end=None,
+                topic_prefix='phone', base_frame='phone_base_link', accel_scale=GRAVITY):
+    """Write the records of `paths` between start and end to a new bag; returns the writer"""
+    writer = BagWriter(uri, storage_id)
+    sensors = PhoneSensorPublishers(writer, topic_prefix, base_frame, accel_scale)
+    for stamp_ns, data in iter_records(paths, to_ns(start), to_ns(end)):
+        writer.time_ns = stamp_ns
+        # Same split and conversion as PhoneSensorBridge.process_sensor_data
+        for _topic, publish, payload, _key in sensors.sensor_items(data):
+            publish(payload, stamp_ns)
+    # Finalize the bag (metadata.yaml); older rosbag2_py only closes on destruction
+    if hasattr(writer.bag, 'close'):
+        writer.bag.close()
+    writer.bag = None
+    return writer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('logs', nargs='+')
+    parser.add_argument('-o', '--output', required=True, help='bag directory to create')
+    parser.add_argument('--storage', choices=('sqlite3', 'mcap'), default='sqlite3')
+    parser.add_argument('--start', help='ISO 8601 time, inclusive')
+    parser.add_argument('--end', help='ISO 8601 time, exclusive')
+    parser.add_argument('--topic-prefix', default='phone')
+    parser.add_argument('--base-frame', default='phone_base_link')
+    parser.add_argument('--accel-scale', type=float, default=GRAVITY,
+                        help='multiplier taking recorded accelerometer values to m/s²')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    writer = export_logs(args.logs, args.output, args.storage, args.start, args.end,
+                         args.topic_prefix, args.base_frame, args.accel_scale)
+    elapsed = time.perf_counter() - started
+    total = sum(topic.count for topic in writer.topics)
+    for topic in writer.topics:
+        if topic.count:
+            print(f"{topic.name:24s} {topic.count:8d} messages")
+    print(f"{total} messages written to {args.output} in {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
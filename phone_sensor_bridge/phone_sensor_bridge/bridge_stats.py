@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Hot-path latency accounting for the phone bridges.
+
+Every message is timed through its stages:
+
+- decode: JSON parsing of the Socket.IO packet (JsonModule observer)
+- queue: end of decode to the start of conversion, including the ingest queue
+- convert: payload to filled ROS message
+- publish: Publisher.publish()
+- total: packet decode start to publish return
+
+Latencies go into fixed log-scale histograms (four buckets per octave from
+1 µs to ~16 s, so percentiles are within ~19%). The socket thread, the
+publish thread and the image_decode pool all record into the same topics,
+so every update and report holds BridgeStats.lock; it is held for a few
+list increments, which costs far less than the publish being timed.
+
+Packets that fail to decode are counted per source (the transport or
+event) and reported with the rates, so malformed input shows up without
+logging every packet.
+
+HotPathProfiler captures cProfile or yappi profiles of the same hot path on
+demand.
+"""
+
+import cProfile
+import io
+import math
+import os
+import sys
+import threading
+import time
+
+# cProfile hooks every thread through sys.monitoring from Python 3.12 on
+PROFILE_ALL_THREADS = sys.version_info >= (3, 12)
+
+STAGES = ('decode', 'queue', 'convert', 'publish', 'total')
+SUB_BUCKETS = 4
+OCTAVES = 24
+BUCKETS = OCTAVES * SUB_BUCKETS + 1
+
+
+def bucket_index(seconds):
+    """Histogram bucket of a duration; bucket 0 holds everything under 1 µs"""
+    micros = seconds * 1e6
+    if micros < 1.0:
+        return 0
+    mantissa, exponent = math.frexp(micros)
+    index = (exponent - 1) * SUB_BUCKETS + int((mantissa - 0.5) * 2 * SUB_BUCKETS) + 1
+    return index if index < BUCKETS else BUCKETS - 1
+
+
+def bucket_upper(index):
+    """Upper edge of a bucket in seconds"""
+    if index == 0:
+        return 1e-6
+    octave, sub = divmod(index - 1, SUB_BUCKETS)
+    return (2.0 ** octave) * (1.0 + (sub + 1) / SUB_BUCKETS) * 1e-6
+
+
+def counts_percentile(counts, fraction):
+    """Upper edge of the bucket holding the `fraction` percentile of histogram counts"""
+    remaining = fraction * sum(counts)
+    for index, count in enumerate(counts):
+        remaining -= count
+        if count and remaining <= 0:
+            return bucket_upper(index)
+    return 0.0
+
+
+class LatencyHistogram:
+    """
+    Log-scale latency histogram. `percentile` reports bucket upper edges.
+
+    >>> h = LatencyHistogram()
+    >>> for us in (10, 20, 30, 40, 1000):
+    ...     h.record(us * 1e-6)
+    >>> h.count, round(h.percentile(0.5) * 1e6), round(h.percentile(0.99) * 1e6)
+    (5, 32, 1024)
+    """
+
+    __slots__ = ('counts', 'total')
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.total = 0.0
+
+    def record(self, seconds):
+        self.counts[bucket_index(seconds)] += 1
+        self.total += seconds
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def percentile(self, fraction):
+        return counts_percentile(list(self.counts), fraction)
+
+    def take(self):
+        """Copy and reset: returns (counts, total seconds)"""
+        counts, total = self.counts, self.total
+        self.counts = [0] * BUCKETS
+        self.total = 0.0
+        return counts, total
+
+
+class TopicStats:
+    __slots__ = ('histograms', 'messages', 'bytes')
+
+    def __init__(self):
+        self.histograms = {stage: LatencyHistogram() for stage in STAGES}
+        self.messages = 0
+        self.bytes = 0
+
+
+class BridgeStats:
+    """Per-topic stage histograms and message/byte counters"""
+
+    def __init__(self):
+        self.topics = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.decode_failures = {}
+        self.last_report = time.monotonic()
+
+    def topic(self, name):
+        stats = self.topics.get(name)
+        if stats is None:
+            stats = self.topics.setdefault(name, TopicStats())
+        return stats
+
+    def on_decode(self, start, end, size, packet):
+        """JsonModule observer: remember when this thread's packet arrived"""
+        self.local.received = start
+        self.local.decoded = end
+        # python-socketio event packets decode to [event, payload, ...]
+        event = packet[0] if isinstance(packet, list) and packet and isinstance(packet[0], str) else 'other'
+        stats = self.topic(event)
+        with self.lock:
+            stats.histograms['decode'].record(end - start)
+            stats.messages += 1
+            stats.bytes += size
+
+    def decode_failed(self, source):
+        """Count a packet from `source` that could not be decoded"""
+        with self.lock:
+            self.decode_failures[source] = self.decode_failures.get(source, 0) + 1
+
+    def received(self):
+        """(receive, decode end) perf_counter times of the packet this thread is handling"""
+        received = getattr(self.local, 'received', None)
+        if received is None:
+            now = time.perf_counter()
+            return now, now
+        self.local.received = None
+        return received, self.local.decoded
+
+    def record(self, topic, stage, seconds):
+        histogram = self.topic(topic).histograms[stage]
+        with self.lock:
+            histogram.record(seconds)
+
+    def count(self, topic, size=0):
+        stats = self.topic(topic)
+        with self.lock:
+            stats.messages += 1
+            stats.bytes += size
+
+    def add_bytes(self, topic, size):
+        """Bytes received outside the JSON decoder (binary attachments, MJPEG parts)"""
+        stats = self.topic(topic)
+        with self.lock:
+            stats.bytes += size
+
+    def timed_call(self, topic, received, decoded, call, *args):
+        """
+        Run one convert+publish call for `topic` and record its queue,
+        convert, publish and total stages
+        """
+        histograms = self.topic(topic).histograms
+        self.local.publish_time = 0.0
+        start = time.perf_counter()
+        call(*args)
+        end = time.perf_counter()
+        publish_time = self.local.publish_time
+        with self.lock:
+            histograms['queue'].record(start - decoded)
+            histograms['convert'].record(max(end - start - publish_time, 0.0))
+            histograms['total'].record(end - received)
+
+    def report(self):
+        """Rates and percentiles since the previous report, as a JSON-ready dict"""
+        now = time.monotonic()
+        elapsed = max(now - self.last_report, 1e-9)
+        self.last_report = now
+        taken = []
+        with self.lock:
+            decode_failures, self.decode_failures = self.decode_failures, {}
+            for name, stats in list(self.topics.items()):
+                histograms = [(stage, histogram.take()) for stage, histogram in stats.histograms.items()]
+                taken.append((name, stats.messages, stats.bytes, histograms))
+                stats.messages = stats.bytes = 0
+        topics = {}
+        for name, messages, size, histograms in taken:
+            stages = {}
+            for stage, (counts, total) in histograms:
+                count = sum(counts)
+                if not count:
+                    continue
+                stages[stage] = {
+                    'count': count,
+                    'mean_us': total / count * 1e6,
+                    'p50_us': counts_percentile(counts, 0.50) * 1e6,
+                    'p95_us': counts_percentile(counts, 0.95) * 1e6,
+                    'p99_us': counts_percentile(counts, 0.99) * 1e6,
+                }
+            topics[name] = {
+                'messages': messages,
+                'messages_per_s': messages / elapsed,
+                'bytes_per_s': size / elapsed,
+                'stages': stages,
+            }
+        return {'period_s': elapsed, 'topics': topics, 'decode_failures': decode_failures}
+
+
+class TimedPublisher:
+    """Publisher wrapper recording publish() time and message counts per topic"""
+
+    def __init__(self, publisher, stats, topic):
+        self.publisher = publisher
+        self.stats = stats
+        self.topic = topic
+
+    def publish(self, msg):
+        start = time.perf_counter()
+        self.publisher.publish(msg)
+        elapsed = time.perf_counter() - start
+        stats = self.stats
+        topic = stats.topic(self.topic)
+        with stats.lock:
+            topic.histograms['publish'].record(elapsed)
+            topic.messages += 1
+        local = stats.local
+        local.publish_time = getattr(local, 'publish_time', 0.0) + elapsed
+
+    def __getattr__(self, name):
+        return getattr(self.publisher, name)
+
+
+class HotPathProfiler:
+    """
+    On-demand profiler for the bridge hot path. Hot-path entry points run
+    through call(); while a cProfile capture is active before Python 3.12
+    each calling thread gets its own profile, merged when the capture stops.
+    cProfile on 3.12+ and yappi profile all threads by themselves.
+    """
+
+    def __init__(self):
+        self.backend = None
+        self.started = None
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.profiles = []
+
+    @property
+    def active(self):
+        return self.backend is not None
+
+    def start(self, backend='cprofile'):
+        with self.lock:
+            if self.active:
+                return
+            if backend == 'yappi':
+                import yappi
+                yappi.set_clock_type('cpu')
+                yappi.start()
+            else:
+                self.local = threading.local()
+                self.profiles = []
+                if PROFILE_ALL_THREADS:
+                    profile = cProfile.Profile()
+                    profile.enable()
+                    self.profiles.append(profile)
+            self.started = time.monotonic()
+            self.backend = backend
+
+    def call(self, function, *args):
+        if self.backend != 'cprofile' or PROFILE_ALL_THREADS:
+            return function(*args)
+        profile = getattr(self.local, 'profile', None)
+        if profile is None:
+            profile = self.local.profile = cProfile.Profile()
+            with self.lock:
+                self.profiles.append(profile)
+        return profile.runcall(function, *args)
+
+    def stop(self, directory, limit=20):
+        """Stop the capture, write a .pstats file and return (path, top functions text)"""
+        # pstats pulls in the email package; only load it when a capture is saved
+        import pstats
+        with self.lock:
+            backend, self.backend = self.backend, None
+            if backend is None:
+                return None, ''
+            path = os.path.join(directory, f"phone_sensor_bridge_{time.strftime('%Y%m%d_%H%M%S')}.pstats")
+            if backend == 'yappi':
+                import yappi
+                yappi.stop()
+                yappi.get_func_stats().save(path, type='pstat')
+                yappi.clear_stats()
+            else:
+                profiles, self.profiles = self.profiles, []
+                if PROFILE_ALL_THREADS:
+                    profiles[0].disable()
+                if not profiles:
+                    return None, 'no hot-path calls were profiled'
+                stats = pstats.Stats(profiles[0])
+                for profile in profiles[1:]:
+                    stats.add(profile)
+                stats.dump_stats(path)
+        text = io.StringIO()
+        pstats.Stats(path, stream=text).sort_stats('cumulative').print_stats(limit)
+        return path, text.getvalue()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Phone to host clock synchronization.
+
+Two legs are estimated separately, both as offset(t) = a + b·t fitted over a
+sliding window, so the offset and the drift between the clocks are tracked:
+
+- phone -> server: every sensorData packet gives `timestamp` (server receive
+  time) - `phoneTimestamp`, i.e. the clock offset plus that packet's network
+  delay. The packets with the smallest value in each bucket of the window
+  (the least delayed ones) are fitted, and half the phone-measured round
+  trip (`serverLatency`) is subtracted as the remaining one-way delay.
+- server -> host: Socket.IO ping/pong, NTP style. Each pong gives the offset
+  at the midpoint of the round trip; the fastest round trip per bucket is
+  fitted. Without pongs the server and host clocks are assumed equal.
+
+A sample's host time is then phoneTimestamp + both offsets, capped at its
+arrival time. Residuals of every packet against the fit are kept as the
+jitter that arrival-time stamping would have added. ClockSync.stamp() does
+both steps for a payload and is what every bridge stamps headers with;
+parse_time() is the one ISO 8601 parser of the package. Packets are stamped
+on the socket thread while diagnostics read the estimate from the executor,
+so each OffsetEstimator guards its state with a lock.
+
+    >>> sync = ClockSync(bucket=1.0)
+    >>> for i in range(100):  # phone clock 2.5 s behind, 20-40 ms network delay
+    ...     phone = 100.0 + 0.1 * i
+    ...     sync.observe_packet(phone + 2.5 + 0.02 + 0.02 * (i % 2), phone)
+    >>> round(sync.phone_offset(110.0), 3)
+    2.52
+    >>> round(sync.sample_time(110.0, 112.6), 3)
+    112.52
+    >>> sync.stamp({'gps': {}}, 112600000000)  # no clock fields: arrival time
+    112600000000
+"""
+
+import collections
+import math
+import threading
+from datetime import datetime
+
+JITTER_SAMPLES = 512
+
+
+def parse_time(value):
+    """Seconds since the epoch from an ISO 8601 string or epoch milliseconds"""
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    return float(value) / 1000.0
+
+
+def packet_times(data):
+    """
+    (phone time, server time, phone round trip) in seconds from a payload;
+    server time and round trip are None when absent. server.js puts the
+    phone's clock in `phoneTimestamp` and its own receive time in
+    `timestamp`; a payload straight from the phone only has `timestamp`.
+    """
+    if data.get('phoneTimestamp') is not None:
+        phone = parse_time(data['phoneTimestamp'])
+        server = parse_time(data['timestamp']) if data.get('timestamp') is not None else None
+    elif data.get('timestamp') is not None:
+        phone, server = parse_time(data['timestamp']), None
+    else:
+        return None, None, None
+    latency = data.get('serverLatency')
+    round_trip = float(latency) / 1000.0 if isinstance(latency, (int, float)) and latency > 0 else None
+    return phone, server, round_trip
+
+
+class OffsetEstimator:
+    """
+    Minimum-delay filter plus linear fit. add(t, offset, delay) records an
+    observed offset at local time t; within each `bucket` seconds only the
+    sample with the smallest `delay` is kept, and a line is fitted through
+    the kept samples of the last `window` seconds.
+    """
+
+    def __init__(self, window=60.0, bucket=2.0):
+        self.bucket = bucket
+        self.buckets = collections.deque(maxlen=max(2, int(math.ceil(window / bucket))))
+        self.residuals = collections.deque(maxlen=JITTER_SAMPLES)
+        self.samples = 0
+        self.intercept = None
+        self.slope = 0.0
+        self.origin = 0.0
+        self.lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self.intercept is not None
+
+    def add(self, t, offset, delay):
+        with self.lock:
+            self.samples += 1
+            if self.ready:
+                self.residuals.append(offset - self.intercept - self.slope * (t - self.origin))
+            index = math.floor(t / self.bucket)
+            if self.buckets and self.buckets[-1][0] == index:
+                if delay < self.buckets[-1][3]:
+                    self.buckets[-1] = (index, t, offset, delay)
+                else:
+                    return
+            else:
+                self.buckets.append((index, t, offset, delay))
+            self.fit()
+
+    def fit(self):
+        points = [(t, offset) for _index, t, offset, _delay in self.buckets]
+        self.origin = points[-1][0]
+        if len(points) < 3:
+            # Too few points for a trustworthy drift: hold the latest offset
+            self.intercept = min(offset for _t, offset in points) if len(points) > 1 else points[0][1]
+            self.slope = 0.0
+            return
+        n = len(points)
+        mean_t = sum(t for t, _ in points) / n - self.origin
+        mean_o = sum(o for _, o in points) / n
+        var = sum((t - self.origin - mean_t) ** 2 for t, _ in points)
+        cov = sum((t - self.origin - mean_t) * (o - mean_o) for t, o in points)
+        self.slope = cov / var if var > 0 else 0.0
+        self.intercept = mean_o - self.slope * mean_t
+
+    def predict(self, t):
+        with self.lock:
+            return self.intercept + self.slope * (t - self.origin)
+
+    def jitter(self):
+        """(standard deviation, 95th percentile of |residual|) in seconds"""
+        with self.lock:
+            residuals = list(self.residuals)
+        if not residuals:
+            return 0.0, 0.0
+        n = len(residuals)
+        mean = sum(residuals) / n
+        std = math.sqrt(sum((r - mean) ** 2 for r in residuals) / n)
+        ordered = sorted(abs(r) for r in residuals)
+        return std, ordered[min(n - 1, int(0.95 * n))]
+
+
+class ClockSync:
+    """Phone -> server -> host offset estimate for stamping sensor samples"""
+
+    def __init__(self, window=60.0, bucket=2.0, timestamp_source='phone'):
+        # 'phone': sample time mapped onto the host clock, 'arrival': host receive time
+        self.timestamp_source = timestamp_source
+        self.phone = OffsetEstimator(window, bucket)
+        self.server = OffsetEstimator(window, bucket)
+        self.round_trip = None
+        self.clamped = 0
+
+    @property
+    def ready(self):
+        return self.phone.ready
+
+    def observe_packet(self, host_receive, phone_time, server_time=None, round_trip=None):
+        """
+        Record one packet. Without a server time the host is the receiving
+        end of the phone leg.
+        """
+        receive = host_receive if server_time is None else server_time
+        observed = receive - phone_time
+        # The least delayed packets sit on the lower envelope of receive - send
+        self.phone.add(receive, observed, observed)
+        if round_trip is not None:
+            self.round_trip = round_trip
+
+    def observe_pong(self, host_sent, server_time, host_received):
+        """Record a ping/pong exchange with the server (all in seconds)"""
+        midpoint = 0.5 * (host_sent + host_received)
+        self.server.add(midpoint, midpoint - server_time, host_received - host_sent)
+
+    def phone_offset(self, t):
+        """Estimated phone -> host offset (seconds) around host time t"""
+        offset = self.phone.predict(t)
+        if self.round_trip is not None:
+            offset -= 0.5 * self.round_trip
+        if self.server.ready:
+            offset += self.server.predict(t)
+        return offset
+
+    def offset(self):
+        """Latest phone -> host offset estimate in seconds, 0 before the first fit"""
+        return self.phone_offset(self.phone.origin) if self.ready else 0.0
+
+    def sample_time(self, phone_time, host_receive):
+        """Host time of a sample taken at `phone_time`, never after its arrival"""
+        if not self.ready:
+            return host_receive
+        corrected = phone_time + self.phone_offset(host_receive)
+        if corrected > host_receive:
+            self.clamped += 1
+            return host_receive
+        return corrected
+
+    def stamp(self, data, arrival_ns):
+        """
+        Feed a payload's clock fields to the estimate and return its header
+        stamp in nanoseconds: the sample time on the host clock, or the
+        arrival time when stamping by arrival or the fields are missing
+        """
+        try:
+            phone, server, round_trip = packet_times(data)
+        except (TypeError, ValueError):
+            return arrival_ns
+        if phone is None:
+            return arrival_ns
+        arrival = arrival_ns / 1e9
+        self.observe_packet(arrival, phone, server, round_trip)
+        if self.timestamp_source != 'phone':
+            return arrival_ns
+        return int(self.sample_time(phone, arrival) * 1e9)
+
+    def stats(self):
+        """Estimate and jitter figures for diagnostics (seconds, ppm, counts)"""
+        jitter_std, jitter_p95 = self.phone.jitter()
+        server_jitter_std, _ = self.server.jitter()
+        return {
+            'synced': self.ready,
+            'offset': self.offset(),
+            'drift_ppm': (self.phone.slope + self.server.slope) * 1e6,
+            'phone_jitter_std': jitter_std,
+            'phone_jitter_p95': jitter_p95,
+            'server_offset': self.server.predict(self.server.origin) if self.server.ready else 0.0,
+            'server_jitter_std': server_jitter_std,
+            'round_trip': self.round_trip or 0.0,
+            'packets': self.phone.samples,
+            'pongs': self.server.samples,
+            'clamped': self.clamped,
+        }
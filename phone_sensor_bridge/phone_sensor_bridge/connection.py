@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Reconnection for the bridges' server connections.
+
+ConnectionManager owns one connection for its whole lifetime from a
+background thread:
+
+- Backoff: a failed round over all transports waits a full-jitter
+  exponential delay, uniform(0, min(max_delay, initial_delay * 2**n)), so a
+  restarted server is not hit by every bridge at the same instant.
+- Heartbeat: the owner calls heard() whenever anything arrives from the
+  server (data, pong, ...). A connection silent for longer than
+  `heartbeat_timeout` is treated as dead and torn down; socket timeouts
+  alone can take minutes to notice a half-open TCP connection after a Wi-Fi
+  drop.
+- Transport memory: the transport that last worked for a URL is tried first,
+  and remembered across restarts in ~/.cache/phone_sensor_bridge.
+- on_connected runs after every successful (re)connect, to resync state.
+
+Outage and reconnect timings are available from stats() for diagnostics.
+
+    >>> backoff = Backoff(0.5, 30.0, random.Random(1))
+    >>> [round(backoff.delay(n), 2) for n in range(5)]
+    [0.07, 0.85, 1.53, 1.02, 3.96]
+"""
+
+import json
+import os
+import random
+import threading
+import time
+
+CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+                         'phone_sensor_bridge')
+
+
+class Backoff:
+    """Full-jitter exponential backoff"""
+
+    def __init__(self, initial_delay=0.5, max_delay=30.0, rng=None):
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.rng = rng or random.Random()
+
+    def delay(self, attempt):
+        """Seconds to wait after `attempt` + 1 consecutive failed rounds"""
+        return self.rng.uniform(0.0, min(self.max_delay, self.initial_delay * 2.0 ** min(attempt, 32)))
+
+
+class TransportMemory:
+    """{url: transport} that last connected, kept in a small JSON file"""
+
+    def __init__(self, path=os.path.join(CACHE_DIR, 'transports.json')):
+        self.path = path
+        try:
+            with open(path) as f:
+                self.transports = json.load(f)
+        except (OSError, ValueError):
+            self.transports = {}
+
+    def get(self, url):
+        return self.transports.get(url)
+
+    def remember(self, url, transport):
+        if self.transports.get(url) == transport:
+            return
+        self.transports[url] = transport
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path + '.tmp', 'w') as f:
+                json.dump(self.transports, f)
+            os.replace(self.path + '.tmp', self.path)
+        except OSError:
+            pass  # Read-only home: only this process remembers
+
+
+class ConnectionManager:
+    """
+    Keep a connection up. `connect(transport)` must block until the
+    connection is established or raise; `is_connected()` reports its state
+    and `disconnect()` tears down a connection that stopped answering.
+    max_attempts consecutive failed rounds make the manager give up;
+    0 retries forever.
+    """
+
+    def __init__(self, url, transports, connect, is_connected, disconnect, logger,
+                 max_attempts=0, initial_delay=0.5, max_delay=30.0, heartbeat_timeout=10.0,
+                 on_connected=None, memory=None):
+        self.url = url
+        self.transports = list(transports)
+        self.connect = connect
+        self.is_connected = is_connected
+        self.disconnect = disconnect
+        self.logger = logger
+        self.max_attempts = max_attempts
+        self.backoff = Backoff(initial_delay, max_delay)
+        self.heartbeat_timeout = heartbeat_timeout
+        self.on_connected = on_connected
+        self.memory = memory if memory is not None else TransportMemory()
+
+        self.stopping = threading.Event()
+        self.wake = threading.Event()
+        self.thread = None
+        self.state = 'connecting'
+        self.transport = None
+        self.last_heard = time.monotonic()
+        self.connected_since = None
+        self.lost_at = time.monotonic()
+        self.failed_rounds = 0
+        self.reconnects = 0
+        self.heartbeat_timeouts = 0
+        self.last_reconnect_time = None
+        self.total_reconnect_time = 0.0
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name='connection_manager', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopping.set()
+        self.wake.set()
+
+    def heard(self):
+        """Something arrived from the server"""
+        self.last_heard = time.monotonic()
+
+    def lost(self):
+        """Disconnect callback: wake the manager instead of waiting for its next check"""
+        self.wake.set()
+
+    def ordered_transports(self):
+        remembered = self.memory.get(self.url)
+        if remembered in self.transports:
+            return [remembered] + [t for t in self.transports if t != remembered]
+        return self.transports
+
+    def run(self):
+        while not self.stopping.is_set():
+            if self.is_connected():
+                self.supervise()
+                continue
+            if self.connected_since is not None:
+                # Dropped: the outage (and the reconnect time reported) starts now
+                self.connected_since = None
+                self.lost_at = time.monotonic()
+                self.state = 'reconnecting'
+            if self.connect_round():
+                self.failed_rounds = 0
+            else:
+                self.failed_rounds += 1
+                if self.max_attempts and self.failed_rounds >= self.max_attempts:
+                    self.state = 'failed'
+                    self.logger.error(f"Giving up on {self.url} after {self.failed_rounds} failed attempts")
+                    return
+                delay = self.backoff.delay(self.failed_rounds - 1)
+                self.logger.info(f"Reconnecting to {self.url} in {delay:.1f}s (attempt {self.failed_rounds + 1})")
+                self.stopping.wait(delay)
+
+    def supervise(self):
+        """Watch an established connection until it drops or goes silent"""
+        silent = time.monotonic() - self.last_heard
+        if self.heartbeat_timeout and silent > self.heartbeat_timeout:
+            self.heartbeat_timeouts += 1
+            self.logger.warn(f"Nothing from {self.url} for {silent:.1f}s, reconnecting")
+            try:
+                self.disconnect()
+            except Exception as e:
+                self.logger.warn(f"Closing the dead connection failed: {e}")
+            # Give a close that does not take effect a full timeout before retrying it
+            self.last_heard = time.monotonic()
+        else:
+            self.wake.wait(min(1.0, self.heartbeat_timeout / 4.0) if self.heartbeat_timeout else 1.0)
+            self.wake.clear()
+
+    def connect_round(self):
+        """Try every transport once, the remembered one first; True when connected"""
+        for transport in self.ordered_transports():
+            if self.stopping.is_set():
+                return False
+            try:
+                self.logger.info(f"Connecting to {self.url} with {transport} transport")
+                self.connect(transport)
+            except Exception as e:
+                self.logger.warn(f"Failed to connect with {transport}: {e}")
+                continue
+            if self.is_connected():
+                self.connected(transport)
+                return True
+        return False
+
+    def connected(self, transport):
+        now = time.monotonic()
+        outage = now - self.lost_at
+        if self.transport is not None:
+            self.reconnects += 1
+            self.last_reconnect_time = outage
+            self.total_reconnect_time += outage
+            self.logger.info(f"Reconnected to {self.url} using {transport} after {outage:.2f}s")
+        else:
+            self.logger.info(f"Connected to {self.url} using {transport} in {outage:.2f}s")
+        self.transport = transport
+        self.memory.remember(self.url, transport)
+        self.connected_since = now
+        self.last_heard = now
+        self.state = 'connected'
+        if self.on_connected is not None:
+            try:
+                self.on_connected(transport)
+            except Exception as e:
+                self.logger.warn(f"Resync after connecting failed: {e}")
+
+    def stats(self):
+        """State, transport, attempts and reconnect timings for diagnostics"""
+        now = time.monotonic()
+        return {
+            'state': self.state,
+            'transport': self.transport or '',
+            'failed_attempts': self.failed_rounds,
+            'reconnects': self.reconnects,
+            'heartbeat_timeouts': self.heartbeat_timeouts,
+            'last_reconnect_s': self.last_reconnect_time,
+            'mean_reconnect_s': self.total_reconnect_time / self.reconnects if self.reconnects else None,
+            'connected_s': now - self.connected_since if self.connected_since is not None else 0.0,
+            'outage_s': now - self.lost_at if self.connected_since is None else 0.0,
+            'last_heard_s': now - self.last_heard,
+        }
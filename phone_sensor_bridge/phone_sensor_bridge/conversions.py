@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Unit and orientation conversions shared by both bridge nodes.
+
+Orientation follows the W3C DeviceOrientation convention: alpha about Z,
+then beta about the rotated X, then gamma about the rotated Y (intrinsic
+Z-X'-Y''), all in degrees. Quaternions are returned as (x, y, z, w).
+
+    >>> euler_to_quaternion(0.0, 0.0, 0.0)
+    (0.0, 0.0, 0.0, 1.0)
+    >>> [round(v, 6) for v in euler_to_quaternion(90.0, 0.0, 0.0)]
+    [0.0, 0.0, 0.707107, 0.707107]
+"""
+
+import math
+
+GRAVITY = 9.81
+DEG_TO_RAD = math.pi / 180.0
+NANOSECONDS_PER_MILLISECOND = 1000000
+
+
+def euler_to_quaternion(alpha, beta, gamma):
+    """DeviceOrientation alpha/beta/gamma (degrees) to an (x, y, z, w) quaternion"""
+    half = 0.5 * DEG_TO_RAD
+    sz, cz = math.sin(alpha * half), math.cos(alpha * half)
+    sx, cx = math.sin(beta * half), math.cos(beta * half)
+    sy, cy = math.sin(gamma * half), math.cos(gamma * half)
+    return (sx * cy * cz - cx * sy * sz,
+            cx * sy * cz + sx * cy * sz,
+            cx * cy * sz + sx * sy * cz,
+            cx * cy * cz - sx * sy * sz)
+
+
+def euler_to_quaternion_batch(alpha, beta, gamma):
+    """
+    Vectorized euler_to_quaternion over arrays of degrees; returns an (n, 4)
+    float64 array of (x, y, z, w) rows.
+
+    >>> euler_to_quaternion_batch([0.0, 90.0], [0.0, 0.0], [0.0, 0.0]).round(6).tolist()
+    [[0.0, 0.0, 0.0, 1.0], [0.0, 0.0, 0.707107, 0.707107]]
+    """
+    import numpy as np
+    half = 0.5 * DEG_TO_RAD
+    angles = np.empty((3, len(alpha)))
+    angles[0] = alpha
+    angles[1] = beta
+    angles[2] = gamma
+    angles *= half
+    s = np.sin(angles)
+    c = np.cos(angles)
+    sz, sx, sy = s
+    cz, cx, cy = c
+
+    quaternions = np.empty((len(alpha), 4))
+    quaternions[:, 0] = sx * cy * cz - cx * sy * sz
+    quaternions[:, 1] = cx * sy * cz + sx * cy * sz
+    quaternions[:, 2] = cx * cy * sz + sx * sy * cz
+    quaternions[:, 3] = cx * cy * cz - sx * sy * sz
+    return quaternions
+
+
+def vector(data, key):
+    """(x, y, z) floats from a payload entry such as data['accelerometer']; zeros if absent"""
+    values = data.get(key) or {}
+    return (float(values.get('x', 0.0)), float(values.get('y', 0.0)), float(values.get('z', 0.0)))
+
+
+def orientation_angles(orientation):
+    """(alpha, beta, gamma) degrees from a payload 'orientation' entry"""
+    return (float(orientation.get('alpha', 0.0)),
+            float(orientation.get('beta', 0.0)),
+            float(orientation.get('gamma', 0.0)))
+
+
+class ImuBatch:
+    """
+    Converted IMU samples as arrays: linear_acceleration (n, 3) m/s²,
+    angular_velocity (n, 3) rad/s, orientation (n, 4) quaternions or None
+    when no sample carried orientation, stamps (n,) int64 nanoseconds.
+    orientation_known (n,) bool marks the rows whose sample had an
+    orientation; the others hold the identity and must be published as
+    unknown.
+    """
+
+    __slots__ = ('linear_acceleration', 'angular_velocity', 'orientation', 'orientation_known', 'stamps')
+
+    def __init__(self, linear_acceleration, angular_velocity, orientation, stamps, orientation_known=None):
+        self.linear_acceleration = linear_acceleration
+        self.angular_velocity = angular_velocity
+        self.orientation = orientation
+        self.orientation_known = orientation_known
+        self.stamps = stamps
+
+    def __len__(self):
+        return len(self.stamps)
+
+
+def interpolate_stamps(end_ns, count, period_ns):
+    """
+    Evenly spaced int64 stamps for `count` samples, the last one at `end_ns`
+
+    >>> interpolate_stamps(1000, 3, 10).tolist()
+    [980, 990, 1000]
+    """
+    import numpy as np
+    return end_ns - np.arange(count - 1, -1, -1, dtype=np.int64) * int(period_ns)
+
+
+def convert_imu_batch(samples, end_ns, period_ns, accel_scale=GRAVITY):
+    """
+    Convert a list of sensor payloads (each with 'accelerometer', 'gyroscope'
+    and optionally 'orientation') in one vectorized pass. Acceleration is
+    multiplied by `accel_scale` (g to m/s² by default), rotation rates go from
+    deg/s to rad/s and orientation from Euler degrees to quaternions
+    (identity, with orientation_known False, for samples without one).
+    """
+    # numpy is only loaded by the batch paths, keeping the bridge's startup light
+    import numpy as np
+    count = len(samples)
+    raw = np.empty((count, 6))
+    known = np.fromiter((bool(sample.get('orientation')) for sample in samples), dtype=bool, count=count)
+    has_orientation = bool(known.any())
+    angles = np.zeros((count, 3)) if has_orientation else None
+
+    for i, sample in enumerate(samples):
+        raw[i, :3] = vector(sample, 'accelerometer')
+        raw[i, 3:] = vector(sample, 'gyroscope')
+        if has_orientation and known[i]:
+            angles[i] = orientation_angles(sample['orientation'])
+
+    raw[:, :3] *= accel_scale
+    raw[:, 3:] *= DEG_TO_RAD
+    orientation = None
+    if has_orientation:
+        orientation = euler_to_quaternion_batch(angles[:, 0], angles[:, 1], angles[:, 2])
+
+    return ImuBatch(raw[:, :3], raw[:, 3:], orientation,
+                    interpolate_stamps(end_ns, count, period_ns),
+                    known if has_orientation else None)
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Per-sensor converters: one field of a phone payload to one ROS topic.
+
+PhoneSensorPublishers creates one converter per name in its `converters`
+list (the `converters` parameter of PhoneSensorBridge). A converter owns its
+publisher and preallocated message, picks its payload out of a packet
+(select) and publishes it (publish). `fields` are the payload fields it
+reads, which is what the bridge subscribes to (see field_stream.py). `lane`
+is the ingest queue policy of its topic: 'drop_oldest', 'latest' (at most
+`max_rate` per second) or 'on_change' (only when select's key changes).
+
+All converters share the conventions of conversions.py: accelerations in
+m/s² (accel_scale from g), angular rates in rad/s, orientation as the
+W3C DeviceOrientation quaternion, frames under base_frame.
+
+    imu          sensor_msgs/Imu              accelerometer + gyroscope (+ orientation,
+                                              optionally fused by orientation_filter.py)
+    gps          sensor_msgs/NavSatFix        gps, covariance from accuracy
+    battery      sensor_msgs/BatteryState     battery
+    motion       geometry_msgs/TwistStamped   deviceMotion
+    orientation  geometry_msgs/QuaternionStamped  orientation
+    orientation_tf  TF map -> base_frame      orientation (what ros_websocket_bridge.py publishes)
+    raw          std_msgs/String              the whole packet as JSON (opt-in, raw_data topic)
+
+More converters register with @CONVERTERS.register(name) or through the
+'phone_sensor_bridge.converters' entry point group (see plugins.py).
+"""
+
+import json
+
+from sensor_msgs.msg import Imu, NavSatFix, BatteryState
+from geometry_msgs.msg import TwistStamped, QuaternionStamped
+from std_msgs.msg import Bool, String
+
+from .conversions import DEG_TO_RAD, euler_to_quaternion, orientation_angles, vector
+from .message_factory import (
+    ImuTemplate, NavSatFixTemplate, BatteryStateTemplate, TwistStampedTemplate,
+    QuaternionStampedTemplate, TransformStampedTemplate, ZERO_COVARIANCE, diagonal_covariance,
+)
+from .plugins import Registry
+
+CONVERTERS = Registry('phone_sensor_bridge.converters', 'converter')
+DEFAULT_CONVERTERS = ('imu', 'gps', 'battery', 'motion', 'orientation')
+
+# The one definition of the IMU noise every bridge publishes: the same variance
+# on all three axes, rad²/s² and (m/s²)². The orientation is valid with unknown
+# covariance when the packet has one, unknown (-1) otherwise
+IMU_ANGULAR_VELOCITY_COVARIANCE = diagonal_covariance(0.02)
+IMU_LINEAR_ACCELERATION_COVARIANCE = diagonal_covariance(0.04)
+
+
+class Converter:
+    """
+    Base class. `owner` is the PhoneSensorPublishers holding the converter
+    (node, topic_prefix, base_frame, accel_scale, qos).
+    """
+
+    name = None
+    topic = None
+    msg_type = None
+    fields = ()
+    lane = 'drop_oldest'
+    max_rate = 0.0
+
+    def __init__(self, owner):
+        self.owner = owner
+        self.publisher = owner.node.create_publisher(self.msg_type, f'{owner.topic_prefix}/{self.topic}', owner.qos)
+
+    def select(self, data):
+        """(payload, change key) this converter publishes from a packet, or None"""
+        raise NotImplementedError
+
+    def publish(self, payload, stamp_ns):
+        raise NotImplementedError
+
+    def destroy(self):
+        """Destroy the publisher (fleet_bridge.py evicting a device)"""
+        self.owner.node.destroy_publisher(getattr(self.publisher, 'publisher', self.publisher))
+
+
+@CONVERTERS.register('imu')
+class ImuConverter(Converter):
+    topic = 'imu'
+    msg_type = Imu
+    fields = ('accelerometer', 'gyroscope', 'orientation')
+
+    def __init__(self, owner):
+        super().__init__(owner)
+        self.accel_scale = owner.accel_scale
+        self.template = ImuTemplate(
+            owner.base_frame,
+            orientation_covariance=ZERO_COVARIANCE,
+            angular_velocity_covariance=IMU_ANGULAR_VELOCITY_COVARIANCE,
+            linear_acceleration_covariance=IMU_LINEAR_ACCELERATION_COVARIANCE)
+        self.filter = None
+
+    def use_filter(self, orientation_filter):
+        """
+        Publish the orientation of an OrientationFilter fed with every sample
+        (the browser's orientation becomes its reference) with the filter's
+        covariance, and the filter's motion state on {prefix}/stationary
+        """
+        self.filter = orientation_filter
+        self.stationary = None
+        self.stationary_msg = Bool()
+        self.stationary_publisher = self.owner.node.create_publisher(
+            Bool, f'{self.owner.topic_prefix}/stationary', self.owner.qos)
+
+    def select(self, data):
+        if 'accelerometer' in data and 'gyroscope' in data:
+            return data, None
+        return None
+
+    def publish(self, data, stamp_ns):
+        """Publish IMU data using sensor_msgs/Imu[26]"""
+        # Linear acceleration (g to m/s² by default), angular velocity (deg/s to rad/s)
+        ax, ay, az = vector(data, 'accelerometer')
+        gx, gy, gz = vector(data, 'gyroscope')
+        scale = self.accel_scale
+
+        # Orientation quaternion if available
+        quaternion = None
+        if 'orientation' in data:
+            quaternion = euler_to_quaternion(*orientation_angles(data['orientation']))
+
+        self.publish_sample(stamp_ns, ax * scale, ay * scale, az * scale,
+                            gx * DEG_TO_RAD, gy * DEG_TO_RAD, gz * DEG_TO_RAD, quaternion)
+
+    def publish_sample(self, stamp_ns, ax, ay, az, gx, gy, gz, quaternion=None):
+        """Publish already converted values (m/s², rad/s)"""
+        orientation_filter = self.filter
+        if orientation_filter is None:
+            self.publisher.publish(self.template.fill(stamp_ns, ax, ay, az, gx, gy, gz, quaternion))
+            return
+        quaternion, variance = orientation_filter.update(stamp_ns, ax, ay, az, gx, gy, gz, quaternion)
+        self.publisher.publish(self.template.fill(stamp_ns, ax, ay, az, gx, gy, gz, quaternion, variance))
+        # Motion state only when it changes
+        if orientation_filter.stationary != self.stationary:
+            self.stationary = self.stationary_msg.data = orientation_filter.stationary
+            self.stationary_publisher.publish(self.stationary_msg)
+
+    def destroy(self):
+        super().destroy()
+        if self.filter is not None:
+            self.owner.node.destroy_publisher(self.stationary_publisher)
+
+
+@CONVERTERS.register('gps')
+class GpsConverter(Converter):
+    topic = 'gps'
+    msg_type = NavSatFix
+    fields = ('gps',)
+    lane = 'on_change'
+
+    def __init__(self, owner):
+        super().__init__(owner)
+        self.template = NavSatFixTemplate(owner.base_frame)
+
+    def select(self, data):
+        gps = data.get('gps')
+        if not gps or gps.get('latitude') is None:
+            return None
+        return gps, (gps.get('latitude'), gps.get('longitude'), gps.get('altitude'), gps.get('accuracy'))
+
+    def publish(self, gps_data, stamp_ns):
+        """Publish GPS data using sensor_msgs/NavSatFix[30]"""
+        # Diagonal covariance from the reported accuracy
+        accuracy = float(gps_data.get('accuracy', 10.0))
+
+        self.publisher.publish(self.template.fill(
+            stamp_ns,
+            float(gps_data.get('latitude', 0.0)),
+            float(gps_data.get('longitude', 0.0)),
+            float(gps_data.get('altitude', 0.0)),
+            accuracy * accuracy))
+
+
+@CONVERTERS.register('battery')
+class BatteryConverter(Converter):
+    topic = 'battery'
+    msg_type = BatteryState
+    fields = ('battery',)
+    lane = 'latest'
+    max_rate = 0.2
+
+    def __init__(self, owner):
+        super().__init__(owner)
+        self.template = BatteryStateTemplate(owner.base_frame)
+
+    def select(self, data):
+        if 'battery' in data:
+            return data['battery'], None
+        return None
+
+    def publish(self, battery_data, stamp_ns):
+        """Publish battery data using sensor_msgs/BatteryState[30]"""
+        # Set power supply status based on charging state
+        if battery_data.get('charging', False):
+            status = BatteryState.POWER_SUPPLY_STATUS_CHARGING
+        else:
+            status = BatteryState.POWER_SUPPLY_STATUS_NOT_CHARGING
+
+        self.publisher.publish(self.template.fill(
+            stamp_ns,
+            float(battery_data.get('level', 0.0)),
+            float(battery_data.get('voltage', 0.0)),
+            status))
+
+
+@CONVERTERS.register('motion')
+class MotionConverter(Converter):
+    topic = 'motion'
+    msg_type = TwistStamped
+    fields = ('deviceMotion',)
+
+    def __init__(self, owner):
+        super().__init__(owner)
+        self.template = TwistStampedTemplate(owner.base_frame)
+
+    def select(self, data):
+        if 'deviceMotion' in data:
+            return data['deviceMotion'], None
+        return None
+
+    def publish(self, motion_data, stamp_ns):
+        """Publish device motion as TwistStamped[31]"""
+        # Linear velocity (if available)
+        accel = motion_data.get('userAcceleration') or {}
+        # Angular velocity from rotation rate
+        rotation = motion_data.get('rotationRate') or {}
+
+        self.publisher.publish(self.template.fill(
+            stamp_ns,
+            float(accel.get('x', 0.0)),
+            float(accel.get('y', 0.0)),
+            float(accel.get('z', 0.0)),
+            float(rotation.get('x', 0.0)) * DEG_TO_RAD,
+            float(rotation.get('y', 0.0)) * DEG_TO_RAD,
+            float(rotation.get('z', 0.0)) * DEG_TO_RAD))
+
+
+@CONVERTERS.register('orientation')
+class OrientationConverter(Converter):
+    topic = 'orientation'
+    msg_type = QuaternionStamped
+    fields = ('orientation',)
+
+    def __init__(self, owner):
+        super().__init__(owner)
+        self.template = QuaternionStampedTemplate(owner.base_frame)
+
+    def select(self, data):
+        if 'orientation' in data:
+            return data['orientation'], None
+        return None
+
+    def publish(self, orientation_data, stamp_ns):
+        """Publish device orientation as QuaternionStamped"""
+        self.publish_quaternion(stamp_ns, euler_to_quaternion(*orientation_angles(orientation_data)))
+
+    def publish_quaternion(self, stamp_ns, quaternion):
+        self.publisher.publish(self.template.fill(stamp_ns, quaternion))
+
+
+class TransformPublisher:
+    """Publisher lookalike broadcasting TransformStamped messages on /tf"""
+
+    def __init__(self, node):
+        from tf2_ros import TransformBroadcaster
+        self.broadcaster = TransformBroadcaster(node)
+
+    def publish(self, msg):
+        self.broadcaster.sendTransform(msg)
+
+
+@CONVERTERS.register('orientation_tf')
+class OrientationTfConverter(OrientationConverter):
+    """Orientation as the map -> base_frame transform, zero translation"""
+
+    topic = '/tf'
+    parent_frame = 'map'
+
+    def __init__(self, owner):
+        self.owner = owner
+        self.publisher = TransformPublisher(owner.node)
+        self.template = TransformStampedTemplate(self.parent_frame, owner.base_frame)
+
+    def destroy(self):
+        self.owner.node.destroy_publisher(self.publisher.broadcaster.pub_tf)
+
+
+@CONVERTERS.register('raw')
+class RawConverter(Converter):
+    """
+    Every packet re-serialized as JSON on raw_data, as ros_websocket_bridge.py
+    used to publish it. It reads no particular field, so it sees every packet;
+    with field_subscription on, that is the subscribed fields only.
+    """
+
+    topic = 'raw_data'
+    msg_type = String
+
+    def __init__(self, owner):
+        super().__init__(owner)
+        self.msg = String()
+
+    def select(self, data):
+        return data, None
+
+    def publish(self, data, stamp_ns):
+        self.msg.data = json.dumps(data)
+        self.publisher.publish(self.msg)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Pluggable JSON decoding for sensor packets.
+
+make_decoder() picks the fastest available backend (orjson, then msgspec,
+then the standard library). With typed=True and msgspec installed, packets
+are decoded against SensorPacket: only the fields the bridges publish are
+materialized and the device/network/camera/userAgent blobs are skipped by
+the parser. The result is still a plain dict, so consumers are unchanged.
+
+make_msgpack_decoder() does the same for MessagePack (the bridge's
+sensorDelta stream, see field_stream.py), with msgspec or msgpack.
+"""
+
+import json
+import time
+from typing import Optional, TypedDict, Union
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+BACKENDS = ('orjson', 'msgspec', 'stdlib')
+
+# Exceptions raised for malformed input by any backend
+DECODE_ERRORS = (json.JSONDecodeError,) + ((msgspec.DecodeError,) if msgspec is not None else ())
+
+
+class Vector3(TypedDict, total=False):
+    x: float
+    y: float
+    z: float
+
+
+class Orientation(TypedDict, total=False):
+    alpha: float
+    beta: float
+    gamma: float
+
+
+class Gps(TypedDict, total=False):
+    latitude: Optional[float]
+    longitude: Optional[float]
+    altitude: Optional[float]
+    accuracy: Optional[float]
+
+
+class Battery(TypedDict, total=False):
+    level: float
+    voltage: float
+    charging: bool
+
+
+class DeviceMotion(TypedDict, total=False):
+    userAcceleration: Vector3
+    rotationRate: Vector3
+
+
+class SensorPacket(TypedDict, total=False):
+    """The subset of a sensorData payload that the bridges publish"""
+    type: str
+    accelerometer: Vector3
+    gyroscope: Vector3
+    orientation: Orientation
+    gps: Gps
+    battery: Battery
+    deviceMotion: DeviceMotion
+    timestamp: str
+    phoneTimestamp: str
+    serverLatency: Union[float, str]
+    connectionId: Union[int, str]
+
+
+def available_backends():
+    return [name for name in BACKENDS
+            if name == 'stdlib' or (name == 'msgspec' and msgspec) or (name == 'orjson' and orjson)]
+
+
+def resolve_backend(backend='auto', typed=False):
+    """Map 'auto' (or an unavailable backend) to the best installed one"""
+    available = available_backends()
+    if backend in available:
+        return backend
+    # Only msgspec can skip unused fields while parsing
+    if typed and 'msgspec' in available:
+        return 'msgspec'
+    return available[0]
+
+
+def make_decoder(backend='auto', typed=False, schema=SensorPacket):
+    """
+    Return a loads(str | bytes) callable. Typed decoding needs msgspec; a
+    packet that does not match the schema is decoded generically instead of
+    being dropped.
+    """
+    backend = resolve_backend(backend, typed)
+
+    if backend == 'msgspec':
+        generic = msgspec.json.Decoder().decode
+        if not typed:
+            return generic
+        typed_decode = msgspec.json.Decoder(schema).decode
+
+        def decode(data):
+            try:
+                return typed_decode(data)
+            except msgspec.ValidationError:
+                return generic(data)
+        return decode
+
+    if backend == 'orjson':
+        return orjson.loads
+
+    return json.loads
+
+
+def make_msgpack_decoder():
+    """Return a loads(bytes) callable for MessagePack, or None when no decoder is installed"""
+    if msgspec is not None:
+        return msgspec.msgpack.Decoder().decode
+    if msgpack is not None:
+        return lambda data: msgpack.unpackb(data, raw=False)
+    return None
+
+
+class JsonModule:
+    """
+    json-module lookalike for socketio.Client(json=...). python-socketio
+    expects dumps() to return str and may pass stdlib keyword arguments.
+    An `observer` is called as observer(start, end, size, result) with
+    perf_counter times around every loads(), and `on_error()` before a
+    malformed packet's decode error is raised.
+    """
+
+    def __init__(self, backend='auto', observer=None, on_error=None):
+        self.backend = resolve_backend(backend)
+        self.loads = make_decoder(self.backend)
+        if observer is not None or on_error is not None:
+            decode = self.loads
+            clock = time.perf_counter
+            observe = observer or (lambda start, end, size, result: None)
+            failed = on_error or (lambda: None)
+
+            def loads(data):
+                start = clock()
+                try:
+                    result = decode(data)
+                except DECODE_ERRORS:
+                    failed()
+                    raise
+                observe(start, clock(), len(data), result)
+                return result
+            self.loads = loads
+        if self.backend == 'orjson':
+            self._dumps = lambda obj: orjson.dumps(obj).decode()
+        elif self.backend == 'msgspec':
+            self._dumps = lambda obj: msgspec.json.encode(obj).decode()
+        else:
+            self._dumps = None
+
+    def dumps(self, obj, **kwargs):
+        if self._dumps is None or kwargs.get('default') is not None:
+            return json.dumps(obj, **kwargs)
+        return self._dumps(obj)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Field subscriptions: instead of the full sensorData blob (device, network,
+camera, userAgent, ...), the bridge asks server.js for the payload fields
+its converters read, each with a max rate, and receives 'sensorDelta'
+events carrying only the fields that changed, MessagePack-encoded when a
+decoder is installed (see classes/FieldSubscriptions.js):
+
+    {'id': connectionId, 'seq': n, 'set': {field: value, ...},
+     'unset': [field, ...], 'full': True}
+
+DeltaState rebuilds each phone's full sensorData state from those deltas
+and reports which fields changed, so only the topics reading them are
+republished. Sequence numbers are per phone: a delta that does not follow
+the previous one of its phone (a server restart, a lost packet) marks only
+that phone as waiting for a resync, which the bridge requests with a
+'resync' event for its id and the server answers with a snapshot (`full`).
+Deltas of the other phones keep being applied meanwhile. A server without
+the 'resync' handler never answers; resync_age() tells the bridge how long
+a phone has been waiting so it can subscribe again instead.
+
+DeltaEncoder is the server's encoder in Python, used by the benchmarks.
+
+    >>> encoder, state = DeltaEncoder({'gps': 0, 'battery': 0}), DeltaState()
+    >>> packet = {'connectionId': 1, 'gps': {'latitude': 1.5}, 'battery': {'level': 0.5}}
+    >>> data, changed = state.apply(encoder.delta(packet, 0.0))
+    >>> sorted(changed), data['gps']
+    (['battery', 'gps'], {'latitude': 1.5})
+    >>> delta = encoder.delta(dict(packet, battery={'level': 0.4}), 1.0)
+    >>> delta
+    {'id': 1, 'seq': 2, 'set': {'battery': {'level': 0.4}}}
+    >>> data, changed = state.apply(delta)
+    >>> sorted(changed), data['battery'], data['gps']
+    (['battery'], {'level': 0.4}, {'latitude': 1.5})
+    >>> state.apply({'id': 1, 'seq': 9, 'set': {}}) is None, state.resync_pending(1)
+    (True, True)
+    >>> state.apply({'id': 2, 'seq': 1, 'set': {}, 'full': True}) is not None, state.resync_pending(2)
+    (True, False)
+    >>> encoder.resync(1)
+    >>> data, changed = state.apply(encoder.delta(packet, 2.0))
+    >>> state.resync_pending(1), data['battery']
+    (False, {'level': 0.5})
+"""
+
+import json
+import time
+
+# Sent by the server along with every delta (header stamps and clock sync)
+STAMP_FIELDS = ('timestamp', 'phoneTimestamp', 'serverLatency')
+
+
+def subscription(converters, rates=None):
+    """
+    {field: max rate in Hz (0: every change)} for the payload fields of
+    `converters`. A converter's max_rate applies to its fields unless
+    `rates` ({converter name: Hz}) overrides it; a field shared by several
+    converters gets the highest rate.
+    """
+    rates = rates or {}
+    fields = {}
+    for converter in converters:
+        rate = rates.get(converter.name, converter.max_rate)
+        for field in converter.fields:
+            current = fields.get(field)
+            if current is None:
+                fields[field] = rate
+            elif current and (not rate or rate > current):
+                fields[field] = rate
+    return fields
+
+
+class PhoneState:
+    __slots__ = ('seq', 'data', 'resync_pending', 'resync_since')
+
+    def __init__(self):
+        self.seq = 0
+        self.data = {}
+        self.resync_pending = False
+        self.resync_since = 0.0
+
+
+class DeltaState:
+    """Full sensorData state per phone (connectionId), rebuilt from deltas"""
+
+    def __init__(self):
+        self.phones = {}
+        self.deltas = 0
+        self.gaps = 0
+
+    def apply(self, delta):
+        """
+        Apply one delta and return (state, changed fields), or None when it
+        cannot be applied and its phone needs a resync (resync_pending(id)
+        is true until the phone's next snapshot). The state is a shallow
+        copy: queued publish calls may still hold the previous one.
+        """
+        phone_id = delta.get('id')
+        phone = self.phones.get(phone_id)
+        if delta.get('full'):
+            phone = self.phones[phone_id] = PhoneState()
+            phone.data['connectionId'] = phone_id
+        elif phone is None or phone.resync_pending or delta.get('seq') != phone.seq + 1:
+            if phone is None:
+                phone = self.phones[phone_id] = PhoneState()
+            if not phone.resync_pending:
+                self.gaps += 1
+                phone.resync_pending = True
+                phone.resync_since = time.monotonic()
+            return None
+        phone.seq = delta.get('seq', phone.seq + 1)
+        self.deltas += 1
+
+        data = phone.data
+        changed = delta.get('set') or {}
+        data.update(changed)
+        for field in delta.get('unset') or ():
+            data.pop(field, None)
+        return dict(data), changed.keys()
+
+    def resync_pending(self, phone_id):
+        """True while a phone's deltas are dropped until its next snapshot"""
+        phone = self.phones.get(phone_id)
+        return phone is not None and phone.resync_pending
+
+    def resync_age(self, phone_id):
+        """Seconds a phone has been waiting for its snapshot (0.0 when not waiting)"""
+        phone = self.phones.get(phone_id)
+        if phone is None or not phone.resync_pending:
+            return 0.0
+        return time.monotonic() - phone.resync_since
+
+    def reset(self):
+        """Forget every phone, e.g. before subscribing again"""
+        self.phones.clear()
+
+
+class DeltaEncoder:
+    """
+    Python port of FieldSubscriptions.send for one subscriber: `fields` is
+    {field: max rate in Hz}, delta() returns the delta for a packet or None
+    when nothing subscribed changed
+    """
+
+    def __init__(self, fields):
+        self.intervals = {field: 1.0 / rate if rate > 0 else 0.0
+                          for field, rate in fields.items() if field not in STAMP_FIELDS}
+        self.phones = {}
+
+    def delta(self, data, now):
+        phone_id = data.get('connectionId')
+        phone = self.phones.get(phone_id)
+        full = phone is None
+        if full:
+            phone = self.phones[phone_id] = {'seq': 0, 'sent': {}, 'sent_at': {}}
+        sent, sent_at = phone['sent'], phone['sent_at']
+
+        changed = {}
+        unset = []
+        for field, interval in self.intervals.items():
+            value = data.get(field)
+            if value is None:
+                if field in sent:
+                    del sent[field]
+                    unset.append(field)
+                continue
+            serialized = json.dumps(value, sort_keys=True)
+            if serialized == sent.get(field):
+                continue
+            if not full and now - sent_at.get(field, float('-inf')) < interval:
+                continue
+            sent[field] = serialized
+            sent_at[field] = now
+            changed[field] = value
+        if not changed and not unset and not full:
+            return None
+
+        for field in STAMP_FIELDS:
+            if field in data:
+                changed[field] = data[field]
+        phone['seq'] += 1
+        delta = {'id': phone_id, 'seq': phone['seq'], 'set': changed}
+        if unset:
+            delta['unset'] = unset
+        if full:
+            delta['full'] = True
+        return delta
+
+    def resync(self, phone_id):
+        """Start a phone over with a snapshot (the server's 'resync' handler)"""
+        self.phones.pop(phone_id, None)
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Single-node bridge for a fleet of phones.
+
+server.js broadcasts every phone's packets to every Socket.IO client and tags
+them with `connectionId`, so one connection per server is enough. Payloads
+are demultiplexed on (server, connectionId) and published under a
+per-device prefix (phone_3/imu, phone_3/gps, ...) from one node, one
+executor and one DDS participant. Devices are created on their first packet
+and destroyed, publishers included, once they have been silent for
+`device_timeout` seconds: server.js hands out a new connectionId whenever a
+phone reconnects, so every reconnect shows up as a new device and the old
+one would otherwise stay forever and count against `max_devices`.
+
+Each device has its own ClockSync: sensorData is stamped with the arrival
+time taken when the socket hands it over, mapped to the phone's sample time
+like listen.py does. Pongs measure a server's clock, so each one is fed to
+every device of that server.
+
+    python3 fleet_bridge.py --ros-args -p servers:="['https://192.168.1.11:3000']"
+
+fleet/diagnostics reports, per device, the message rate, the CPU time spent
+converting/publishing its packets, its clock offset and the RSS growth
+measured when its publishers were created.
+"""
+
+import asyncio
+import resource
+import threading
+import time
+
+import rclpy
+from rclpy.executors import SingleThreadedExecutor
+from rclpy.node import Node
+from diagnostic_msgs.msg import DiagnosticArray, DiagnosticStatus, KeyValue
+
+from .async_bridge import AsyncSocketIOIngest, log_failures
+from .bridge_stats import BridgeStats
+from .clock_sync import ClockSync
+from .conversions import GRAVITY
+from .listen import PhoneSensorPublishers, SENSOR_QOS
+
+
+def current_rss_kb():
+    """Resident set size of this process in KiB (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize() // 1024
+    except (OSError, IndexError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class FleetDevice:
+    """One phone's publishers and its resource accounting"""
+
+    def __init__(self, namespace, sensors, rss_added_kb, clock_sync):
+        self.namespace = namespace
+        self.sensors = sensors
+        self.clock_sync = clock_sync
+        self.rss_added_kb = rss_added_kb
+        self.messages = 0
+        self.cpu_seconds = 0.0
+        self.last_seen = time.time()
+        # Counters at the previous diagnostics report, for rates
+        self.reported_messages = 0
+        self.reported_cpu_seconds = 0.0
+
+
+class ServerLink:
+    """
+    Connection state for one server. Quacks like PhoneSensorBridge for
+    AsyncSocketIOIngest (receive_* entry points, parameters, clock, stats)
+    and queues each payload with its arrival time for the fleet, which
+    routes it by connectionId.
+    When publishing falls behind, the oldest queued payload is dropped.
+    """
+
+    def __init__(self, fleet, index, url):
+        self.fleet = fleet
+        self.index = index
+        self.url = url
+        self.connected = False
+        self.last_data_time = time.time()
+        self.stats = fleet.stats
+        # Created on the event loop by run_fleet
+        self.queue = None
+        self.dropped = 0
+
+    def get_logger(self):
+        return self.fleet.get_logger()
+
+    def get_parameter(self, name):
+        return self.fleet.get_parameter(name)
+
+    def get_clock(self):
+        return self.fleet.get_clock()
+
+    def receive_sensor_data(self, data):
+        self.offer(('process_sensor_data', data, self.get_clock().now().nanoseconds))
+
+    def receive_sensor_batch(self, data):
+        self.offer(('process_sensor_batch', data, None))
+
+    def receive_camera_frame(self, data):
+        self.offer(('process_camera_data', data, None))
+
+    def receive_pong(self, client_ms, server_ms):
+        self.fleet.observe_pong(self.index, client_ms / 1000.0, server_ms / 1000.0,
+                                self.get_clock().now().nanoseconds / 1e9)
+
+    def offer(self, item):
+        """Enqueue without blocking the socket; evict the oldest item when full"""
+        self.last_data_time = time.time()
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.queue.task_done()
+            self.dropped += 1
+        self.queue.put_nowait(item)
+
+    async def consume(self):
+        """Publish queued payloads in arrival order"""
+        while True:
+            handler, data, arrival_ns = await self.queue.get()
+            try:
+                self.fleet.dispatch(self.index, handler, data, arrival_ns)
+            except Exception as e:
+                self.get_logger().error(f"Error processing {handler} payload: {e}")
+            finally:
+                self.queue.task_done()
+
+
+class PhoneFleetBridge(Node):
+    """ROS 2 node publishing every phone seen on a list of Socket.IO servers"""
+
+    def __init__(self, **kwargs):
+        super().__init__('phone_fleet_bridge', **kwargs)
+
+        self.declare_parameter('servers', ['https://localhost:3000'])
+        self.declare_parameter('accel_scale', GRAVITY)
+        self.declare_parameter('max_devices', 64)
+        self.declare_parameter('device_timeout', 60.0)
+        self.declare_parameter('queue_size', 256)
+        self.declare_parameter('json_backend', 'auto')
+        self.declare_parameter('clock_ping_period', 2.0)
+        # Header stamps: 'phone' sample time mapped onto the host clock, or 'arrival' time
+        self.declare_parameter('timestamp_source', 'phone')
+        self.declare_parameter('clock_sync_window', 60.0)
+
+        self.accel_scale = self.get_parameter('accel_scale').value
+        self.max_devices = self.get_parameter('max_devices').value
+        self.device_timeout = self.get_parameter('device_timeout').value
+        self.queue_size = self.get_parameter('queue_size').value
+        self.timestamp_source = self.get_parameter('timestamp_source').value
+        self.clock_sync_window = self.get_parameter('clock_sync_window').value
+        # Decode timing of every server's packets
+        self.stats = BridgeStats()
+        self.links = [ServerLink(self, i, url)
+                      for i, url in enumerate(self.get_parameter('servers').value)]
+
+        # Publishing (event loop) and eviction (diagnostics timer) run on different threads
+        self.devices_lock = threading.Lock()
+        self.devices = {}
+        self.rejected = 0
+        self.evicted = 0
+        self.baseline_rss_kb = current_rss_kb()
+        self.last_report_time = time.time()
+
+        self.diagnostics_publisher = self.create_publisher(DiagnosticArray, 'fleet/diagnostics', SENSOR_QOS)
+        self.diagnostics_timer = self.create_timer(5.0, self.publish_diagnostics)
+
+        self.get_logger().info(f"Fleet bridge initialized for {len(self.links)} server(s)")
+
+    def device_namespace(self, server_index, connection_id):
+        if len(self.links) == 1:
+            return f'phone_{connection_id}'
+        return f'phone_{server_index}_{connection_id}'
+
+    def add_device(self, key):
+        if len(self.devices) >= self.max_devices:
+            self.evict_stale(time.time())
+        if len(self.devices) >= self.max_devices:
+            self.rejected += 1
+            return None
+
+        namespace = self.device_namespace(*key)
+        rss_before = current_rss_kb()
+        sensors = PhoneSensorPublishers(self, namespace, f'{namespace}_base_link', self.accel_scale)
+        device = FleetDevice(namespace, sensors, current_rss_kb() - rss_before,
+                             ClockSync(self.clock_sync_window, timestamp_source=self.timestamp_source))
+        self.devices[key] = device
+        self.get_logger().info(f"New device {namespace} ({len(self.devices)} total, "
+                               f"+{device.rss_added_kb} KiB RSS)")
+        return device
+
+    def evict_stale(self, now):
+        """Destroy devices silent for longer than device_timeout (called with devices_lock held)"""
+        if self.device_timeout <= 0:
+            return
+        for key, device in list(self.devices.items()):
+            if now - device.last_seen > self.device_timeout:
+                del self.devices[key]
+                device.sensors.destroy()
+                self.evicted += 1
+                self.get_logger().info(f"Removed device {device.namespace} after "
+                                       f"{now - device.last_seen:.0f} s without data")
+
+    def observe_pong(self, server_index, host_sent, server_time, host_received):
+        """Feed a server's ping/pong exchange to the clock of each of its devices"""
+        with self.devices_lock:
+            for (index, _connection_id), device in self.devices.items():
+                if index == server_index:
+                    device.clock_sync.observe_pong(host_sent, server_time, host_received)
+
+    def dispatch(self, server_index, handler, data, arrival_ns=None):
+        """
+        Publish a payload on the publishers of the device that sent it;
+        sensorData arrives with its arrival time and is stamped by the
+        device's ClockSync
+        """
+        key = (server_index, data.get('connectionId', 'unknown'))
+        with self.devices_lock:
+            device = self.devices.get(key) or self.add_device(key)
+            if device is None:
+                return
+
+            start = time.process_time()
+            if arrival_ns is None:
+                getattr(device.sensors, handler)(data)
+            else:
+                getattr(device.sensors, handler)(data, device.clock_sync.stamp(data, arrival_ns))
+            device.cpu_seconds += time.process_time() - start
+            device.messages += 1
+            device.last_seen = time.time()
+
+    def publish_diagnostics(self):
+        """Publish per-server, per-device and fleet-wide resource usage"""
+        now = time.time()
+        elapsed = max(now - self.last_report_time, 1e-6)
+        self.last_report_time = now
+
+        with self.devices_lock:
+            self.evict_stale(now)
+            devices = list(self.devices.values())
+
+        diag_array = DiagnosticArray()
+        diag_array.header.stamp = self.get_clock().now().to_msg()
+
+        for link in self.links:
+            status = DiagnosticStatus()
+            status.name = f"phone_fleet_bridge/server_{link.index}"
+            status.hardware_id = link.url
+            status.level = DiagnosticStatus.OK if link.connected else DiagnosticStatus.ERROR
+            status.message = "Connected" if link.connected else "Disconnected"
+            diag_array.status.append(status)
+
+        for device in devices:
+            messages = device.messages - device.reported_messages
+            cpu = device.cpu_seconds - device.reported_cpu_seconds
+            device.reported_messages = device.messages
+            device.reported_cpu_seconds = device.cpu_seconds
+            age = now - device.last_seen
+
+            status = DiagnosticStatus()
+            status.name = f"phone_fleet_bridge/{device.namespace}"
+            status.hardware_id = device.namespace
+            status.level = DiagnosticStatus.OK if age < 5.0 else DiagnosticStatus.WARN
+            status.message = f"{messages / elapsed:.1f} msg/s"
+            status.values = [
+                KeyValue(key="messages", value=str(device.messages)),
+                KeyValue(key="cpu_ms_per_s", value=f"{cpu * 1000.0 / elapsed:.2f}"),
+                KeyValue(key="cpu_us_per_msg", value=f"{cpu * 1e6 / messages:.1f}" if messages else "0"),
+                KeyValue(key="rss_added_kb", value=str(device.rss_added_kb)),
+                KeyValue(key="clock_offset_ms", value=f"{device.clock_sync.offset() * 1000.0:.1f}"),
+                KeyValue(key="data_age", value=f"{age:.1f}s"),
+            ]
+            diag_array.status.append(status)
+
+        rss = current_rss_kb()
+        fleet = DiagnosticStatus()
+        fleet.name = "phone_fleet_bridge/fleet"
+        fleet.hardware_id = "phone_fleet"
+        fleet.level = DiagnosticStatus.OK
+        fleet.message = f"{len(devices)} device(s)"
+        per_device = (rss - self.baseline_rss_kb) / len(devices) if devices else 0.0
+        fleet.values = [
+            KeyValue(key="devices", value=str(len(devices))),
+            KeyValue(key="evicted_devices", value=str(self.evicted)),
+            KeyValue(key="rejected_packets", value=str(self.rejected)),
+            KeyValue(key="dropped_packets", value=str(sum(link.dropped for link in self.links))),
+            KeyValue(key="rss_kb", value=str(rss)),
+            KeyValue(key="rss_kb_per_device", value=f"{per_device:.0f}"),
+            KeyValue(key="process_cpu_s", value=f"{time.process_time():.1f}"),
+        ]
+        diag_array.status.append(fleet)
+        self.diagnostics_publisher.publish(diag_array)
+
+
+async def run_fleet(fleet):
+    executor = SingleThreadedExecutor()
+    executor.add_node(fleet)
+    # Timers spin beside the loop; publishing happens on the loop (ServerLink.consume)
+    spin_thread = threading.Thread(target=executor.spin, name='rclpy-executor', daemon=True)
+    spin_thread.start()
+    for link in fleet.links:
+        link.queue = asyncio.Queue(maxsize=fleet.queue_size)
+    try:
+        # One server failing leaves the others running
+        results = await asyncio.gather(*(AsyncSocketIOIngest(link, link.url).run() for link in fleet.links),
+                                       *(link.consume() for link in fleet.links), return_exceptions=True)
+        log_failures(fleet.get_logger(), [link.url for link in fleet.links] * 2, results)
+    finally:
+        executor.shutdown()
+
+
+def main(args=None):
+    rclpy.init(args=args)
+    fleet = PhoneFleetBridge()
+    try:
+        asyncio.run(run_fleet(fleet))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fleet.destroy_node()
+        rclpy.try_shutdown()
+
+
+if __name__ == '__main__':
+    main()
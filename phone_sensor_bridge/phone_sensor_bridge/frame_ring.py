@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Shared-memory ring of camera frames for consumers on the same host.
+
+PhoneSensorBridge (camera_transport 'shm' or 'both') copies each JPEG once
+into a slot of a multiprocessing.shared_memory block and publishes only a
+small JSON descriptor on phone/camera/shm. Consumers map the same block and
+read the frame in place.
+
+Layout (little endian): a 64-byte ring header followed by `slots` slots of
+a 32-byte slot header plus `slot_size` payload bytes.
+
+    ring header: magic u32, version u32, slots u32, slot_size u32, frames u64
+    slot header: sequence u64, length u64, stamp_ns i64, reserved u64
+
+Each slot is guarded by a sequence lock: the writer makes the slot
+sequence odd while copying and sets it to 2 * frame number afterwards, so a
+reader can tell a frame it read from one overwritten underneath it.
+
+    >>> ring = FrameRingWriter('frame_ring_doctest', slots=2, slot_size=16)
+    >>> descriptor = ring.write(b'jpeg bytes', 123)
+    >>> reader = FrameRingReader('frame_ring_doctest')
+    >>> bytes(reader.read(descriptor)), reader.valid(descriptor)
+    (b'jpeg bytes', True)
+    >>> _ = ring.write(b'frame 2', 124), ring.write(b'frame 3', 125)
+    >>> reader.valid(descriptor), reader.read(descriptor)
+    (False, None)
+    >>> reader.close(); ring.close()
+"""
+
+import json
+import struct
+import sys
+from multiprocessing import resource_tracker, shared_memory
+
+CAMERA_TRANSPORTS = ('compressed', 'shm', 'both')
+MAGIC = 0x50484652  # 'PHFR'
+VERSION = 1
+RING_HEADER = struct.Struct('<IIIIQ')
+RING_HEADER_SIZE = 64
+SLOT_HEADER = struct.Struct('<QQqQ')
+SLOT_HEADER_SIZE = SLOT_HEADER.size
+SEQUENCE = struct.Struct('<Q')
+
+
+class FrameTooLarge(ValueError):
+    pass
+
+
+class FrameRingWriter:
+    """Single-writer ring; write() returns the descriptor to publish"""
+
+    def __init__(self, name, slots=8, slot_size=4 * 1024 * 1024):
+        self.name = name
+        self.slots = slots
+        self.slot_size = slot_size
+        self.stride = SLOT_HEADER_SIZE + slot_size
+        size = RING_HEADER_SIZE + slots * self.stride
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a bridge that did not shut down cleanly
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.buf = self.shm.buf
+        self.frames = 0
+        RING_HEADER.pack_into(self.buf, 0, MAGIC, VERSION, slots, slot_size, 0)
+
+    def write(self, data, stamp_ns, frame_id=''):
+        """Copy one frame (any bytes-like object) into the next slot"""
+        length = len(data)
+        if length > self.slot_size:
+            raise FrameTooLarge(f"{length} byte frame exceeds the {self.slot_size} byte ring slot")
+        frame = self.frames + 1
+        slot = frame % self.slots
+        offset = RING_HEADER_SIZE + slot * self.stride
+        buf = self.buf
+        SEQUENCE.pack_into(buf, offset, 2 * frame - 1)  # odd: being written
+        payload = offset + SLOT_HEADER_SIZE
+        buf[payload:payload + length] = data
+        SLOT_HEADER.pack_into(buf, offset, 2 * frame, length, stamp_ns, 0)
+        self.frames = frame
+        RING_HEADER.pack_into(buf, 0, MAGIC, VERSION, self.slots, self.slot_size, frame)
+        return {'ring': self.name, 'frame': frame, 'slot': slot, 'length': length,
+                'stamp_ns': stamp_ns, 'frame_id': frame_id}
+
+    def close(self, unlink=True):
+        self.buf = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def attach(name):
+    """
+    Map an existing block without leaving it registered with this process'
+    resource tracker, which would unlink it when the consumer exits
+    (bpo-39959). Before Python 3.13 SharedMemory always registers, so only
+    this segment is unregistered again once it is mapped. Consumers are
+    separate processes; a consumer forked from the bridge would share its
+    tracker and drop the bridge's own registration.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+
+class FrameRingReader:
+    """
+    Zero-copy reader. read() returns a memoryview into shared memory; the
+    writer may reuse the slot at any time, so check valid() after using the
+    view (or use copy(), which does both).
+    """
+
+    def __init__(self, name):
+        self.shm = attach(name)
+        self.buf = self.shm.buf
+        magic, version, self.slots, self.slot_size, _frames = RING_HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{name} is not a version {VERSION} frame ring")
+        self.stride = SLOT_HEADER_SIZE + self.slot_size
+
+    @property
+    def latest_frame(self):
+        return RING_HEADER.unpack_from(self.buf, 0)[4]
+
+    def _offset(self, descriptor):
+        return RING_HEADER_SIZE + descriptor['slot'] * self.stride
+
+    def valid(self, descriptor):
+        """True while the descriptor's frame is still in its slot"""
+        return SEQUENCE.unpack_from(self.buf, self._offset(descriptor))[0] == 2 * descriptor['frame']
+
+    def read(self, descriptor):
+        """memoryview of the frame, or None if it has already been overwritten"""
+        if not self.valid(descriptor):
+            return None
+        payload = self._offset(descriptor) + SLOT_HEADER_SIZE
+        return self.buf[payload:payload + descriptor['length']]
+
+    def copy(self, descriptor):
+        """bytes of the frame, or None if it was overwritten before or during the copy"""
+        view = self.read(descriptor)
+        if view is None:
+            return None
+        data = bytes(view)
+        view.release()
+        return data if self.valid(descriptor) else None
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+
+
+def encode_descriptor(descriptor):
+    return json.dumps(descriptor, separators=(',', ':'))
+
+
+def decode_descriptor(text):
+    return json.loads(text)
+
+
+class FrameRingSubscriber:
+    """
+    Subscribe to a descriptor topic (phone/camera/shm) and call
+    callback(view, descriptor) with a zero-copy view of each frame. Frames
+    overwritten before or while the callback ran are counted in `skipped`;
+    for those the callback's results should be discarded, which it can
+    check with `self.reader.valid(descriptor)`.
+    """
+
+    def __init__(self, node, callback, topic='phone/camera/shm', qos=10):
+        from std_msgs.msg import String
+        self.callback = callback
+        self.reader = None
+        self.received = 0
+        self.skipped = 0
+        self.subscription = node.create_subscription(String, topic, self.on_descriptor, qos)
+
+    def on_descriptor(self, msg):
+        descriptor = decode_descriptor(msg.data)
+        if self.reader is None or self.reader.shm.name.lstrip('/') != descriptor['ring'].lstrip('/'):
+            if self.reader is not None:
+                self.reader.close()
+            self.reader = FrameRingReader(descriptor['ring'])
+        self.received += 1
+        view = self.reader.read(descriptor)
+        if view is None:
+            self.skipped += 1
+            return
+        try:
+            self.callback(view, descriptor)
+        finally:
+            view.release()
+        if not self.reader.valid(descriptor):
+            self.skipped += 1
+
+    def close(self):
+        if self.reader is not None:
+            self.reader.close()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Decode each camera JPEG once on the bridge and publish raw images.
+
+ImageDecodeStage publishes {prefix}/camera/image_raw (full resolution,
+bgr8) and {prefix}/camera/image_small (downscaled to `small_width`) so
+subscribers do not each decode the CompressedImage themselves.
+
+- Lazy: a frame is only decoded when one of the two topics has
+  subscribers, and only the outputs that have subscribers are produced.
+  When just image_small is wanted, libjpeg decodes directly at 1/2, 1/4 or
+  1/8 scale (IMREAD_REDUCED_COLOR_*), which is several times cheaper than a
+  full decode.
+- Load shedding: there is no queue. At most `workers` frames are decoded
+  at a time and a frame arriving while all workers are busy is dropped, so
+  latency stays at one decode however far the CPU falls behind.
+
+cv2.imdecode and cv2.resize release the GIL, so workers decode in parallel
+with the Socket.IO thread and with each other.
+"""
+
+import concurrent.futures
+import struct
+import threading
+import time
+
+import cv2
+import numpy as np
+from sensor_msgs.msg import Image
+
+from .bridge_stats import TimedPublisher
+from .message_factory import ImageTemplate
+
+# libjpeg DCT scaling factors usable for image_small, largest first
+REDUCED_DECODE = ((8, cv2.IMREAD_REDUCED_COLOR_8),
+                  (4, cv2.IMREAD_REDUCED_COLOR_4),
+                  (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+# Start-of-frame markers carrying the image size (baseline, extended, progressive)
+SOF_MARKERS = (0xC0, 0xC1, 0xC2)
+SOF_SIZE = struct.Struct('>xHH')
+
+
+def jpeg_size(data):
+    """
+    (width, height) from a JPEG's start-of-frame segment, or None
+
+    >>> jpeg_size(b'\\xff\\xd8\\xff\\xe0\\x00\\x04ab\\xff\\xc0\\x00\\x11\\x08\\x02\\xd0\\x05\\x00')
+    (1280, 720)
+    """
+    view = memoryview(data)
+    offset = 2
+    end = len(view) - 9
+    while offset <= end:
+        if view[offset] != 0xFF:
+            return None
+        marker = view[offset + 1]
+        if marker == 0xFF:
+            offset += 1
+            continue
+        if marker in SOF_MARKERS:
+            height, width = SOF_SIZE.unpack_from(view, offset + 4)
+            return width, height
+        offset += 2 + (view[offset + 2] << 8 | view[offset + 3])
+    return None
+
+
+class ImageDecodeStage:
+    """Thread-pool JPEG decode publishing image_raw and image_small"""
+
+    def __init__(self, node, topic_prefix, frame_id, qos, workers=2, small_width=320, stats=None):
+        self.logger = node.get_logger()
+        self.raw_publisher = node.create_publisher(Image, f'{topic_prefix}/camera/image_raw', qos)
+        self.small_publisher = node.create_publisher(Image, f'{topic_prefix}/camera/image_small', qos)
+        if stats is not None:
+            self.raw_publisher = TimedPublisher(self.raw_publisher, stats, 'image_raw')
+            self.small_publisher = TimedPublisher(self.small_publisher, stats, 'image_small')
+        self.frame_id = frame_id
+        self.small_width = small_width
+        self.stats = stats
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image_decode')
+        self.slots = threading.BoundedSemaphore(workers)
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.decoded = 0
+        self.dropped = 0
+        self.idle = 0
+        self.failed = 0
+
+    def submit(self, jpeg, stamp_ns):
+        """Hand a frame to a free worker; returns False if it was skipped or dropped"""
+        want_raw = self.raw_publisher.get_subscription_count() > 0
+        want_small = self.small_publisher.get_subscription_count() > 0
+        if not (want_raw or want_small):
+            self.idle += 1
+            return False
+        if not self.slots.acquire(blocking=False):
+            self.dropped += 1
+            return False
+        # Views into reused buffers (MJPEG demuxer) must outlive this call
+        if not isinstance(jpeg, bytes):
+            jpeg = bytes(jpeg)
+        try:
+            self.pool.submit(self.decode, jpeg, stamp_ns, want_raw, want_small)
+        except RuntimeError:
+            # Pool already shut down
+            self.slots.release()
+            return False
+        return True
+
+    def templates(self):
+        """This worker's (raw, small) message templates"""
+        templates = getattr(self.local, 'templates', None)
+        if templates is None:
+            templates = self.local.templates = (ImageTemplate(self.frame_id), ImageTemplate(self.frame_id))
+        return templates
+
+    def decode(self, jpeg, stamp_ns, want_raw, want_small):
+        try:
+            raw_template, small_template = self.templates()
+            buffer = np.frombuffer(jpeg, np.uint8)
+            image = None
+            if want_raw:
+                start = time.perf_counter()
+                image = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+                if image is None:
+                    raise ValueError(f"undecodable {len(jpeg)} byte camera frame")
+                self.record('image_raw', time.perf_counter() - start)
+                self.raw_publisher.publish(raw_template.fill(stamp_ns, image))
+            if want_small:
+                start = time.perf_counter()
+                small = self.downscale(image if image is not None else self.decode_reduced(jpeg, buffer))
+                self.record('image_small', time.perf_counter() - start)
+                self.small_publisher.publish(small_template.fill(stamp_ns, small))
+            with self.lock:
+                self.decoded += 1
+        except Exception as e:
+            with self.lock:
+                self.failed += 1
+            self.logger.warn(f"Camera frame decode failed: {e}", throttle_duration_sec=5.0)
+        finally:
+            self.slots.release()
+
+    def decode_reduced(self, jpeg, buffer):
+        """Decode at the smallest libjpeg scale still at least small_width wide"""
+        flag = cv2.IMREAD_COLOR
+        size = jpeg_size(jpeg)
+        if size is not None:
+            for factor, reduced in REDUCED_DECODE:
+                if size[0] // factor >= self.small_width:
+                    flag = reduced
+                    break
+        image = cv2.imdecode(buffer, flag)
+        if image is None:
+            raise ValueError(f"undecodable {len(jpeg)} byte camera frame")
+        return image
+
+    def downscale(self, image):
+        height, width = image.shape[:2]
+        if width <= self.small_width:
+            return image
+        small_height = max(1, round(height * self.small_width / width))
+        return cv2.resize(image, (self.small_width, small_height), interpolation=cv2.INTER_AREA)
+
+    def record(self, topic, seconds):
+        if self.stats is not None:
+            self.stats.record(topic, 'convert', seconds)
+
+    def counters(self):
+        """(decoded, dropped while busy, skipped without subscribers, failed)"""
+        return self.decoded, self.dropped, self.idle, self.failed
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def destroy(self, node):
+        """Close the pool and destroy the image_raw and image_small publishers"""
+        self.close()
+        for publisher in (self.raw_publisher, self.small_publisher):
+            node.destroy_publisher(getattr(publisher, 'publisher', publisher))
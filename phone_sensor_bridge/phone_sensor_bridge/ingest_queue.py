@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Bounded hand-off between the Socket.IO receive thread and ROS publishing.
+
+Each topic gets a lane with its own overflow policy, so a stalled publisher
+never blocks the socket thread:
+
+- DropOldestLane: bounded FIFO, the oldest sample is discarded on overflow (IMU)
+- LatestLane: keeps only the newest item, released at most `max_rate` times
+  per second (battery, camera)
+- OnChangeLane: accepts an item only when its key differs from the last
+  accepted one (GPS)
+"""
+
+import collections
+import threading
+import time
+
+
+class DropOldestLane:
+    def __init__(self, maxlen):
+        self.items = collections.deque(maxlen=maxlen)
+        self.dropped = 0
+
+    def put(self, item, key=None):
+        if len(self.items) == self.items.maxlen:
+            self.dropped += 1
+        self.items.append(item)
+
+    def take(self, now):
+        items = list(self.items)
+        self.items.clear()
+        return items
+
+    def next_due(self, now):
+        return now if self.items else None
+
+    @property
+    def depth(self):
+        return len(self.items)
+
+
+class LatestLane:
+    def __init__(self, max_rate=0.0):
+        self.period = 1.0 / max_rate if max_rate > 0 else 0.0
+        self.pending = None
+        self.has_pending = False
+        self.last_release = float('-inf')
+        self.dropped = 0
+
+    def put(self, item, key=None):
+        if self.has_pending:
+            # Coalesced: the newer value replaces the unpublished one
+            self.dropped += 1
+        self.pending = item
+        self.has_pending = True
+
+    def take(self, now):
+        if not self.has_pending or now < self.last_release + self.period:
+            return []
+        item = self.pending
+        self.pending = None
+        self.has_pending = False
+        self.last_release = now
+        return [item]
+
+    def next_due(self, now):
+        if not self.has_pending:
+            return None
+        return max(now, self.last_release + self.period)
+
+    @property
+    def depth(self):
+        return 1 if self.has_pending else 0
+
+
+class OnChangeLane(LatestLane):
+    def __init__(self):
+        super().__init__()
+        self.last_key = None
+
+    def put(self, item, key=None):
+        if key == self.last_key:
+            self.dropped += 1
+            return
+        self.last_key = key
+        super().put(item)
+
+
+class IngestQueue:
+    """Named lanes behind one lock; producers never block on consumers"""
+
+    def __init__(self, lanes):
+        self.lanes = lanes
+        self.cond = threading.Condition()
+        self.closed = False
+        # Called after every put, for consumers not waiting on `cond` (async_bridge.py)
+        self.on_put = None
+
+    def put(self, lane, item, key=None):
+        with self.cond:
+            self.lanes[lane].put(item, key)
+            self.cond.notify()
+        if self.on_put is not None:
+            self.on_put()
+
+    def collect(self, now):
+        """Releasable items and when the next held one falls due (None: no timer); hold `cond`"""
+        ready = []
+        next_due = None
+        for lane in self.lanes.values():
+            ready.extend(lane.take(now))
+            due = lane.next_due(now)
+            if due is not None and (next_due is None or due < next_due):
+                next_due = due
+        return ready, next_due
+
+    def poll(self):
+        """Take without waiting: (items, seconds until more fall due, or None)"""
+        with self.cond:
+            now = time.monotonic()
+            ready, next_due = self.collect(now)
+        return ready, None if next_due is None else max(next_due - now, 0.0)
+
+    def take(self, timeout=None):
+        """
+        Wait up to `timeout` seconds for releasable items and return them as
+        a list; empty on timeout or once closed
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self.cond:
+            while not self.closed:
+                now = time.monotonic()
+                ready, next_due = self.collect(now)
+                if ready:
+                    return ready
+
+                wait_until = next_due if deadline is None else min(next_due or deadline, deadline)
+                if wait_until is not None and wait_until <= now:
+                    if deadline is not None and now >= deadline:
+                        return []
+                    continue
+                self.cond.wait(None if wait_until is None else wait_until - now)
+            return []
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def stats(self):
+        """{lane: (depth, dropped)}"""
+        with self.cond:
+            return {name: (lane.depth, lane.dropped) for name, lane in self.lanes.items()}
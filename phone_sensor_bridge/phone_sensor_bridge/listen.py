@@ -0,0 +1,661 @@
+#!/usr/bin/env python3
+
+import rclpy
+from rclpy.node import Node
+from rclpy.qos import QoSProfile, ReliabilityPolicy, DurabilityPolicy
+from rcl_interfaces.msg import SetParametersResult
+
+# ROS 2 message types
+from sensor_msgs.msg import CompressedImage
+from std_msgs.msg import Float64, String
+from diagnostic_msgs.msg import DiagnosticArray, DiagnosticStatus, KeyValue
+
+import threading
+import time
+import json
+
+# Only light modules here: OpenCV (image_decode.py), numpy (IMU batches) and
+# the transport client libraries are imported when the feature is used
+from .bridge_stats import BridgeStats, HotPathProfiler, TimedPublisher
+from .camera_source import CAMERA_SOURCES, MjpegCameraSource, jpeg_from_payload, mjpeg_url
+from .clock_sync import ClockSync
+from .conversions import GRAVITY, NANOSECONDS_PER_MILLISECOND, convert_imu_batch
+from .converters import CONVERTERS, DEFAULT_CONVERTERS
+from .frame_ring import CAMERA_TRANSPORTS, FrameRingWriter, FrameTooLarge, encode_descriptor
+from .ingest_queue import IngestQueue, DropOldestLane, LatestLane, OnChangeLane
+from .message_factory import CompressedImageTemplate
+from .transports import TRANSPORTS
+
+# QoS profile for sensor data[15]
+SENSOR_QOS = QoSProfile(
+    reliability=ReliabilityPolicy.BEST_EFFORT,
+    durability=DurabilityPolicy.VOLATILE,
+    depth=10
+)
+
+class PhoneSensorPublishers:
+    """
+    Publishers and preallocated messages for one phone under `topic_prefix`
+    (phone/imu, phone/gps, ...), plus the payload to ROS conversion done by
+    the `converters` named (see converters.py). Owned by a node; a single
+    node may hold several of these (see fleet_bridge.py)
+    """
+    
+    def __init__(self, node, topic_prefix='phone', base_frame='phone_base_link', accel_scale=GRAVITY,
+                 stats=None, converters=DEFAULT_CONVERTERS, qos=None):
+        self.node = node
+        self.clock = node.get_clock()
+        self.topic_prefix = topic_prefix
+        self.base_frame = base_frame
+        # Multiplier taking phone accelerometer readings to m/s² (phone reports g)
+        self.accel_scale = accel_scale
+        self.qos = qos if qos is not None else SENSOR_QOS
+        self.last_batch_ns = None
+        self.camera_frame_id = f"{base_frame}_camera"
+        
+        # One converter (publisher + preallocated message) per sensor topic[22][26]
+        self.converters = [CONVERTERS.get(name)(self) for name in converters]
+        self.by_name = {converter.name: converter for converter in self.converters}
+        self.camera_publisher = node.create_publisher(CompressedImage, f'{topic_prefix}/camera/compressed', self.qos)
+        self.camera_template = CompressedImageTemplate(self.camera_frame_id)
+        
+        # Publish timing and message counts per topic (see bridge_stats.py)
+        if stats is not None:
+            for converter in self.converters:
+                converter.publisher = TimedPublisher(converter.publisher, stats, converter.name)
+            self.camera_publisher = TimedPublisher(self.camera_publisher, stats, 'camera')
+        
+        # Shared-memory camera ring for same-host consumers (see frame_ring.py)
+        self.frame_ring = None
+        self.publish_compressed = True
+        # Optional on-bridge decode to image_raw/image_small (see image_decode.py)
+        self.stats = stats
+        self.image_decoder = None
+    
+    def sensor_items(self, data, changed=None):
+        """
+        Split a packet into (topic, publish method, payload, change key) for
+        every topic it carries; the key is only used by on-change topics.
+        With `changed` (the fields a delta set), topics reading none of them
+        are skipped.
+        """
+        items = []
+        for converter in self.converters:
+            # A converter reading no particular field (raw) takes every packet
+            if changed is not None and converter.fields and changed.isdisjoint(converter.fields):
+                continue
+            selected = converter.select(data)
+            if selected is not None:
+                items.append((converter.name, converter.publish, selected[0], selected[1]))
+        return items
+    
+    def process_sensor_data(self, data, stamp_ns=None):
+        """Process and publish sensor data to appropriate ROS topics[26]"""
+        # One stamp shared by every message from this packet (arrival time by default)
+        if stamp_ns is None:
+            stamp_ns = self.clock.now().nanoseconds
+        for _topic, publish, payload, _key in self.sensor_items(data):
+            publish(payload, stamp_ns)
+    
+    def process_sensor_batch(self, batch):
+        """
+        Publish a burst of IMU samples ({'samples': [...], 'interval': ms}).
+        Samples are converted in one vectorized pass and stamped evenly
+        backwards from arrival, `interval` ms apart or spread over the time
+        since the previous batch when no interval is given.
+        """
+        imu = self.by_name.get('imu')
+        samples = [s for s in batch.get('samples', ()) if 'accelerometer' in s and 'gyroscope' in s]
+        if imu is None or not samples:
+            return
+        
+        end_ns = self.clock.now().nanoseconds
+        if batch.get('interval'):
+            period_ns = float(batch['interval']) * NANOSECONDS_PER_MILLISECOND
+        elif self.last_batch_ns is not None:
+            period_ns = (end_ns - self.last_batch_ns) / len(samples)
+        else:
+            period_ns = 0
+        self.last_batch_ns = end_ns
+        
+        converted = convert_imu_batch(samples, end_ns, period_ns, self.accel_scale)
+        # tolist() hands the message setters plain Python floats
+        accels = converted.linear_acceleration.tolist()
+        gyros = converted.angular_velocity.tolist()
+        stamps = converted.stamps.tolist()
+        quaternions = converted.orientation.tolist() if converted.orientation is not None else None
+        known = converted.orientation_known.tolist() if quaternions is not None else None
+        orientation = self.by_name.get('orientation')
+        
+        for i, stamp_ns in enumerate(stamps):
+            # Samples without orientation are published as unknown, not as the identity
+            quaternion = quaternions[i] if quaternions is not None and known[i] else None
+            imu.publish_sample(stamp_ns, *accels[i], *gyros[i], quaternion)
+            if quaternion is not None and orientation is not None:
+                orientation.publish_quaternion(stamp_ns, quaternion)
+    
+    def process_camera_data(self, camera_data):
+        """Process and publish camera frame data[32]"""
+        try:
+            # Binary attachment (cameraFrameBinary) or base64 data URL (cameraFrame)
+            if camera_data.get('data'):
+                self.publish_camera_frame(jpeg_from_payload(camera_data['data']),
+                                          self.clock.now().nanoseconds)
+                
+        except Exception as e:
+            self.node.get_logger().error(f"Error processing camera data: {e}")
+    
+    def destroy(self):
+        """Destroy every publisher of this phone, e.g. when fleet_bridge.py evicts it"""
+        for converter in self.converters:
+            converter.destroy()
+        node = self.node
+        node.destroy_publisher(getattr(self.camera_publisher, 'publisher', self.camera_publisher))
+        if self.frame_ring is not None:
+            node.destroy_publisher(self.frame_descriptor_publisher)
+        if self.image_decoder is not None:
+            self.image_decoder.destroy(node)
+    
+    def use_frame_ring(self, ring, publish_compressed=True):
+        """
+        Write camera frames into a FrameRingWriter and publish their
+        descriptors on {prefix}/camera/shm, optionally alongside CompressedImage
+        """
+        self.frame_ring = ring
+        self.publish_compressed = publish_compressed
+        self.frame_descriptor_publisher = self.node.create_publisher(
+            String, f'{self.topic_prefix}/camera/shm', self.qos)
+    
+    def use_image_decoder(self, workers=2, small_width=320):
+        """Also publish decoded frames on {prefix}/camera/image_raw and image_small"""
+        # Loads OpenCV and numpy, so only when camera decoding is enabled
+        from .image_decode import ImageDecodeStage
+        self.image_decoder = ImageDecodeStage(self.node, self.topic_prefix, self.camera_frame_id, self.qos,
+                                              workers, small_width, self.stats)
+        return self.image_decoder
+    
+    def use_orientation_filter(self, **options):
+        """
+        Fuse accelerometer, gyroscope and the browser's orientation into the
+        phone/imu orientation (see orientation_filter.py); `options` go to
+        OrientationFilter. Returns the filter, or None without an imu converter
+        """
+        imu = self.by_name.get('imu')
+        if imu is None:
+            return None
+        from .orientation_filter import OrientationFilter
+        imu.use_filter(OrientationFilter(**options))
+        return imu.filter
+    
+    def publish_camera_frame(self, image, stamp_ns):
+        """Publish JPEG bytes (any bytes-like object) as CompressedImage and/or through the ring"""
+        publish_compressed = self.publish_compressed
+        if self.frame_ring is not None:
+            try:
+                descriptor = self.frame_ring.write(image, stamp_ns, self.camera_frame_id)
+                self.frame_descriptor_publisher.publish(String(data=encode_descriptor(descriptor)))
+            except FrameTooLarge as e:
+                # Oversized frames still reach subscribers, just not zero-copy
+                self.node.get_logger().warn(str(e), throttle_duration_sec=5.0)
+                publish_compressed = True
+        if publish_compressed:
+            self.camera_publisher.publish(self.camera_template.fill(stamp_ns, image))
+        if self.image_decoder is not None:
+            self.image_decoder.submit(image, stamp_ns)
+
+class PhoneSensorBridge(Node):
+    """
+    ROS 2 node that connects to Socket.IO server and publishes phone sensor data
+    to visualizable ROS topics for analysis and debugging
+    """
+    
+    def __init__(self, connect=True, **kwargs):
+        """
+        connect=False skips creating the transport so another ingestion
+        front end (see async_bridge.py) can feed the receive_* methods; it
+        also drains the ingest queue itself, or calls start_publish_thread
+        """
+        super().__init__('phone_sensor_bridge', **kwargs)
+        
+        # Declare parameters
+        # Ingestion: 'socketio', 'websocket' or 'replay' (see transports.py)
+        self.declare_parameter('transport', 'socketio')
+        self.declare_parameter('websocket_url', 'https://localhost:3000')
+        # Consecutive failed connection rounds before giving up (0 retries forever),
+        # backoff ceiling and how long a silent connection may stay up
+        self.declare_parameter('reconnect_attempts', 0)
+        self.declare_parameter('reconnect_max_delay', 30.0)
+        self.declare_parameter('heartbeat_timeout', 10.0)
+        self.declare_parameter('base_frame', 'phone_base_link')
+        self.declare_parameter('accel_scale', GRAVITY)
+        # Sensor topics to publish, by converter name (see converters.py)
+        self.declare_parameter('converters', list(DEFAULT_CONVERTERS))
+        # 'madgwick' fuses the IMU samples into phone/imu's orientation (see orientation_filter.py)
+        self.declare_parameter('orientation_filter', 'none')
+        self.declare_parameter('orientation_filter_beta', 0.1)
+        self.declare_parameter('orientation_filter_time_constant', 0.5)
+        # Bounded hand-off between the Socket.IO thread and publishing
+        self.declare_parameter('ingest_queue', True)
+        self.declare_parameter('imu_queue_size', 100)
+        self.declare_parameter('battery_max_rate', 0.2)
+        self.declare_parameter('diagnostics_period', 5.0)
+        # Logging: 'debug' logs every packet (costly at sensor rates), 'summary' logs
+        # rates and decode failures every diagnostics_period, 'quiet' only errors
+        self.declare_parameter('verbosity', 'summary')
+        # JSON backend for Socket.IO packets ('auto', 'msgspec', 'orjson', 'stdlib')
+        self.declare_parameter('json_backend', 'auto')
+        # Subscribe to changed fields only ('sensorDelta', see field_stream.py), as 'msgpack' or 'json'
+        self.declare_parameter('field_subscription', True)
+        self.declare_parameter('stream_encoding', 'msgpack')
+        # Seconds to wait for a resync snapshot of one phone before subscribing again
+        self.declare_parameter('resync_timeout', 5.0)
+        # Camera frames: 'binary' Socket.IO attachments, 'base64' data URLs,
+        # the server's 'mjpeg' stream (camera_url) or 'none'
+        self.declare_parameter('camera_source', 'binary')
+        self.declare_parameter('camera_url', '')
+        # Camera delivery: 'compressed' topic, 'shm' ring + descriptor topic, or 'both'
+        self.declare_parameter('camera_transport', 'compressed')
+        self.declare_parameter('camera_shm_name', 'phone_camera')
+        self.declare_parameter('camera_shm_slots', 8)
+        self.declare_parameter('camera_shm_slot_size', 4 * 1024 * 1024)
+        # Decode frames once to phone/camera/image_raw and image_small while subscribed
+        self.declare_parameter('camera_decode', False)
+        self.declare_parameter('camera_decode_workers', 2)
+        self.declare_parameter('camera_small_width', 320)
+        # Header stamps: 'phone' sample time mapped onto the host clock, or 'arrival' time
+        self.declare_parameter('timestamp_source', 'phone')
+        self.declare_parameter('clock_sync_window', 60.0)
+        self.declare_parameter('clock_ping_period', 2.0)
+        # Hot-path profiling, toggled at runtime with `ros2 param set ... profile true|false`
+        self.declare_parameter('profile', False)
+        self.declare_parameter('profiler', 'cprofile')
+        self.declare_parameter('profile_dir', '/tmp')
+        
+        # Get parameters
+        self.websocket_url = self.get_parameter('websocket_url').get_parameter_value().string_value
+        self.base_frame = self.get_parameter('base_frame').get_parameter_value().string_value
+        # Multiplier taking phone accelerometer readings to m/s² (phone reports g)
+        self.accel_scale = self.get_parameter('accel_scale').get_parameter_value().double_value
+        self.verbosity = self.get_parameter('verbosity').value
+        self.log_packets = self.verbosity == 'debug'
+        self.camera_source = self.get_parameter('camera_source').value
+        if self.camera_source not in CAMERA_SOURCES:
+            self.get_logger().warn(f"Unknown camera_source '{self.camera_source}', using 'base64'")
+            self.camera_source = 'base64'
+        
+        # Per-stage latency histograms and rates, reported with the diagnostics
+        self.stats = BridgeStats()
+        self.profiler = HotPathProfiler()
+        self.stats_publisher = self.create_publisher(String, 'phone/bridge_stats', SENSOR_QOS)
+        self.add_on_set_parameters_callback(self.on_set_parameters)
+        
+        # Sensor publishers under phone/*[22][26]
+        self.sensors = PhoneSensorPublishers(self, 'phone', self.base_frame, self.accel_scale, self.stats,
+                                             self.get_parameter('converters').value)
+        self.diagnostics_publisher = self.create_publisher(DiagnosticArray, 'phone/diagnostics', SENSOR_QOS)
+        orientation_filter = self.get_parameter('orientation_filter').value
+        if orientation_filter == 'madgwick':
+            self.sensors.use_orientation_filter(
+                beta=self.get_parameter('orientation_filter_beta').value,
+                time_constant=self.get_parameter('orientation_filter_time_constant').value)
+        elif orientation_filter != 'none':
+            self.get_logger().warn(f"Unknown orientation_filter '{orientation_filter}', publishing the browser's")
+        
+        # Same-host consumers can map camera frames instead of receiving copies
+        self.frame_ring = None
+        camera_transport = self.get_parameter('camera_transport').value
+        if camera_transport not in CAMERA_TRANSPORTS:
+            self.get_logger().warn(f"Unknown camera_transport '{camera_transport}', using 'compressed'")
+        elif camera_transport != 'compressed':
+            self.frame_ring = FrameRingWriter(self.get_parameter('camera_shm_name').value,
+                                              self.get_parameter('camera_shm_slots').value,
+                                              self.get_parameter('camera_shm_slot_size').value)
+            self.sensors.use_frame_ring(self.frame_ring, publish_compressed=camera_transport == 'both')
+        self.image_decoder = None
+        if self.get_parameter('camera_decode').value:
+            self.image_decoder = self.sensors.use_image_decoder(
+                self.get_parameter('camera_decode_workers').value,
+                self.get_parameter('camera_small_width').value)
+        
+        # Phone -> host clock offset, from packet timestamps and Socket.IO ping/pong
+        self.timestamp_source = self.get_parameter('timestamp_source').value
+        self.clock_sync = ClockSync(self.get_parameter('clock_sync_window').value,
+                                    timestamp_source=self.timestamp_source)
+        self.clock_offset_publisher = self.create_publisher(Float64, 'phone/clock_offset', SENSOR_QOS)
+        
+        # Connection state
+        self.connected = False
+        self.last_data_time = time.time()
+        
+        # Create timer for diagnostics publishing
+        self.diagnostics_timer = self.create_timer(
+            self.get_parameter('diagnostics_period').value, self.publish_diagnostics)
+        
+        # Per-topic policies: high-rate streams drop their oldest samples, battery
+        # is coalesced to a max rate, GPS is only republished when it changes
+        self.ingest = None
+        if self.get_parameter('ingest_queue').value:
+            lanes = {converter.name: self.make_lane(converter) for converter in self.sensors.converters}
+            lanes['camera'] = LatestLane()
+            self.ingest = IngestQueue(lanes)
+            self.reported_drops = 0
+        self.publish_thread = None
+        if self.ingest is not None and connect:
+            self.start_publish_thread()
+        
+        # MJPEG frames are published from their reader thread, bypassing the ingest queue
+        self.mjpeg_camera = None
+        if self.camera_source == 'mjpeg':
+            url = self.get_parameter('camera_url').value or mjpeg_url(self.websocket_url)
+            self.mjpeg_camera = MjpegCameraSource(url, self.on_mjpeg_frame, self.get_logger()).start()
+        
+        self.transport = None
+        self.connection = None
+        if connect:
+            self.transport = TRANSPORTS.get(self.get_parameter('transport').value)(self)
+            self.connection = self.transport.connection
+            self.get_logger().info(f"Phone sensor bridge initialized ({self.transport.describe()}), "
+                                   f"connecting to {self.websocket_url}")
+            self.transport.start()
+    
+    def make_lane(self, converter):
+        """Ingest queue lane for a converter's topic, following its `lane` policy"""
+        if converter.lane == 'on_change':
+            return OnChangeLane()
+        if converter.lane == 'latest':
+            max_rate = converter.max_rate
+            if converter.name == 'battery':
+                max_rate = self.get_parameter('battery_max_rate').value
+            return LatestLane(max_rate)
+        return DropOldestLane(self.get_parameter('imu_queue_size').value)
+    
+    def receive_sensor_data(self, data):
+        """Entry point for a received sensorData payload (Socket.IO handler, replay.py)"""
+        self.last_data_time = time.time()
+        if self.log_packets:
+            self.log_packet('sensorData', data)
+        stamp_ns = self.clock_sync.stamp(data, self.get_clock().now().nanoseconds)
+        self.enqueue_sensor_data(data, stamp_ns)
+    
+    def receive_sensor_delta(self, data, changed):
+        """Entry point for a phone's state rebuilt from a sensorDelta and the fields it changed"""
+        self.last_data_time = time.time()
+        if self.log_packets:
+            self.log_packet('sensorDelta', {field: data.get(field) for field in changed})
+        stamp_ns = self.clock_sync.stamp(data, self.get_clock().now().nanoseconds)
+        self.enqueue_sensor_data(data, stamp_ns, changed)
+    
+    def receive_sensor_batch(self, batch):
+        """Entry point for a received sensorBatch payload"""
+        self.last_data_time = time.time()
+        if self.log_packets:
+            self.log_packet('sensorBatch', batch)
+        self.dispatch('imu', self.sensors.process_sensor_batch, (batch,))
+    
+    def receive_camera_frame(self, data):
+        """Entry point for a received cameraFrame or cameraFrameBinary payload"""
+        if self.camera_source in ('mjpeg', 'none'):
+            return
+        if isinstance(data.get('data'), bytes):
+            # Binary attachments bypass the JSON decoder's byte count
+            self.stats.add_bytes('cameraFrameBinary', len(data['data']))
+        if self.log_packets:
+            self.log_packet('cameraFrame', data)
+        self.dispatch('camera', self.sensors.process_camera_data, (data,))
+    
+    def receive_pong(self, client_ms, server_ms):
+        """Server clock sample answering a ping sent at client_ms (both epoch ms)"""
+        self.clock_sync.observe_pong(client_ms / 1000.0, server_ms / 1000.0,
+                                     self.get_clock().now().nanoseconds / 1e9)
+    
+    def log_packet(self, event, data):
+        """One log line per received packet, for verbosity 'debug'"""
+        text = json.dumps(data, default=lambda value: f"<{len(value)} bytes>")
+        self.get_logger().info(f"{event}: {text[:2000]}")
+    
+    def process_sensor_data(self, data, stamp_ns=None):
+        """Publish one sensorData payload"""
+        self.sensors.process_sensor_data(data, stamp_ns)
+    
+    def process_sensor_batch(self, batch):
+        """Publish one sensorBatch payload"""
+        self.sensors.process_sensor_batch(batch)
+    
+    def process_camera_data(self, camera_data):
+        """Publish one cameraFrame payload"""
+        self.sensors.process_camera_data(camera_data)
+    
+    def on_mjpeg_frame(self, frame, headers):
+        """Publish one MJPEG part; `frame` is a view into the demuxer buffer"""
+        self.last_data_time = time.time()
+        self.stats.add_bytes('mjpeg', len(frame))
+        received = time.perf_counter()
+        self.publish_item(('camera', self.sensors.publish_camera_frame,
+                           (frame, self.get_clock().now().nanoseconds), received, received))
+    
+    def enqueue_sensor_data(self, data, stamp_ns=None, changed=None):
+        """Stamp a packet on receipt and hand its topics to the ingest queue"""
+        if stamp_ns is None:
+            stamp_ns = self.get_clock().now().nanoseconds
+        received, decoded = self.stats.received()
+        for topic, publish, payload, key in self.sensors.sensor_items(data, changed):
+            self.dispatch(topic, publish, (payload, stamp_ns), key, received, decoded)
+    
+    def dispatch(self, topic, publish, args, key=None, received=None, decoded=None):
+        """Queue a publish call on the ingest queue, or run it now when the queue is off"""
+        if received is None:
+            received, decoded = self.stats.received()
+        item = (topic, publish, args, received, decoded)
+        if self.ingest is not None:
+            self.ingest.put(topic, item, key)
+        else:
+            self.publish_item(item)
+    
+    def publish_item(self, item):
+        """Run one timed convert+publish call"""
+        topic, publish, args, received, decoded = item
+        try:
+            self.profiler.call(self.stats.timed_call, topic, received, decoded, publish, *args)
+        except Exception as e:
+            self.get_logger().error(f"Error publishing {publish.__name__}: {e}")
+    
+    def start_publish_thread(self):
+        """Drain the ingest queue with publish_loop on a thread of its own"""
+        self.publish_thread = threading.Thread(target=self.publish_loop, daemon=True)
+        self.publish_thread.start()
+    
+    def publish_loop(self):
+        """Drain the ingest queue on its own thread so the socket thread never blocks"""
+        while not self.ingest.closed:
+            for item in self.ingest.take(timeout=0.5):
+                self.publish_item(item)
+    
+    def on_set_parameters(self, parameters):
+        """Start or stop a hot-path profile when the 'profile' parameter changes"""
+        for parameter in parameters:
+            if parameter.name != 'profile':
+                continue
+            if parameter.value and not self.profiler.active:
+                backend = self.get_parameter('profiler').value
+                try:
+                    self.profiler.start(backend)
+                except ImportError:
+                    return SetParametersResult(successful=False, reason=f"{backend} is not installed")
+                self.get_logger().info(f"Hot-path profiling started ({backend})")
+            elif not parameter.value and self.profiler.active:
+                path, summary = self.profiler.stop(self.get_parameter('profile_dir').value)
+                self.get_logger().info(f"Hot-path profile written to {path}\n{summary}")
+        return SetParametersResult(successful=True)
+    
+    def publish_diagnostics(self):
+        """Publish diagnostic information about the bridge status"""
+        diag_array = DiagnosticArray()
+        diag_array.header.stamp = self.get_clock().now().to_msg()
+        
+        # Connection status
+        conn_status = DiagnosticStatus()
+        conn_status.name = "phone_sensor_bridge/connection"
+        conn_status.hardware_id = "phone_socket_connection"
+        
+        if self.connected:
+            conn_status.level = DiagnosticStatus.OK
+            conn_status.message = "Connected to phone sensor server"
+        else:
+            conn_status.level = DiagnosticStatus.ERROR
+            conn_status.message = "Disconnected from phone sensor server"
+        
+        # Data freshness
+        data_age = time.time() - self.last_data_time
+        if data_age < 5.0:
+            conn_status.values.append(KeyValue(key="data_age", value=f"{data_age:.1f}s"))
+        else:
+            conn_status.level = DiagnosticStatus.WARN
+            conn_status.message += f" (No data for {data_age:.1f}s)"
+        
+        if self.connection is not None:
+            link = self.connection.stats()
+            if link['state'] == 'failed':
+                conn_status.message += " (gave up reconnecting)"
+            elif link['state'] == 'reconnecting':
+                conn_status.message += f" (reconnecting for {link['outage_s']:.1f}s)"
+            conn_status.values.extend([
+                KeyValue(key="transport", value=link['transport']),
+                KeyValue(key="reconnects", value=str(link['reconnects'])),
+                KeyValue(key="last_reconnect_s", value=f"{link['last_reconnect_s'] or 0.0:.2f}"),
+                KeyValue(key="mean_reconnect_s", value=f"{link['mean_reconnect_s'] or 0.0:.2f}"),
+                KeyValue(key="heartbeat_timeouts", value=str(link['heartbeat_timeouts'])),
+                KeyValue(key="failed_attempts", value=str(link['failed_attempts'])),
+                KeyValue(key="last_heard_s", value=f"{link['last_heard_s']:.1f}"),
+            ])
+        
+        diag_array.status.append(conn_status)
+        
+        # Ingest queue depth and drop counters per topic
+        if self.ingest is not None:
+            queue_status = DiagnosticStatus()
+            queue_status.name = "phone_sensor_bridge/ingest_queue"
+            queue_status.hardware_id = "phone_socket_connection"
+            total_drops = 0
+            for topic, (depth, dropped) in self.ingest.stats().items():
+                queue_status.values.append(KeyValue(key=f"{topic}_depth", value=str(depth)))
+                queue_status.values.append(KeyValue(key=f"{topic}_dropped", value=str(dropped)))
+                total_drops += dropped
+            new_drops = total_drops - self.reported_drops
+            self.reported_drops = total_drops
+            queue_status.level = DiagnosticStatus.OK
+            queue_status.message = f"{new_drops} samples dropped or coalesced since last report"
+            diag_array.status.append(queue_status)
+        
+        # Frames decoded by the image_raw/image_small stage and frames it shed
+        if self.image_decoder is not None:
+            decoded, dropped, idle, failed = self.image_decoder.counters()
+            decode_status = DiagnosticStatus()
+            decode_status.name = "phone_sensor_bridge/camera_decode"
+            decode_status.hardware_id = "phone_socket_connection"
+            decode_status.level = DiagnosticStatus.WARN if failed else DiagnosticStatus.OK
+            decode_status.message = f"{decoded} frames decoded, {dropped} dropped while workers were busy"
+            decode_status.values = [
+                KeyValue(key="decoded", value=str(decoded)),
+                KeyValue(key="dropped_busy", value=str(dropped)),
+                KeyValue(key="skipped_no_subscribers", value=str(idle)),
+                KeyValue(key="failed", value=str(failed)),
+            ]
+            diag_array.status.append(decode_status)
+        
+        # Clock offset estimate and the arrival jitter it removes
+        sync = self.clock_sync.stats()
+        sync_status = DiagnosticStatus()
+        sync_status.name = "phone_sensor_bridge/clock_sync"
+        sync_status.hardware_id = "phone_socket_connection"
+        if sync['synced']:
+            sync_status.level = DiagnosticStatus.OK
+            sync_status.message = (f"offset {sync['offset'] * 1000.0:.1f} ms, "
+                                   f"jitter {sync['phone_jitter_std'] * 1000.0:.1f} ms")
+        else:
+            sync_status.level = DiagnosticStatus.WARN
+            sync_status.message = "No phone timestamps yet; stamping on arrival"
+        sync_status.values = [
+            KeyValue(key="timestamp_source", value=self.timestamp_source),
+            KeyValue(key="offset_ms", value=f"{sync['offset'] * 1000.0:.3f}"),
+            KeyValue(key="drift_ppm", value=f"{sync['drift_ppm']:.1f}"),
+            KeyValue(key="jitter_std_ms", value=f"{sync['phone_jitter_std'] * 1000.0:.3f}"),
+            KeyValue(key="jitter_p95_ms", value=f"{sync['phone_jitter_p95'] * 1000.0:.3f}"),
+            KeyValue(key="server_offset_ms", value=f"{sync['server_offset'] * 1000.0:.3f}"),
+            KeyValue(key="server_jitter_std_ms", value=f"{sync['server_jitter_std'] * 1000.0:.3f}"),
+            KeyValue(key="phone_round_trip_ms", value=f"{sync['round_trip'] * 1000.0:.1f}"),
+            KeyValue(key="packets", value=str(sync['packets'])),
+            KeyValue(key="pongs", value=str(sync['pongs'])),
+            KeyValue(key="clamped_to_arrival", value=str(sync['clamped'])),
+        ]
+        diag_array.status.append(sync_status)
+        if sync['synced']:
+            self.clock_offset_publisher.publish(Float64(data=sync['offset']))
+        
+        # Per-topic rates and stage latencies, also published as JSON on phone/bridge_stats
+        report = self.stats.report()
+        self.stats_publisher.publish(String(data=json.dumps(report)))
+        latency_status = DiagnosticStatus()
+        latency_status.name = "phone_sensor_bridge/latency"
+        latency_status.hardware_id = "phone_socket_connection"
+        latency_status.level = DiagnosticStatus.OK
+        latency_status.message = "Per-topic rates and stage latency percentiles (us)"
+        decode_failures = report['decode_failures']
+        if decode_failures:
+            latency_status.level = DiagnosticStatus.WARN
+            latency_status.message += f", {sum(decode_failures.values())} packets failed to decode"
+        for source, failures in sorted(decode_failures.items()):
+            latency_status.values.append(KeyValue(key=f"{source}_decode_failures", value=str(failures)))
+        for topic, entry in sorted(report['topics'].items()):
+            latency_status.values.append(KeyValue(key=f"{topic}_msgs_per_s", value=f"{entry['messages_per_s']:.1f}"))
+            if entry['bytes_per_s']:
+                latency_status.values.append(KeyValue(key=f"{topic}_bytes_per_s", value=f"{entry['bytes_per_s']:.0f}"))
+            for stage, figures in entry['stages'].items():
+                latency_status.values.append(KeyValue(
+                    key=f"{topic}_{stage}_p50/p95/p99",
+                    value=f"{figures['p50_us']:.0f}/{figures['p95_us']:.0f}/{figures['p99_us']:.0f}"))
+        diag_array.status.append(latency_status)
+        
+        self.diagnostics_publisher.publish(diag_array)
+        if self.verbosity == 'summary':
+            self.log_summary(report)
+    
+    def log_summary(self, report):
+        """One log line with the per-topic rates and decode failures of a stats report"""
+        rates = ', '.join(f"{topic} {entry['messages_per_s']:.1f}/s"
+                          for topic, entry in sorted(report['topics'].items()) if entry['messages'])
+        failures = sum(report['decode_failures'].values())
+        self.get_logger().info(f"{rates or 'No messages'}; {failures} decode failures "
+                               f"in {report['period_s']:.1f}s")
+    
+    def destroy_node(self):
+        """Clean shutdown of Socket.IO connection"""
+        if self.ingest is not None:
+            self.ingest.close()
+        if self.mjpeg_camera is not None:
+            self.mjpeg_camera.stop()
+        if self.image_decoder is not None:
+            self.image_decoder.close()
+        if self.frame_ring is not None:
+            self.frame_ring.close()
+        if self.profiler.active:
+            self.profiler.stop(self.get_parameter('profile_dir').value)
+        if self.transport is not None:
+            self.transport.stop()
+        super().destroy_node()
+
+def main(args=None):
+    """Main entry point for the ROS 2 node[15]"""
+    rclpy.init(args=args)
+    
+    try:
+        bridge = PhoneSensorBridge()
+        rclpy.spin(bridge)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if 'bridge' in locals():
+            bridge.destroy_node()
+        rclpy.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Preallocated ROS message templates for the phone bridges.
+
+Each template owns one message instance whose constant fields (frame_id,
+covariances, status flags) are filled once. Per-sample calls only write the
+changing fields and return that same instance, which is safe because
+Publisher.publish() serializes the message before returning. A factory must
+therefore be used from one thread at a time and a returned message must be
+published (or copied) before the next fill.
+
+Generated rclpy setters type-check every assignment while __debug__ is on;
+running the node with `python3 -O` skips those checks on this hot path.
+"""
+
+from array import array
+
+from sensor_msgs.msg import Imu, NavSatFix, NavSatStatus, BatteryState, CompressedImage, Image
+from geometry_msgs.msg import TwistStamped, QuaternionStamped, TransformStamped
+
+NANOSECONDS_PER_SECOND = 1000000000
+
+# Imu covariance matrices (row-major 3x3)
+UNKNOWN_COVARIANCE = (-1.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+ZERO_COVARIANCE = (0.0,) * 9
+
+
+def diagonal_covariance(variance):
+    """Row-major 3x3 covariance with `variance` on the diagonal"""
+    return (variance, 0.0, 0.0, 0.0, variance, 0.0, 0.0, 0.0, variance)
+
+
+def set_stamp(stamp, nanoseconds):
+    """Write an integer nanosecond time into an existing builtin_interfaces/Time"""
+    stamp.sec, stamp.nanosec = divmod(nanoseconds, NANOSECONDS_PER_SECOND)
+
+
+class ImuTemplate:
+    """
+    sensor_msgs/Imu with fixed frame and covariances. `orientation_covariance`
+    applies to samples with an orientation; a sample without one is sent as
+    the identity with orientation_covariance[0] = -1 (unknown, as
+    sensor_msgs/Imu specifies)
+    """
+
+    def __init__(self, frame_id,
+                 orientation_covariance=UNKNOWN_COVARIANCE,
+                 angular_velocity_covariance=ZERO_COVARIANCE,
+                 linear_acceleration_covariance=ZERO_COVARIANCE):
+        msg = Imu()
+        msg.header.frame_id = frame_id
+        msg.orientation_covariance = list(orientation_covariance)
+        msg.angular_velocity_covariance = list(angular_velocity_covariance)
+        msg.linear_acceleration_covariance = list(linear_acceleration_covariance)
+        self.msg = msg
+        self._stamp = msg.header.stamp
+        self._orientation = msg.orientation
+        self._angular_velocity = msg.angular_velocity
+        self._linear_acceleration = msg.linear_acceleration
+        self._orientation_covariance = msg.orientation_covariance
+        self._known_orientation_variance = float(orientation_covariance[0])
+
+    def fill(self, nanoseconds, ax, ay, az, gx, gy, gz, quaternion=None, orientation_variance=None):
+        """
+        Fill stamp, acceleration, angular velocity and optional (x, y, z, w)
+        orientation; `orientation_variance` (rad² about x, y, z) overwrites
+        the orientation covariance diagonal
+        """
+        set_stamp(self._stamp, nanoseconds)
+        acc = self._linear_acceleration
+        acc.x = ax
+        acc.y = ay
+        acc.z = az
+        gyro = self._angular_velocity
+        gyro.x = gx
+        gyro.y = gy
+        gyro.z = gz
+        orientation = self._orientation
+        covariance = self._orientation_covariance
+        if quaternion is None:
+            orientation.x = orientation.y = orientation.z = 0.0
+            orientation.w = 1.0
+            covariance[0] = -1.0
+        else:
+            orientation.x, orientation.y, orientation.z, orientation.w = quaternion
+            covariance[0] = self._known_orientation_variance
+        if orientation_variance is not None and quaternion is not None:
+            covariance[0], covariance[4], covariance[8] = orientation_variance
+        return self.msg
+
+
+class NavSatFixTemplate:
+    """sensor_msgs/NavSatFix with fixed frame, status and covariance type"""
+
+    def __init__(self, frame_id,
+                 status=NavSatStatus.STATUS_FIX,
+                 service=NavSatStatus.SERVICE_GPS,
+                 covariance_type=NavSatFix.COVARIANCE_TYPE_DIAGONAL_KNOWN,
+                 covariance=ZERO_COVARIANCE):
+        msg = NavSatFix()
+        msg.header.frame_id = frame_id
+        msg.status.status = status
+        msg.status.service = service
+        msg.position_covariance_type = covariance_type
+        msg.position_covariance = list(covariance)
+        self.msg = msg
+        self._stamp = msg.header.stamp
+        self._covariance = msg.position_covariance
+
+    def fill(self, nanoseconds, latitude, longitude, altitude, variance=None):
+        """Fill stamp and position; `variance` (m²) overwrites the covariance diagonal"""
+        set_stamp(self._stamp, nanoseconds)
+        msg = self.msg
+        msg.latitude = latitude
+        msg.longitude = longitude
+        msg.altitude = altitude
+        if variance is not None:
+            covariance = self._covariance
+            covariance[0] = covariance[4] = covariance[8] = variance
+        return msg
+
+
+class BatteryStateTemplate:
+    """sensor_msgs/BatteryState with fixed frame and presence flag"""
+
+    def __init__(self, frame_id, present=True):
+        msg = BatteryState()
+        msg.header.frame_id = frame_id
+        msg.present = present
+        self.msg = msg
+        self._stamp = msg.header.stamp
+
+    def fill(self, nanoseconds, percentage, voltage, power_supply_status):
+        set_stamp(self._stamp, nanoseconds)
+        msg = self.msg
+        msg.percentage = percentage
+        msg.voltage = voltage
+        msg.power_supply_status = power_supply_status
+        return msg
+
+
+class TwistStampedTemplate:
+    """geometry_msgs/TwistStamped with fixed frame"""
+
+    def __init__(self, frame_id):
+        msg = TwistStamped()
+        msg.header.frame_id = frame_id
+        self.msg = msg
+        self._stamp = msg.header.stamp
+        self._linear = msg.twist.linear
+        self._angular = msg.twist.angular
+
+    def fill(self, nanoseconds, lx, ly, lz, wx, wy, wz):
+        set_stamp(self._stamp, nanoseconds)
+        linear = self._linear
+        linear.x = lx
+        linear.y = ly
+        linear.z = lz
+        angular = self._angular
+        angular.x = wx
+        angular.y = wy
+        angular.z = wz
+        return self.msg
+
+
+class QuaternionStampedTemplate:
+    """geometry_msgs/QuaternionStamped with fixed frame"""
+
+    def __init__(self, frame_id):
+        msg = QuaternionStamped()
+        msg.header.frame_id = frame_id
+        self.msg = msg
+        self._stamp = msg.header.stamp
+        self._quaternion = msg.quaternion
+
+    def fill(self, nanoseconds, quaternion):
+        """Fill stamp and an (x, y, z, w) quaternion"""
+        set_stamp(self._stamp, nanoseconds)
+        q = self._quaternion
+        q.x, q.y, q.z, q.w = quaternion
+        return self.msg
+
+
+class TransformStampedTemplate:
+    """geometry_msgs/TransformStamped with fixed parent/child frames and zero translation"""
+
+    def __init__(self, frame_id, child_frame_id):
+        msg = TransformStamped()
+        msg.header.frame_id = frame_id
+        msg.child_frame_id = child_frame_id
+        self.msg = msg
+        self._stamp = msg.header.stamp
+        self._rotation = msg.transform.rotation
+
+    def fill(self, nanoseconds, quaternion):
+        """Fill stamp and an (x, y, z, w) rotation"""
+        set_stamp(self._stamp, nanoseconds)
+        q = self._rotation
+        q.x, q.y, q.z, q.w = quaternion
+        return self.msg
+
+
+class CompressedImageTemplate:
+    """
+    sensor_msgs/CompressedImage with fixed frame and format. `data` may be
+    any bytes-like object (bytes, bytearray, memoryview); it is copied once
+    into an array('B'), which the generated setter stores without the
+    per-byte type checks it runs on bytes.
+    """
+
+    def __init__(self, frame_id, image_format='jpeg'):
+        msg = CompressedImage()
+        msg.header.frame_id = frame_id
+        msg.format = image_format
+        self.msg = msg
+        self._stamp = msg.header.stamp
+
+    def fill(self, nanoseconds, data):
+        set_stamp(self._stamp, nanoseconds)
+        buffer = array('B')
+        buffer.frombytes(data)
+        self.msg.data = buffer
+        return self.msg
+
+
+class ImageTemplate:
+    """
+    sensor_msgs/Image with fixed frame and encoding. `pixels` is a
+    C-contiguous height x width x channels uint8 array (OpenCV layout),
+    copied once into an array('B') like CompressedImageTemplate.
+    """
+
+    def __init__(self, frame_id, encoding='bgr8'):
+        msg = Image()
+        msg.header.frame_id = frame_id
+        msg.encoding = encoding
+        msg.is_bigendian = 0
+        self.msg = msg
+        self._stamp = msg.header.stamp
+
+    def fill(self, nanoseconds, pixels):
+        set_stamp(self._stamp, nanoseconds)
+        msg = self.msg
+        msg.height, msg.width = pixels.shape[:2]
+        msg.step = pixels.strides[0]
+        buffer = array('B')
+        buffer.frombytes(pixels.data)
+        msg.data = buffer
+        return msg
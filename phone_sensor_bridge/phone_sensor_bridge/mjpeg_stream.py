@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Streaming demuxer for the multipart MJPEG stream served by server.js
+(/camera/stream.mjpg, Content-Type: multipart/x-mixed-replace; boundary=frame)
+"""
+
+import re
+
+_BOUNDARY_RE = re.compile(r'boundary="?([^";]+)"?', re.IGNORECASE)
+_CONTENT_LENGTH_RE = re.compile(rb'^content-length:\s*(\d+)\s*$', re.IGNORECASE | re.MULTILINE)
+
+
+def header_value(headers, name):
+    """Look up a header in a raw part header block, returning str or None"""
+    prefix = name.lower().encode('ascii') + b':'
+    for line in headers.split(b'\r\n'):
+        if line[:len(prefix)].lower() == prefix:
+            return line[len(prefix):].strip().decode('latin-1')
+    return None
+
+
+def boundary_from_content_type(content_type, default='frame'):
+    """Extract the multipart boundary from a Content-Type header value"""
+    if content_type:
+        match = _BOUNDARY_RE.search(content_type)
+        if match:
+            boundary = match.group(1).strip()
+            # Some servers already prefix the boundary with '--'
+            return boundary[2:] if boundary.startswith('--') else boundary
+    return default
+
+
+class MjpegDemuxer:
+    """
+    Incremental multipart/x-mixed-replace parser backed by a reusable buffer.
+
+    Incoming bytes are copied once into an internal bytearray; frames are
+    handed out as memoryviews into that buffer. A frame view is only valid
+    until the next call to feed()/readinto(), which may compact the buffer
+    in place. Copy it (bytes(view)) if it has to outlive that.
+
+    Parts carrying a Content-Length header are sliced directly; parts without
+    one are delimited by the next boundary, never by JPEG EOI markers, so
+    embedded EXIF thumbnails do not split frames.
+    """
+
+    def __init__(self, boundary='frame', capacity=256 * 1024):
+        if isinstance(boundary, str):
+            boundary = boundary.encode('ascii')
+        self._delimiter = b'--' + boundary
+        self._next_part = b'\r\n' + self._delimiter
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._start = 0      # first unconsumed byte
+        self._end = 0        # one past the last valid byte
+        self._scan = 0       # where the next search resumes
+        self._headers = -1   # header offset of the part being read, -1 before its boundary
+        self._payload = -1   # payload offset of the part being read, -1 while in headers
+        self._length = None  # Content-Length of the part being read, if announced
+
+        self.headers = b''   # raw header block of the most recently yielded part
+        self.frame_count = 0
+        self.byte_count = 0
+
+    @classmethod
+    def from_content_type(cls, content_type, **kwargs):
+        """Create a demuxer for the boundary announced in a Content-Type header"""
+        return cls(boundary_from_content_type(content_type), **kwargs)
+
+    @property
+    def buffered(self):
+        """Number of bytes received but not yet consumed"""
+        return self._end - self._start
+
+    def feed(self, data):
+        """Append received bytes and return an iterator over completed frames"""
+        size = len(data)
+        if size:
+            self._reserve(size)
+            self._view[self._end:self._end + size] = data
+            self._end += size
+            self.byte_count += size
+        return self._drain()
+
+    def readinto(self, stream, size=64 * 1024):
+        """
+        Read up to `size` bytes from a file-like object straight into the
+        buffer. Returns (bytes_read, frame iterator); bytes_read == 0 at EOF.
+        """
+        self._reserve(size)
+        count = stream.readinto(self._view[self._end:self._end + size]) or 0
+        self._end += count
+        self.byte_count += count
+        return count, self._drain()
+
+    def iter_frames(self, chunks):
+        """Yield frames from an iterable of byte chunks (e.g. requests' iter_content)"""
+        for chunk in chunks:
+            yield from self.feed(chunk)
+        yield from self.flush()
+
+    def flush(self):
+        """Yield a trailing boundary-delimited frame left over at end of stream"""
+        if self._payload >= 0 and self._length is None and self._end > self._payload:
+            end = self._end
+            if self._buf.endswith(b'\r\n', self._payload, end):
+                end -= 2
+            frame = self._view[self._payload:end]
+            self._reset(self._end)
+            self.frame_count += 1
+            yield frame
+
+    def _reset(self, offset):
+        self._start = self._scan = offset
+        self._headers = -1
+        self._payload = -1
+        self._length = None
+
+    def _reserve(self, size):
+        """Make room for `size` more bytes, compacting or growing the buffer"""
+        if self._end + size <= len(self._buf):
+            return
+
+        live = self._end - self._start
+        if live + size <= len(self._buf) // 2:
+            # Slide unconsumed bytes to the front; memoryview assignment is a memmove
+            self._view[0:live] = self._view[self._start:self._end]
+        else:
+            # Grow into a fresh buffer so views handed out earlier stay intact
+            grown = bytearray(max(2 * len(self._buf), 2 * (live + size)))
+            grown[0:live] = self._view[self._start:self._end]
+            self._buf = grown
+            self._view = memoryview(grown)
+
+        shift = self._start
+        self._start = 0
+        self._end = live
+        self._scan -= shift
+        if self._headers >= 0:
+            self._headers -= shift
+        if self._payload >= 0:
+            self._payload -= shift
+
+    def _drain(self):
+        buf = self._buf
+        while True:
+            if self._payload < 0 and not self._parse_headers():
+                return
+
+            if self._length is not None:
+                frame_end = self._payload + self._length
+                if frame_end > self._end:
+                    return
+                next_start = frame_end
+            else:
+                # No Content-Length: the part ends at the next boundary line
+                frame_end = buf.find(self._next_part, max(self._scan, self._payload), self._end)
+                if frame_end < 0:
+                    self._scan = max(self._payload, self._end - len(self._next_part) + 1)
+                    return
+                next_start = frame_end + 2
+
+            frame = self._view[self._payload:frame_end]
+            self._reset(next_start)
+            self.frame_count += 1
+            yield frame
+
+    def _parse_headers(self):
+        """Locate the next part's boundary and headers; False if more data is needed"""
+        buf = self._buf
+        if self._headers < 0:
+            part = buf.find(self._delimiter, self._scan, self._end)
+            if part < 0:
+                # Discard preamble/trailing CRLF but keep a possible partial delimiter
+                self._start = self._scan = max(self._start, self._end - len(self._delimiter) + 1)
+                return False
+            self._start = part
+            self._headers = self._scan = part + len(self._delimiter)
+
+        header_end = buf.find(b'\r\n\r\n', self._scan, self._end)
+        if header_end < 0:
+            self._scan = max(self._headers, self._end - 3)
+            return False
+
+        self.headers = bytes(self._view[self._headers:header_end])
+        match = _CONTENT_LENGTH_RE.search(self.headers)
+        self._length = int(match.group(1)) if match else None
+        self._headers = -1
+        self._payload = self._scan = header_end + 4
+        return True
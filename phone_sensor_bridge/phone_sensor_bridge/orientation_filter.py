@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+On-bridge orientation filter for phone/imu, off unless the bridge runs
+with `orientation_filter:=madgwick`: on the recorded logs it is no better
+than repeating the browser's previous reading (see
+benchmarks/bench_orientation_filter.py).
+
+OrientationFilter integrates the gyroscope at the sample rate and corrects
+its drift with whatever absolute reference a sample carries:
+
+- gravity: when the accelerometer magnitude is within `gravity_tolerance`
+  of 1 g (accelerations that include gravity), a Madgwick gradient-descent
+  step with gain `beta` pulls roll and pitch toward it;
+- DeviceOrientation: the browser's quaternion, when given, is blended in
+  with time constant `time_constant` (a complementary filter), which also
+  holds yaw. The browser reports orientation less often than motion, and
+  phone.js repeats its last reading in every packet, so a reference equal to
+  the previous one is ignored. phone.js sends DeviceMotion `acceleration`
+  without gravity, so with the current page this is the correction that
+  applies.
+
+The state is a handful of floats updated with scalar arithmetic: a sample
+costs a few microseconds and allocates nothing besides the returned tuples.
+
+The orientation variance per world axis is the running mean square of the
+correction residuals (how far the gyro prediction was from the reference,
+a conservative bound) plus the gyro random walk accumulated since that axis
+was last corrected. While the phone is still (rotation rate below
+`stationary_rate` and no acceleration besides gravity for
+`stationary_time`), `stationary` is set and the gyro bias re-estimated.
+
+Quaternions are (x, y, z, w) from the phone body frame to the world frame,
+as in conversions.py; rates are body rad/s, accelerations m/s².
+
+    >>> f = OrientationFilter()
+    >>> for i in range(201):  # 1 s at 200 Hz turning about z at 90 deg/s
+    ...     q, variance = f.update(i * 5000000, 0.0, 0.0, GRAVITY, 0.0, 0.0, math.pi / 2)
+    >>> [round(v, 3) for v in q], f.stationary
+    ([0.0, 0.0, 0.707, 0.707], False)
+"""
+
+import math
+
+from .conversions import GRAVITY
+
+# Variance (rad²) reported before any correction, and the cap
+INITIAL_VARIANCE = 0.1
+MAX_VARIANCE = math.pi * math.pi
+
+
+class OrientationFilter:
+
+    def __init__(self, beta=0.1, time_constant=0.5, gyro_noise=0.01, gravity_tolerance=0.2,
+                 stationary_rate=0.05, stationary_accel=0.3, stationary_time=0.5,
+                 bias_time_constant=2.0, residual_smoothing=0.02, max_dt=0.5):
+        self.beta = beta
+        self.time_constant = time_constant
+        # Gyro noise density (rad/s/√Hz): its square is the random walk rate (rad²/s)
+        self.drift_rate = gyro_noise * gyro_noise
+        self.gravity_tolerance = gravity_tolerance * GRAVITY
+        self.stationary_rate = stationary_rate
+        self.stationary_accel = stationary_accel
+        self.stationary_time = stationary_time
+        self.bias_time_constant = bias_time_constant
+        self.residual_smoothing = residual_smoothing
+        # A longer gap restarts from the next reference instead of integrating across it
+        self.max_dt = max_dt
+        self.reset()
+
+    def reset(self, quaternion=None):
+        """Start over, from `quaternion` (x, y, z, w) when given"""
+        self.qx, self.qy, self.qz, self.qw = quaternion if quaternion is not None else (0.0, 0.0, 0.0, 1.0)
+        self.initialized = quaternion is not None
+        self.last_ns = None
+        self.reference = None
+        self.reference_ns = None
+        self.bx = self.by = self.bz = 0.0
+        self.rx = self.ry = self.rz = INITIAL_VARIANCE
+        self.dx = self.dy = self.dz = 0.0
+        self.still_time = 0.0
+        self.stationary = False
+
+    @property
+    def bias(self):
+        """Estimated gyro bias (rad/s)"""
+        return self.bx, self.by, self.bz
+
+    def update(self, stamp_ns, ax, ay, az, gx, gy, gz, reference=None):
+        """
+        Fuse one sample; `reference` is the browser's (x, y, z, w) orientation
+        if the sample has one. Returns ((x, y, z, w), (var_x, var_y, var_z)).
+        """
+        last_ns = self.last_ns
+        self.last_ns = stamp_ns
+        dt = (stamp_ns - last_ns) * 1e-9 if last_ns is not None else 0.0
+        if dt < 0.0:
+            dt = 0.0
+        elif dt > self.max_dt:
+            dt = 0.0
+            if reference is not None:
+                self.initialized = False
+
+        if not self.initialized:
+            self.initialize(ax, ay, az, reference)
+            self.reference = reference
+            self.reference_ns = stamp_ns
+
+        # Motion state and gyro bias
+        wx = gx - self.bx
+        wy = gy - self.by
+        wz = gz - self.bz
+        accel = math.sqrt(ax * ax + ay * ay + az * az)
+        dynamic = min(abs(accel - GRAVITY), accel)
+        if wx * wx + wy * wy + wz * wz < self.stationary_rate * self.stationary_rate \
+                and dynamic < self.stationary_accel:
+            self.still_time += dt
+        else:
+            self.still_time = 0.0
+        self.stationary = self.still_time >= self.stationary_time
+        if self.stationary and dt:
+            k = min(1.0, dt / self.bias_time_constant)
+            self.bx += k * wx
+            self.by += k * wy
+            self.bz += k * wz
+            wx = gx - self.bx
+            wy = gy - self.by
+            wz = gz - self.bz
+
+        qw, qx, qy, qz = self.qw, self.qx, self.qy, self.qz
+        # Rate of change of the quaternion from the gyroscope: 0.5 q ⊗ (0, ω)
+        dw = 0.5 * (-qx * wx - qy * wy - qz * wz)
+        dx = 0.5 * (qw * wx + qy * wz - qz * wy)
+        dy = 0.5 * (qw * wy - qx * wz + qz * wx)
+        dz = 0.5 * (qw * wz + qx * wy - qy * wx)
+
+        drift = self.drift_rate * dt
+        ex = self.dx + drift
+        ey = self.dy + drift
+        ez = self.dz + drift
+
+        if abs(accel - GRAVITY) < self.gravity_tolerance and dt:
+            ax /= accel
+            ay /= accel
+            az /= accel
+            # Madgwick's gradient of the gravity error (IMU form)
+            _2qw, _2qx, _2qy, _2qz = 2.0 * qw, 2.0 * qx, 2.0 * qy, 2.0 * qz
+            _4qw, _4qx, _4qy = 4.0 * qw, 4.0 * qx, 4.0 * qy
+            _8qx, _8qy = 8.0 * qx, 8.0 * qy
+            qwqw, qxqx, qyqy, qzqz = qw * qw, qx * qx, qy * qy, qz * qz
+            sw = _4qw * qyqy + _2qy * ax + _4qw * qxqx - _2qx * ay
+            sx = _4qx * qzqz - _2qz * ax + 4.0 * qwqw * qx - _2qw * ay - _4qx + _8qx * qxqx + _8qx * qyqy + _4qx * az
+            sy = 4.0 * qwqw * qy + _2qw * ax + _4qy * qzqz - _2qz * ay - _4qy + _8qy * qxqx + _8qy * qyqy + _4qy * az
+            sz = 4.0 * qxqx * qz - _2qx * ax + 4.0 * qyqy * qz - _2qy * ay
+            norm = math.sqrt(sw * sw + sx * sx + sy * sy + sz * sz)
+            if norm > 0.0:
+                step = self.beta / norm
+                dw -= step * sw
+                dx -= step * sx
+                dy -= step * sy
+                dz -= step * sz
+            # Tilt residual: measured x predicted gravity direction (body), rotated to world
+            vx = _2qx * qz - _2qw * qy
+            vy = _2qw * qx + _2qy * qz
+            vz = qwqw - qxqx - qyqy + qzqz
+            cx = ay * vz - az * vy
+            cy = az * vx - ax * vz
+            cz = ax * vy - ay * vx
+            tx = (1.0 - 2.0 * (qyqy + qzqz)) * cx + 2.0 * (qx * qy - qw * qz) * cy + 2.0 * (qx * qz + qw * qy) * cz
+            ty = 2.0 * (qx * qy + qw * qz) * cx + (1.0 - 2.0 * (qxqx + qzqz)) * cy + 2.0 * (qy * qz - qw * qx) * cz
+            smoothing = self.residual_smoothing
+            self.rx += smoothing * (tx * tx - self.rx)
+            self.ry += smoothing * (ty * ty - self.ry)
+            ex = ey = 0.0
+
+        qw += dw * dt
+        qx += dx * dt
+        qy += dy * dt
+        qz += dz * dt
+
+        if reference is not None and reference != self.reference:
+            # Weighted by the time since the previous reading, however many samples apart
+            since = (stamp_ns - self.reference_ns) * 1e-9 if self.reference_ns is not None else 0.0
+            self.reference = reference
+            self.reference_ns = stamp_ns
+            rx, ry, rz, rw = reference
+            if rw * qw + rx * qx + ry * qy + rz * qz < 0.0:
+                rx, ry, rz, rw = -rx, -ry, -rz, -rw
+            # Residual rotation reference ⊗ estimate⁻¹, as a small world-frame angle vector
+            px = 2.0 * (-rw * qx + rx * qw - ry * qz + rz * qy)
+            py = 2.0 * (-rw * qy + rx * qz + ry * qw - rz * qx)
+            pz = 2.0 * (-rw * qz - rx * qy + ry * qx + rz * qw)
+            smoothing = self.residual_smoothing
+            self.rx += smoothing * (px * px - self.rx)
+            self.ry += smoothing * (py * py - self.ry)
+            self.rz += smoothing * (pz * pz - self.rz)
+            k = 1.0 - math.exp(-min(since, self.max_dt) / self.time_constant) if self.time_constant > 0.0 else 1.0
+            qw += k * (rw - qw)
+            qx += k * (rx - qx)
+            qy += k * (ry - qy)
+            qz += k * (rz - qz)
+            ex = ey = ez = 0.0
+
+        norm = 1.0 / math.sqrt(qw * qw + qx * qx + qy * qy + qz * qz)
+        self.qw = qw = qw * norm
+        self.qx = qx = qx * norm
+        self.qy = qy = qy * norm
+        self.qz = qz = qz * norm
+        self.dx, self.dy, self.dz = ex, ey, ez
+        return (qx, qy, qz, qw), (min(self.rx + ex, MAX_VARIANCE),
+                                  min(self.ry + ey, MAX_VARIANCE),
+                                  min(self.rz + ez, MAX_VARIANCE))
+
+    def initialize(self, ax, ay, az, reference):
+        """Take the reference, else roll and pitch from gravity (yaw 0), else identity"""
+        if reference is not None:
+            self.qx, self.qy, self.qz, self.qw = reference
+        else:
+            accel = math.sqrt(ax * ax + ay * ay + az * az)
+            if abs(accel - GRAVITY) < self.gravity_tolerance:
+                roll = math.atan2(ay, az)
+                pitch = math.atan2(-ax, math.sqrt(ay * ay + az * az))
+                cr, sr = math.cos(roll * 0.5), math.sin(roll * 0.5)
+                cp, sp = math.cos(pitch * 0.5), math.sin(pitch * 0.5)
+                self.qx, self.qy, self.qz, self.qw = sr * cp, cr * sp, -sr * sp, cr * cp
+        self.initialized = True
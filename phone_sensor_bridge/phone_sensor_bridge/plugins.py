@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Name -> class registries for the bridge's pluggable parts (converters.py,
+transports.py).
+
+Built-in entries register themselves with a decorator when their module is
+imported. Any other name is looked up in the entry point group of the
+registry, so an installed distribution can add a converter or a transport
+by declaring, e.g. in its pyproject.toml:
+
+    [project.entry-points."phone_sensor_bridge.converters"]
+    barometer = "my_package.barometer:BarometerConverter"
+"""
+
+from importlib import metadata
+
+
+class Registry:
+    """
+    >>> registry = Registry('example.things', 'thing')
+    >>> @registry.register('thing')
+    ... class Thing:
+    ...     pass
+    >>> registry.get('thing') is Thing, registry.names()
+    (True, ['thing'])
+    """
+
+    def __init__(self, group, kind):
+        self.group = group
+        self.kind = kind
+        self.classes = {}
+
+    def register(self, name):
+        def decorator(cls):
+            cls.name = name
+            self.classes[name] = cls
+            return cls
+        return decorator
+
+    def get(self, name):
+        cls = self.classes.get(name)
+        if cls is None:
+            for entry_point in entry_points(self.group):
+                if entry_point.name == name:
+                    cls = self.classes[name] = entry_point.load()
+                    cls.name = name
+                    break
+            else:
+                raise KeyError(f"Unknown {self.kind} '{name}' "
+                               f"(available: {', '.join(self.names())})")
+        return cls
+
+    def names(self):
+        return sorted(set(self.classes) | {entry_point.name for entry_point in entry_points(self.group)})
+
+
+def entry_points(group):
+    found = metadata.entry_points()
+    if hasattr(found, 'select'):
+        return list(found.select(group=group))
+    return list(found.get(group, ()))
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Replay recorded sensor_logs/*.jsonl into the bridges without a phone.
+
+Records are streamed one line at a time and dispatched with their original
+`timestamp` spacing divided by --speed (0 replays as fast as possible).
+Gaps longer than --max-gap, e.g. between two recording sessions, are
+shortened to --max-gap.
+
+Targets:
+- bridge: PhoneSensorBridge.receive_sensor_data, the Socket.IO handler path
+- ws: the raw WebSocket path, the payload re-serialized to text and decoded
+  by the bridge's JSON backend before receive_sensor_data
+- none: decode and pace only (no ROS needed)
+
+Latency is measured from a record's scheduled dispatch time until its
+messages are published, so it includes any time the replay fell behind
+schedule. The bridge targets publish from their ingest queue thread, so
+every published topic message is timed when `publish_item` returns; the
+none target is timed when its handler returns.
+
+    python3 replay.py --speed 10 --target bridge
+    python3 replay.py sensor_logs/sensors_2025-06-15.jsonl --speed 0 --target ws
+"""
+
+import argparse
+import glob
+import os
+import sys
+import threading
+import time
+from array import array
+
+from .clock_sync import parse_time
+from .decoders import JsonModule
+
+# server.js logs into sensor_logs/ beside the package in a checkout
+LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sensor_logs')
+DEFAULT_LOGS = sorted(glob.glob(os.path.join(LOG_DIR, '*.jsonl')))
+TARGETS = ('bridge', 'ws', 'none')
+
+
+def iter_records(paths, loads):
+    """Yield (timestamp seconds, payload) for every line of every log, lazily"""
+    for path in paths:
+        with open(path, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = loads(line)
+                yield parse_time(record['timestamp']), record['data']
+
+
+def paced(records, speed=1.0, max_gap=1.0):
+    """
+    Yield (scheduled perf_counter time, payload), sleeping so records go out
+    with their recorded spacing divided by `speed`; speed <= 0 never sleeps
+    """
+    clock = time.perf_counter
+    scheduled = None
+    previous = None
+    for stamp, data in records:
+        if speed <= 0:
+            yield clock(), data
+            continue
+        if scheduled is None:
+            scheduled = clock()
+        else:
+            gap = min(max(stamp - previous, 0.0), max_gap)
+            scheduled += gap / speed
+        previous = stamp
+        delay = scheduled - clock()
+        if delay > 0:
+            time.sleep(delay)
+        yield scheduled, data
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class ReplayStats:
+    """Message count and per-message latency (seconds) for the whole replay"""
+
+    def __init__(self):
+        self.latencies = array('d')
+        self.errors = 0
+        self.start = time.perf_counter()
+
+    def record(self, scheduled, done):
+        self.latencies.append(done - scheduled)
+
+    def report(self):
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        count = len(self.latencies)
+        ordered = sorted(self.latencies)
+        ms = [percentile(ordered, q) * 1000.0 for q in (0.5, 0.9, 0.99, 1.0)]
+        return (f"{count} messages in {elapsed:.2f}s ({count / elapsed:.0f} msg/s), "
+                f"{self.errors} errors, latency p50 {ms[0]:.3f} ms, p90 {ms[1]:.3f} ms, "
+                f"p99 {ms[2]:.3f} ms, max {ms[3]:.3f} ms")
+
+
+def make_target(name, json_module, stats):
+    """
+    Return (handler(payload, scheduled), cleanup(), timed) for a replay target,
+    `timed` being True when the target records publish latencies itself
+    """
+    if name == 'none':
+        return (lambda data, scheduled: None), (lambda: None), False
+
+    # ROS is only needed for the node targets
+    import rclpy
+    from rclpy.executors import SingleThreadedExecutor
+    from rclpy.parameter import Parameter
+
+    rclpy.init()
+    from .listen import PhoneSensorBridge
+    node = PhoneSensorBridge(connect=False, parameter_overrides=[
+        Parameter('json_backend', value=json_module.backend)])
+    publish_item = node.publish_item
+
+    def published(item):
+        # item[3] is the packet's receive time, pinned to its schedule below
+        publish_item(item)
+        stats.record(item[3], time.perf_counter())
+
+    node.publish_item = published
+    if node.ingest is not None:
+        node.start_publish_thread()
+
+    # What WebSocketTransport.on_message does with a text frame
+    reencode = name == 'ws'
+    dumps = json_module.dumps
+    loads = JsonModule(json_module.backend, observer=node.stats.on_decode,
+                       on_error=lambda: node.stats.decode_failed('websocket')).loads
+
+    def handler(data, scheduled):
+        if reencode:
+            data = loads(dumps(data))
+        node.stats.local.received = node.stats.local.decoded = scheduled
+        node.receive_sensor_data(data)
+
+    # Timers (diagnostics, rate summaries) keep running during the replay
+    executor = SingleThreadedExecutor()
+    executor.add_node(node)
+    threading.Thread(target=executor.spin, name='rclpy-executor', daemon=True).start()
+
+    def cleanup():
+        executor.shutdown()
+        node.destroy_node()
+        rclpy.try_shutdown()
+
+    return handler, cleanup, True
+
+
+def replay(records, handler, stats, report_interval=5.0, timed=False):
+    clock = time.perf_counter
+    next_report = clock() + report_interval
+    for scheduled, data in records:
+        try:
+            handler(data, scheduled)
+        except Exception as e:
+            stats.errors += 1
+            print(f"handler error: {e}", file=sys.stderr)
+        now = clock()
+        if not timed:
+            stats.record(scheduled, now)
+        if report_interval > 0 and now >= next_report:
+            print(stats.report())
+            next_report = now + report_interval
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('logs', nargs='*', default=DEFAULT_LOGS)
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='playback speed multiplier, 0 for as fast as possible')
+    parser.add_argument('--max-gap', type=float, default=1.0,
+                        help='longest recorded gap (seconds) honoured before speed scaling')
+    parser.add_argument('--target', choices=TARGETS, default='bridge')
+    parser.add_argument('--json-backend', default='auto')
+    parser.add_argument('--report-interval', type=float, default=5.0)
+    args = parser.parse_args()
+
+    json_module = JsonModule(args.json_backend)
+    stats = ReplayStats()
+    handler, cleanup, timed = make_target(args.target, json_module, stats)
+    try:
+        replay(paced(iter_records(args.logs, json_module.loads), args.speed, args.max_gap),
+               handler, stats, args.report_interval, timed)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cleanup()
+    print(stats.report())
+
+
+if __name__ == '__main__':
+    main()
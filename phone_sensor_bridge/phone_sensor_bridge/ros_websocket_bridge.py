@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Raw WebSocket bridge, kept for existing launch files and commands.
+
+It runs listen.py's PhoneSensorBridge with `transport:=websocket` (see
+transports.py) and the topics this script always published: phone/imu,
+phone/gps, phone/battery, phone/raw_data and the orientation as the
+map -> phone transform.
+The node keeps its old name, so parameter files written for it still
+apply. Any -p given on the command line overrides these defaults.
+
+    python3 ros_websocket_bridge.py --ros-args -p websocket_url:=ws://192.168.1.11:3000
+"""
+
+import sys
+
+from . import listen
+
+DEFAULT_ARGUMENTS = [
+    '--ros-args',
+    '-r', '__node:=websocket_to_ros_bridge',
+    '-p', 'transport:=websocket',
+    '-p', 'websocket_url:=ws://192.168.1.11:3000',
+    '-p', 'base_frame:=phone',
+    '-p', "converters:=['imu', 'gps', 'battery', 'raw', 'orientation_tf']",
+]
+
+
+def main(args=None):
+    args = sys.argv if args is None else args
+    # Later -p assignments win, so the user's own arguments go last
+    listen.main(args[:1] + DEFAULT_ARGUMENTS + args[1:])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Columnar storage for sensor_logs/*.jsonl.
+
+Each log is converted into a directory holding one raw little-endian array
+file per numeric field (t_ns.i8, accel_x.f8, ...) plus meta.json. Columns
+are opened as read-only np.memmap, so loading costs nothing until a range is
+touched, and time-range queries are two binary searches on t_ns. Missing
+values are NaN (-1 for integer columns).
+
+Conversion is incremental: meta.json remembers how many bytes of the log
+have been converted, and later runs only parse and append the new lines.
+
+    python3 sensor_store.py convert                      # every log, new lines only
+    python3 sensor_store.py query sensor_logs/columnar/sensors_2025-06-15 \\
+        --start 2025-06-15T05:51:00Z --end 2025-06-15T06:00:00Z --columns accel_x accel_z
+    python3 sensor_store.py export sensor_logs/columnar/sensors_2025-06-15 out.npz
+
+    >>> store = SensorStore(convert_log(DEFAULT_LOGS[0], tempfile.mkdtemp()))
+    >>> store.sorted, len(store) == sum(1 for _ in open(DEFAULT_LOGS[0]))
+    (True, True)
+"""
+
+import argparse
+import glob
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from .clock_sync import parse_time
+from .decoders import make_decoder
+
+# server.js logs into sensor_logs/ beside the package in a checkout
+LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sensor_logs')
+DEFAULT_LOGS = sorted(glob.glob(os.path.join(LOG_DIR, '*.jsonl')))
+DEFAULT_OUTPUT = os.path.join(LOG_DIR, 'columnar')
+META_FILE = 'meta.json'
+FORMAT_VERSION = 1
+
+# (column, path into the payload, dtype); 't_ns' is the record timestamp
+COLUMNS = (
+    ('t_ns', None, 'i8'),
+    ('accel_x', ('accelerometer', 'x'), 'f8'),
+    ('accel_y', ('accelerometer', 'y'), 'f8'),
+    ('accel_z', ('accelerometer', 'z'), 'f8'),
+    ('gyro_x', ('gyroscope', 'x'), 'f8'),
+    ('gyro_y', ('gyroscope', 'y'), 'f8'),
+    ('gyro_z', ('gyroscope', 'z'), 'f8'),
+    ('orientation_alpha', ('orientation', 'alpha'), 'f8'),
+    ('orientation_beta', ('orientation', 'beta'), 'f8'),
+    ('orientation_gamma', ('orientation', 'gamma'), 'f8'),
+    ('gps_latitude', ('gps', 'latitude'), 'f8'),
+    ('gps_longitude', ('gps', 'longitude'), 'f8'),
+    ('gps_altitude', ('gps', 'altitude'), 'f8'),
+    ('gps_accuracy', ('gps', 'accuracy'), 'f8'),
+    ('gps_speed', ('gps', 'speed'), 'f8'),
+    ('gps_heading', ('gps', 'heading'), 'f8'),
+    ('battery_level', ('battery', 'level'), 'f8'),
+    ('battery_charging', ('battery', 'charging'), 'f8'),
+    ('server_latency', ('serverLatency',), 'f8'),
+    ('connection_id', ('connectionId',), 'i8'),
+)
+MISSING = {'f8': float('nan'), 'i8': -1}
+
+# Rows parsed before each append to the column files
+CHUNK_ROWS = 65536
+
+
+def to_ns(value):
+    """Nanoseconds since the epoch from an int, a datetime or an ISO 8601 string"""
+    if value is None or isinstance(value, (int, np.integer)):
+        return value
+    seconds = parse_time(value) if isinstance(value, str) else value.timestamp()
+    return int(round(seconds * 1e9))
+
+
+def column_path(directory, name, dtype):
+    return os.path.join(directory, f'{name}.{dtype}')
+
+
+def extract(data, path, missing):
+    value = data
+    for key in path:
+        if not isinstance(value, dict):
+            return missing
+        value = value.get(key)
+    if value is None or isinstance(value, str):
+        return missing
+    return value
+
+
+def parse_rows(lines, loads):
+    """Column lists for a batch of JSONL lines"""
+    columns = {name: [] for name, _path, _dtype in COLUMNS}
+    for line in lines:
+        record = loads(line)
+        data = record.get('data') or {}
+        columns['t_ns'].append(to_ns(record['timestamp']))
+        for name, path, dtype in COLUMNS[1:]:
+            columns[name].append(extract(data, path, MISSING[dtype]))
+    return columns
+
+
+def read_meta(directory):
+    try:
+        with open(os.path.join(directory, META_FILE)) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get('version') == FORMAT_VERSION else None
+
+
+def write_meta(directory, meta):
+    path = os.path.join(directory, META_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def convert_log(log_path, output_dir=DEFAULT_OUTPUT, rebuild=False):
+    """
+    Convert (or bring up to date) the columns of one log. Returns the
+    column directory. Only complete lines are converted; a line still being
+    written is picked up by the next run.
+    """
+    directory = os.path.join(output_dir, os.path.splitext(os.path.basename(log_path))[0])
+    os.makedirs(directory, exist_ok=True)
+    meta = None if rebuild else read_meta(directory)
+    size = os.path.getsize(log_path)
+    if meta is None or meta['offset'] > size:
+        # New, rebuilt or truncated/rotated log: start over
+        meta = {'version': FORMAT_VERSION, 'source': os.path.abspath(log_path),
+                'offset': 0, 'rows': 0, 'sorted': True, 'last_t_ns': None,
+                'columns': {name: dtype for name, _path, dtype in COLUMNS}}
+
+    # Drop rows written after the last meta.json update (interrupted run)
+    for name, dtype in meta['columns'].items():
+        path = column_path(directory, name, dtype)
+        with open(path, 'ab') as f:
+            f.truncate(meta['rows'] * np.dtype(dtype).itemsize)
+
+    loads = make_decoder()
+    files = {name: open(column_path(directory, name, dtype), 'ab')
+             for name, dtype in meta['columns'].items()}
+    try:
+        with open(log_path, 'rb') as log:
+            log.seek(meta['offset'])
+            while True:
+                lines = []
+                consumed = 0
+                for line in log:
+                    if not line.endswith(b'\n'):
+                        break
+                    consumed += len(line)
+                    if line.strip():
+                        lines.append(line)
+                    if len(lines) >= CHUNK_ROWS:
+                        break
+                if not consumed:
+                    break
+                if lines:
+                    columns = parse_rows(lines, loads)
+                    stamps = np.asarray(columns['t_ns'], dtype='i8')
+                    previous = meta['last_t_ns']
+                    if (previous is not None and stamps[0] < previous) or np.any(np.diff(stamps) < 0):
+                        meta['sorted'] = False
+                    for name, dtype in meta['columns'].items():
+                        np.asarray(columns[name], dtype=dtype).tofile(files[name])
+                    meta['rows'] += len(lines)
+                    meta['last_t_ns'] = int(stamps[-1])
+                meta['offset'] += consumed
+                for f in files.values():
+                    f.flush()
+                write_meta(directory, meta)
+    finally:
+        for f in files.values():
+            f.close()
+    write_meta(directory, meta)
+    return directory
+
+
+class SensorStore:
+    """Read-only, memory-mapped view of one converted log"""
+
+    def __init__(self, directory):
+        meta = read_meta(directory)
+        if meta is None:
+            raise FileNotFoundError(f"No converted sensor log in {directory}")
+        self.directory = directory
+        self.meta = meta
+        self.sorted = meta['sorted']
+        self.columns = list(meta['columns'])
+        self._arrays = {}
+
+    def __len__(self):
+        return self.meta['rows']
+
+    def __getitem__(self, name):
+        array = self._arrays.get(name)
+        if array is None:
+            dtype = self.meta['columns'][name]
+            if len(self):
+                array = np.memmap(column_path(self.directory, name, dtype), dtype=dtype,
+                                  mode='r', shape=(len(self),))
+            else:
+                array = np.empty(0, dtype=dtype)
+            self._arrays[name] = array
+        return array
+
+    def time_slice(self, start=None, end=None):
+        """Row slice for start <= t < end (either bound may be None) by binary search"""
+        if not self.sorted:
+            raise ValueError(f"{self.directory} is not in time order; use time_mask()")
+        t = self['t_ns']
+        first = 0 if start is None else int(np.searchsorted(t, to_ns(start), 'left'))
+        last = len(t) if end is None else int(np.searchsorted(t, to_ns(end), 'left'))
+        return slice(first, max(first, last))
+
+    def time_mask(self, start=None, end=None):
+        """Boolean row mask for start <= t < end; O(n), works on unsorted logs"""
+        t = self['t_ns']
+        mask = np.ones(len(t), dtype=bool)
+        if start is not None:
+            mask &= t >= to_ns(start)
+        if end is not None:
+            mask &= t < to_ns(end)
+        return mask
+
+    def range(self, start=None, end=None, columns=None):
+        """{column: array} for a time range; views into the memmaps when sorted"""
+        rows = self.time_slice(start, end) if self.sorted else self.time_mask(start, end)
+        return {name: self[name][rows] for name in (columns or self.columns)}
+
+
+def export(store, path, start=None, end=None, columns=None):
+    """Write a time range to .npz, or to .parquet when pyarrow is installed"""
+    data = store.range(start, end, columns)
+    if path.endswith('.parquet'):
+        import pyarrow
+        import pyarrow.parquet
+        pyarrow.parquet.write_table(
+            pyarrow.table({name: np.asarray(values) for name, values in data.items()}), path)
+    else:
+        np.savez_compressed(path, **data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    convert = commands.add_parser('convert', help='convert logs, appending only new lines')
+    convert.add_argument('logs', nargs='*', default=DEFAULT_LOGS)
+    convert.add_argument('--output', default=DEFAULT_OUTPUT)
+    convert.add_argument('--rebuild', action='store_true', help='reconvert from scratch')
+
+    for name, help_text in (('query', 'summarize a time range'),
+                            ('export', 'write a time range to .npz or .parquet')):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument('store')
+        if name == 'export':
+            command.add_argument('path')
+        command.add_argument('--start', help='ISO 8601 time or nanoseconds')
+        command.add_argument('--end', help='ISO 8601 time or nanoseconds (exclusive)')
+        command.add_argument('--columns', nargs='+')
+
+    args = parser.parse_args()
+
+    if args.command == 'convert':
+        for log in args.logs:
+            before = read_meta(os.path.join(args.output, os.path.splitext(os.path.basename(log))[0]))
+            directory = convert_log(log, args.output, args.rebuild)
+            meta = read_meta(directory)
+            added = meta['rows'] - (before['rows'] if before and not args.rebuild else 0)
+            log_size = os.path.getsize(log)
+            column_size = sum(os.path.getsize(column_path(directory, name, dtype))
+                              for name, dtype in meta['columns'].items())
+            print(f"{directory}: {meta['rows']} rows (+{added}), "
+                  f"{log_size / 1e6:.2f} MB JSONL -> {column_size / 1e6:.2f} MB columns")
+        return
+
+    bounds = [int(v) if v and v.isdigit() else v for v in (args.start, args.end)]
+    store = SensorStore(args.store)
+    if args.command == 'export':
+        export(store, args.path, *bounds, args.columns)
+        return
+
+    data = store.range(*bounds, args.columns)
+    t = data.get('t_ns', store.range(*bounds, ['t_ns'])['t_ns'])
+    print(f"{len(t)} of {len(store)} rows")
+    for name, values in data.items():
+        if name == 't_ns' or not len(values):
+            continue
+        values = np.asarray(values, dtype='f8')
+        valid = values[~np.isnan(values)]
+        if len(valid):
+            print(f"{name:20s} n={len(valid):6d} min={valid.min():12.6g} "
+                  f"mean={valid.mean():12.6g} max={valid.max():12.6g}")
+        else:
+            print(f"{name:20s} n=     0")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Ingestion front ends feeding a PhoneSensorBridge (its `transport` parameter).
+
+- socketio: server.js Socket.IO events (sensorData, sensorBatch,
+  cameraFrame/cameraFrameBinary, pong for clock sync and heartbeats)
+- websocket: raw WebSocket text frames carrying sensor payloads, published
+  with the same converters and conventions as every other transport
+  (ros_websocket_bridge.py is listen.py with this transport)
+- replay: recorded sensor_logs paced at their recorded rate (replay.py)
+
+A transport calls the bridge's receive_sensor_data, receive_sensor_batch,
+receive_camera_frame and receive_pong and keeps `bridge.connected` current.
+Client libraries are imported when a transport is created, so a bridge only
+loads the one it uses. More transports register with
+@TRANSPORTS.register(name) or through the 'phone_sensor_bridge.transports'
+entry point group (see plugins.py).
+"""
+
+import ssl
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+from .connection import ConnectionManager
+from .decoders import DECODE_ERRORS, JsonModule, make_msgpack_decoder
+from .field_stream import DeltaState, subscription
+from .plugins import Registry
+
+TRANSPORTS = Registry('phone_sensor_bridge.transports', 'transport')
+
+
+def with_scheme(url, scheme, path=None):
+    """`url` with its scheme (and optionally its path) replaced"""
+    parts = urllib.parse.urlsplit(url)
+    return urllib.parse.urlunsplit((scheme, parts.netloc, parts.path if path is None else path,
+                                    parts.query if path is None else '', ''))
+
+
+class Transport:
+    """Base class; `connection` is the ConnectionManager, if the transport has one"""
+
+    name = None
+
+    def __init__(self, bridge):
+        self.bridge = bridge
+        self.logger = bridge.get_logger()
+        self.connection = None
+
+    def describe(self):
+        return self.name
+
+    def connection_manager(self, transports, connect, is_connected, disconnect, on_connected=None):
+        """ConnectionManager configured from the bridge's reconnect parameters"""
+        bridge = self.bridge
+        return ConnectionManager(
+            bridge.websocket_url, transports, connect, is_connected, disconnect, self.logger,
+            max_attempts=bridge.get_parameter('reconnect_attempts').value,
+            max_delay=bridge.get_parameter('reconnect_max_delay').value,
+            heartbeat_timeout=bridge.get_parameter('heartbeat_timeout').value,
+            on_connected=on_connected)
+
+    def start(self):
+        return self
+
+    def stop(self):
+        if self.connection is not None:
+            self.connection.stop()
+
+
+@TRANSPORTS.register('socketio')
+class SocketIOTransport(Transport):
+    """
+    python-socketio client. Its own reconnection is off; the
+    ConnectionManager redials, heartbeats on the clock pongs and tries the
+    transport that worked last first. server.js sends latestSensorData to
+    every new connection, which resyncs the topics after an outage.
+
+    With field_subscription on, the client subscribes on every connect to
+    the fields its converters read and receives sensorDelta events
+    (field_stream.py) in `stream_encoding`; servers without subscriptions
+    keep sending sensorData.
+    """
+
+    def __init__(self, bridge):
+        super().__init__(bridge)
+        import socketio
+        # Initialize Socket.IO client[19]
+        self.json_module = JsonModule(bridge.get_parameter('json_backend').value,
+                                      observer=bridge.stats.on_decode,
+                                      on_error=lambda: bridge.stats.decode_failed('socketio'))
+        self.sio = socketio.Client(ssl_verify=False, logger=False, engineio_logger=False,
+                                   json=self.json_module, reconnection=False)
+        self.delta_state = None
+        if bridge.get_parameter('field_subscription').value:
+            self.delta_state = DeltaState()
+            self.unpack = make_msgpack_decoder()
+            self.stream_encoding = bridge.get_parameter('stream_encoding').value
+            self.resync_timeout = bridge.get_parameter('resync_timeout').value
+            if self.stream_encoding == 'msgpack' and self.unpack is None:
+                self.logger.warn("No MessagePack decoder (msgspec or msgpack), subscribing to JSON deltas")
+                self.stream_encoding = 'json'
+        self.setup_handlers()
+        self.clock_ping_timer = bridge.create_timer(
+            bridge.get_parameter('clock_ping_period').value, self.send_clock_ping)
+        self.connection = self.connection_manager(
+            ['websocket', 'polling'],
+            connect=lambda transport: self.sio.connect(bridge.websocket_url, transports=[transport],
+                                                       wait_timeout=10),
+            is_connected=lambda: self.sio.connected,
+            disconnect=self.sio.disconnect)
+
+    def describe(self):
+        if self.delta_state is not None:
+            return f"Socket.IO, {self.stream_encoding} field deltas, {self.json_module.backend} JSON"
+        return f"Socket.IO, {self.json_module.backend} JSON"
+
+    def subscribe(self):
+        """Ask for deltas of the fields the bridge's converters read; answered with snapshots"""
+        bridge = self.bridge
+        fields = subscription(bridge.sensors.converters,
+                              {'battery': bridge.get_parameter('battery_max_rate').value})
+        self.delta_state.reset()
+        self.sio.emit('subscribe', {'fields': fields, 'encoding': self.stream_encoding})
+
+    def setup_handlers(self):
+        """Setup Socket.IO event handlers for sensor data reception"""
+        bridge = self.bridge
+        sio = self.sio
+
+        @sio.event
+        def connect():
+            bridge.connected = True
+            self.logger.info("Connected to Socket.IO server")
+            # Ask for raw JPEG attachments instead of base64 data URLs
+            sio.emit('cameraBinary', bridge.camera_source == 'binary')
+            if self.delta_state is not None:
+                self.subscribe()
+
+        @sio.event
+        def connect_error(data):
+            self.logger.error(f"Connection failed: {data}")
+            bridge.connected = False
+
+        @sio.event
+        def disconnect():
+            bridge.connected = False
+            self.logger.warn("Disconnected from Socket.IO server")
+            self.connection.lost()
+
+        @sio.on('sensorData')
+        def on_sensor_data(data):
+            """Handle incoming sensor data and publish to ROS topics"""
+            self.connection.heard()
+            try:
+                bridge.receive_sensor_data(data)
+            except Exception as e:
+                self.logger.error(f"Error processing sensor data: {e}")
+
+        @sio.on('subscribed')
+        def on_subscribed(data):
+            self.logger.info(f"Subscribed to {', '.join(data.get('fields', ()))} "
+                             f"({data.get('encoding')} deltas)")
+
+        @sio.on('sensorDelta')
+        def on_sensor_delta(payload):
+            """Changed fields of one phone's sensorData"""
+            self.connection.heard()
+            try:
+                self.receive_delta(payload)
+            except Exception as e:
+                self.logger.error(f"Error processing sensor delta: {e}")
+
+        @sio.on('sensorBatch')
+        def on_sensor_batch(data):
+            """Handle a burst of batched DeviceMotion samples"""
+            self.connection.heard()
+            try:
+                bridge.receive_sensor_batch(data)
+            except Exception as e:
+                self.logger.error(f"Error processing sensor batch: {e}")
+
+        @sio.on('cameraFrame')
+        def on_camera_frame(data):
+            """Handle camera frame data"""
+            self.connection.heard()
+            try:
+                bridge.receive_camera_frame(data)
+            except Exception as e:
+                self.logger.error(f"Error processing camera data: {e}")
+
+        # Same payload as cameraFrame with 'data' delivered as bytes
+        sio.on('cameraFrameBinary', on_camera_frame)
+
+        @sio.on('pong')
+        def on_pong(data):
+            """Server clock sample answering send_clock_ping; doubles as the heartbeat"""
+            self.connection.heard()
+            try:
+                bridge.receive_pong(float(data['clientTimestamp']), float(data['serverTimestamp']))
+            except (KeyError, TypeError, ValueError) as e:
+                self.logger.warn(f"Ignoring malformed pong: {e}")
+
+    def receive_delta(self, payload):
+        if isinstance(payload, bytes):
+            # Binary attachments bypass the JSON decoder's timing and byte count
+            stats = self.bridge.stats
+            start = time.perf_counter()
+            size = len(payload)
+            try:
+                payload = self.unpack(payload)
+            except Exception:
+                stats.decode_failed('sensorDelta')
+                raise
+            stats.record('sensorDelta', 'decode', time.perf_counter() - start)
+            stats.add_bytes('sensorDelta', size)
+        state = self.delta_state
+        phone_id = payload.get('id')
+        resync_pending = state.resync_pending(phone_id)
+        applied = state.apply(payload)
+        if applied is None:
+            # One resync per gap; the phone's deltas until its snapshot arrives are dropped
+            if not self.sio.connected:
+                return
+            if not resync_pending:
+                self.logger.warn(f"Sensor delta of phone {phone_id} out of sequence, resyncing it")
+                self.sio.emit('resync', {'id': phone_id})
+            elif state.resync_age(phone_id) > self.resync_timeout:
+                # No snapshot (a server without 'resync'): start every phone over
+                self.logger.warn(f"No snapshot of phone {phone_id} within {self.resync_timeout:.0f} s, "
+                                 "subscribing again")
+                self.subscribe()
+            return
+        self.bridge.receive_sensor_delta(*applied)
+
+    def send_clock_ping(self):
+        """Ask server.js for its clock; answered by a 'pong' event"""
+        if self.sio.connected:
+            self.sio.emit('ping', self.bridge.get_clock().now().nanoseconds / 1e6)
+
+    def start(self):
+        self.connection.start()
+        return self
+
+    def stop(self):
+        super().stop()
+        if self.sio.connected:
+            self.sio.disconnect()
+
+
+@TRANSPORTS.register('websocket')
+class WebSocketTransport(Transport):
+    """
+    websocket-client connection; ws:// and wss:// are tried in turn (the
+    scheme matching websocket_url first). WebSocket pings every third of
+    heartbeat_timeout keep an idle connection heard. The raw endpoint sends
+    no state on connect, so latestSensorData is fetched from /api/latest-data
+    after every (re)connect.
+    """
+
+    def __init__(self, bridge):
+        super().__init__(bridge)
+        import websocket
+        self.websocket = websocket
+        self.json_module = JsonModule(bridge.get_parameter('json_backend').value,
+                                      observer=bridge.stats.on_decode,
+                                      on_error=lambda: bridge.stats.decode_failed('websocket'))
+        self.heartbeat_timeout = bridge.get_parameter('heartbeat_timeout').value
+        self.ws = None
+        self.opened = threading.Event()
+        scheme = urllib.parse.urlsplit(bridge.websocket_url).scheme
+        preferred = 'wss' if scheme in ('https', 'wss') else 'ws'
+        self.connection = self.connection_manager(
+            [preferred, 'ws' if preferred == 'wss' else 'wss'],
+            connect=self.open,
+            is_connected=lambda: bridge.connected,
+            disconnect=lambda: self.ws.close(),
+            on_connected=self.resync)
+
+    def describe(self):
+        return f"WebSocket, {self.json_module.backend} JSON"
+
+    def open(self, scheme, timeout=10.0):
+        """Open the socket with `scheme` and return once it is open; raises otherwise"""
+        url = with_scheme(self.bridge.websocket_url, scheme)
+        self.opened.clear()
+        self.ws = self.websocket.WebSocketApp(url, on_open=self.on_open, on_message=self.on_message,
+                                              on_error=self.on_error, on_close=self.on_close,
+                                              on_pong=lambda ws, message: self.connection.heard())
+        ping_interval = max(1.0, self.heartbeat_timeout / 3.0) if self.heartbeat_timeout else 0
+        thread = threading.Thread(target=self.ws.run_forever, daemon=True, kwargs={
+            'sslopt': {'cert_reqs': ssl.CERT_NONE},
+            'ping_interval': ping_interval,
+            'ping_timeout': ping_interval * 0.8 if ping_interval else None,
+        })
+        thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.opened.wait(0.1):
+            if not thread.is_alive() or time.monotonic() > deadline:
+                self.ws.close()
+                raise ConnectionError(f"Could not open {url}")
+
+    def on_open(self, ws):
+        self.logger.info("WebSocket connection established")
+        self.bridge.connected = True
+        self.opened.set()
+
+    def on_message(self, ws, message):
+        self.connection.heard()
+        try:
+            data = self.json_module.loads(message)
+        except DECODE_ERRORS:
+            # Counted by the decoder and reported with the diagnostics
+            return
+        try:
+            self.receive(data)
+        except Exception as e:
+            self.logger.error(f"Error processing WebSocket message: {e}")
+
+    def receive(self, data):
+        kind = data.get('type')
+        if kind == 'welcome':
+            return
+        if kind == 'cameraFrame':
+            self.bridge.receive_camera_frame(data)
+        else:
+            self.bridge.receive_sensor_data(data)
+
+    def on_error(self, ws, error):
+        self.logger.error(f"WebSocket error: {error}")
+
+    def on_close(self, ws, close_status_code, close_msg):
+        self.logger.info(f"WebSocket connection closed: {close_status_code} - {close_msg}")
+        if ws is self.ws:
+            self.bridge.connected = False
+            self.connection.lost()
+
+    def resync(self, scheme):
+        url = with_scheme(self.bridge.websocket_url, 'https' if scheme == 'wss' else 'http', '/api/latest-data')
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+        with urllib.request.urlopen(url, timeout=5.0, context=context) as response:
+            data = self.json_module.loads(response.read())
+        if data:
+            self.receive(data)
+
+    def start(self):
+        self.connection.start()
+        return self
+
+    def stop(self):
+        super().stop()
+        if self.ws is not None:
+            self.ws.close()
+
+
+@TRANSPORTS.register('replay')
+class ReplayTransport(Transport):
+    """
+    Recorded sensor_logs (replay_logs, every log by default) at
+    replay_speed times their recorded rate (0: as fast as possible),
+    optionally looping
+    """
+
+    def __init__(self, bridge):
+        super().__init__(bridge)
+        from .replay import DEFAULT_LOGS
+        bridge.declare_parameter('replay_logs', [''])
+        bridge.declare_parameter('replay_speed', 1.0)
+        bridge.declare_parameter('replay_loop', False)
+        self.logs = [path for path in bridge.get_parameter('replay_logs').value if path] or DEFAULT_LOGS
+        self.speed = bridge.get_parameter('replay_speed').value
+        self.loop = bridge.get_parameter('replay_loop').value
+        self.json_module = JsonModule(bridge.get_parameter('json_backend').value)
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def describe(self):
+        return f"replay of {len(self.logs)} logs at {self.speed}x"
+
+    def run(self):
+        from .replay import iter_records, paced
+        bridge = self.bridge
+        bridge.connected = True
+        while not self.stopping.is_set():
+            for _scheduled, data in paced(iter_records(self.logs, self.json_module.loads), self.speed):
+                if self.stopping.is_set():
+                    break
+                try:
+                    bridge.receive_sensor_data(data)
+                except Exception as e:
+                    self.logger.error(f"Error replaying sensor data: {e}")
+            if not self.loop:
+                break
+        bridge.connected = False
+        self.logger.info("Replay finished")
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name='replay', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopping.set()
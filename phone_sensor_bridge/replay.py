@@ -0,0 +1,7 @@
+#!/usr/bin/env python3
+"""`python3 replay.py` from a checkout; the code is in phone_sensor_bridge/replay.py"""
+
+from phone_sensor_bridge.replay import main
+
+if __name__ == '__main__':
+    main()
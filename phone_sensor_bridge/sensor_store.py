@@ -0,0 +1,7 @@
+#!/usr/bin/env python3
+"""`python3 sensor_store.py` from a checkout; the code is in phone_sensor_bridge/sensor_store.py"""
+
+from phone_sensor_bridge.sensor_store import main
+
+if __name__ == '__main__':
+    main()
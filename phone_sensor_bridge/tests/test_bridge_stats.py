@@ -0,0 +1,65 @@
+"""Histogram accounting of bridge_stats.py"""
+
+import threading
+
+import pytest
+
+from phone_sensor_bridge.bridge_stats import BridgeStats, TimedPublisher
+from phone_sensor_bridge.decoders import BACKENDS, JsonModule, available_backends
+
+
+class NullPublisher:
+    def publish(self, msg):
+        pass
+
+
+def test_concurrent_recording_loses_no_samples():
+    stats = BridgeStats()
+    publisher = TimedPublisher(NullPublisher(), stats, 'camera')
+    threads, per_thread = 8, 5000
+    reports = []
+    done = threading.Event()
+
+    def record():
+        for _ in range(per_thread):
+            stats.record('camera', 'convert', 2e-5)
+            publisher.publish(None)
+
+    def report():
+        while not done.is_set():
+            reports.append(stats.report())
+
+    reporter = threading.Thread(target=report)
+    reporter.start()
+    workers = [threading.Thread(target=record) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    done.set()
+    reporter.join()
+    reports.append(stats.report())
+
+    def total(key):
+        return sum(report['topics'].get('camera', {}).get('stages', {}).get(key, {}).get('count', 0)
+                   for report in reports)
+
+    assert total('convert') == threads * per_thread
+    assert total('publish') == threads * per_thread
+    assert sum(report['topics'].get('camera', {}).get('messages', 0) for report in reports) == threads * per_thread
+
+
+@pytest.mark.parametrize('backend', [backend for backend in BACKENDS if backend in available_backends()])
+def test_decode_failures_are_counted_per_source_and_reset_by_report(backend):
+    stats = BridgeStats()
+    loads = JsonModule(backend, observer=stats.on_decode,
+                       on_error=lambda: stats.decode_failed('websocket')).loads
+    for text in ('{"accelerometer": {"x": 1}}', '{"accelerometer": ', 'not json'):
+        try:
+            loads(text)
+        except ValueError:
+            pass
+    report = stats.report()
+    assert report['decode_failures'] == {'websocket': 2}
+    assert report['topics']['other']['messages'] == 1
+    assert stats.report()['decode_failures'] == {}
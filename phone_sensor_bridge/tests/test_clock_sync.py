@@ -0,0 +1,79 @@
+"""Header stamping and timestamp parsing of clock_sync.py"""
+
+import threading
+
+from phone_sensor_bridge.clock_sync import ClockSync, parse_time
+
+
+def packet(phone, server):
+    return {'phoneTimestamp': phone * 1000.0, 'timestamp': server * 1000.0, 'serverLatency': 40}
+
+
+def test_parse_time_iso_and_epoch_milliseconds():
+    assert parse_time('2025-06-15T05:51:04.859Z') == 1749966664.859
+    assert parse_time('2025-06-15T05:51:04.859+00:00') == 1749966664.859
+    assert parse_time(1749966664859) == 1749966664.859
+
+
+def test_stamp_maps_phone_time_onto_host_clock():
+    sync = ClockSync(bucket=1.0)
+    # Phone clock 2.5 s behind the server, 20 ms phone -> server delay, server = host
+    for i in range(100):
+        phone = 1000.0 + 0.1 * i
+        stamp_ns = sync.stamp(packet(phone, phone + 2.52), int((phone + 2.53) * 1e9))
+    assert sync.ready
+    assert abs(stamp_ns / 1e9 - (phone + 2.5)) < 1e-3
+
+
+def test_stamp_never_after_arrival():
+    sync = ClockSync(bucket=1.0)
+    for i in range(10):
+        phone = 1000.0 + i
+        sync.stamp(packet(phone, phone + 2.52), int((phone + 2.53) * 1e9))
+    # A packet arriving earlier than the estimate allows is stamped with its arrival
+    arrival_ns = int(1011.0 * 1e9)
+    assert sync.stamp(packet(1010.0, 1012.52), arrival_ns) == arrival_ns
+    assert sync.clamped == 1
+
+
+def test_stamp_by_arrival_still_tracks_the_clock():
+    sync = ClockSync(bucket=1.0, timestamp_source='arrival')
+    for i in range(10):
+        phone = 1000.0 + i
+        arrival_ns = int((phone + 2.53) * 1e9)
+        assert sync.stamp(packet(phone, phone + 2.52), arrival_ns) == arrival_ns
+    assert sync.ready
+
+
+def test_stamp_without_clock_fields_uses_arrival():
+    sync = ClockSync()
+    assert sync.stamp({'gps': {}}, 123) == 123
+    assert sync.stamp({'timestamp': 'not a time'}, 456) == 456
+    assert not sync.ready
+
+
+def test_stats_while_stamping_from_another_thread():
+    sync = ClockSync()
+    done = threading.Event()
+    errors = []
+
+    def stamp():
+        try:
+            for i in range(20000):
+                phone = 1000.0 + 0.001 * i
+                sync.stamp(packet(phone, phone + 2.52 + 0.01 * (i % 3)), int((phone + 2.6) * 1e9))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    stamper = threading.Thread(target=stamp)
+    stamper.start()
+    try:
+        while not done.is_set():
+            sync.stats()
+    except Exception as e:
+        errors.append(e)
+    stamper.join()
+    assert not errors
+    assert sync.stats()['phone_jitter_std'] > 0.0
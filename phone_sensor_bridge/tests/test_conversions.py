@@ -0,0 +1,108 @@
+"""Scalar and batched conversions of conversions.py"""
+
+import math
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from phone_sensor_bridge.conversions import (  # noqa: E402
+    DEG_TO_RAD, GRAVITY, convert_imu_batch, euler_to_quaternion, euler_to_quaternion_batch,
+    orientation_angles, vector,
+)
+
+
+def rotation_matrix(q):
+    x, y, z, w = q
+    return np.array([
+        [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+        [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)],
+    ])
+
+
+def reference_matrix(alpha, beta, gamma):
+    """W3C DeviceOrientation: Rz(alpha) · Rx(beta) · Ry(gamma)"""
+    a, b, g = (angle * DEG_TO_RAD for angle in (alpha, beta, gamma))
+    rz = np.array([[math.cos(a), -math.sin(a), 0], [math.sin(a), math.cos(a), 0], [0, 0, 1]])
+    rx = np.array([[1, 0, 0], [0, math.cos(b), -math.sin(b)], [0, math.sin(b), math.cos(b)]])
+    ry = np.array([[math.cos(g), 0, math.sin(g)], [0, 1, 0], [-math.sin(g), 0, math.cos(g)]])
+    return rz @ rx @ ry
+
+
+def random_angles(rng, count):
+    return [(rng.uniform(0.0, 360.0), rng.uniform(-180.0, 180.0), rng.uniform(-90.0, 90.0))
+            for _ in range(count)]
+
+
+def random_sample(rng, orientation=True):
+    sample = {
+        'accelerometer': {axis: rng.uniform(-2.0, 2.0) for axis in 'xyz'},
+        'gyroscope': {axis: rng.uniform(-500.0, 500.0) for axis in 'xyz'},
+    }
+    if orientation:
+        alpha, beta, gamma = random_angles(rng, 1)[0]
+        sample['orientation'] = {'alpha': alpha, 'beta': beta, 'gamma': gamma}
+    return sample
+
+
+@pytest.mark.parametrize('angles', [(0.0, 0.0, 0.0), (90.0, 0.0, 0.0), (0.0, 90.0, 0.0),
+                                    (0.0, 0.0, 90.0), (30.0, 45.0, -60.0), (350.0, -170.0, 80.0)])
+def test_quaternion_matches_rotation_matrix(angles):
+    q = euler_to_quaternion(*angles)
+    assert math.isclose(sum(v * v for v in q), 1.0, rel_tol=1e-12)
+    np.testing.assert_allclose(rotation_matrix(q), reference_matrix(*angles), atol=1e-12)
+
+
+def test_random_multi_axis_angles_match_rotation_matrix():
+    rng = random.Random(0)
+    for angles in random_angles(rng, 200):
+        np.testing.assert_allclose(rotation_matrix(euler_to_quaternion(*angles)),
+                                   reference_matrix(*angles), atol=1e-12)
+
+
+def test_quaternion_batch_equals_scalar():
+    angles = random_angles(random.Random(1), 100)
+    batch = euler_to_quaternion_batch(*zip(*angles))
+    assert batch.shape == (100, 4)
+    np.testing.assert_allclose(batch, [euler_to_quaternion(*a) for a in angles], atol=1e-15)
+
+
+def test_imu_batch_equals_scalar():
+    rng = random.Random(2)
+    samples = [random_sample(rng) for _ in range(50)]
+    batch = convert_imu_batch(samples, end_ns=1000000000, period_ns=5000000)
+
+    assert len(batch) == 50
+    for i, sample in enumerate(samples):
+        ax, ay, az = vector(sample, 'accelerometer')
+        gx, gy, gz = vector(sample, 'gyroscope')
+        np.testing.assert_allclose(batch.linear_acceleration[i], [ax * GRAVITY, ay * GRAVITY, az * GRAVITY])
+        np.testing.assert_allclose(batch.angular_velocity[i], [gx * DEG_TO_RAD, gy * DEG_TO_RAD, gz * DEG_TO_RAD])
+        np.testing.assert_allclose(batch.orientation[i],
+                                   euler_to_quaternion(*orientation_angles(sample['orientation'])), atol=1e-15)
+    assert batch.orientation_known.all()
+    assert batch.stamps.tolist() == [1000000000 - (49 - i) * 5000000 for i in range(50)]
+
+
+def test_imu_batch_mixing_samples_with_and_without_orientation():
+    rng = random.Random(3)
+    samples = [random_sample(rng, orientation=i % 3 != 0) for i in range(30)]
+    batch = convert_imu_batch(samples, end_ns=0, period_ns=0, accel_scale=1.0)
+
+    assert batch.orientation_known.tolist() == ['orientation' in sample for sample in samples]
+    for i, sample in enumerate(samples):
+        if 'orientation' in sample:
+            expected = euler_to_quaternion(*orientation_angles(sample['orientation']))
+        else:
+            expected = (0.0, 0.0, 0.0, 1.0)
+        np.testing.assert_allclose(batch.orientation[i], expected, atol=1e-15)
+        np.testing.assert_allclose(batch.linear_acceleration[i], vector(sample, 'accelerometer'))
+
+
+def test_imu_batch_without_orientation():
+    rng = random.Random(4)
+    batch = convert_imu_batch([random_sample(rng, orientation=False) for _ in range(5)], 0, 0)
+    assert batch.orientation is None
+    assert batch.orientation_known is None
@@ -0,0 +1,82 @@
+"""Field subscriptions and per-phone delta state of field_stream.py"""
+
+from types import SimpleNamespace
+
+from phone_sensor_bridge.field_stream import DeltaEncoder, DeltaState, subscription
+
+
+def converter(name, fields, max_rate=0.0):
+    return SimpleNamespace(name=name, fields=fields, max_rate=max_rate)
+
+
+def packet(phone_id, **fields):
+    return dict(fields, connectionId=phone_id, timestamp='2025-06-15T05:51:04.859Z')
+
+
+def test_subscription_keeps_the_highest_rate_of_a_shared_field():
+    converters = [converter('imu', ('accelerometer', 'orientation')),
+                  converter('orientation', ('orientation',), 10.0),
+                  converter('battery', ('battery',), 0.2)]
+    assert subscription(converters, {'battery': 1.0}) == {
+        'accelerometer': 0.0, 'orientation': 0.0, 'battery': 1.0}
+    converters[0].max_rate = 5.0
+    assert subscription(converters)['orientation'] == 10.0
+
+
+def test_state_follows_sets_and_unsets():
+    encoder, state = DeltaEncoder({'gps': 0, 'battery': 0}), DeltaState()
+    state.apply(encoder.delta(packet(1, gps={'latitude': 1.0}, battery={'level': 0.5}), 0.0))
+    data, changed = state.apply(encoder.delta(packet(1, battery={'level': 0.5}), 1.0))
+    assert set(changed) == {'timestamp'}
+    assert 'gps' not in data and data['battery'] == {'level': 0.5}
+    assert encoder.delta(packet(1, battery={'level': 0.5}), 2.0) is None
+
+
+def test_rate_limited_field_waits_for_its_interval():
+    encoder, state = DeltaEncoder({'battery': 1.0}), DeltaState()
+    state.apply(encoder.delta(packet(1, battery={'level': 0.5}), 0.0))
+    assert encoder.delta(packet(1, battery={'level': 0.4}), 0.5) is None
+    data, changed = state.apply(encoder.delta(packet(1, battery={'level': 0.3}), 1.5))
+    assert data['battery'] == {'level': 0.3}
+
+
+def test_gap_of_one_phone_leaves_the_others_applied():
+    encoder, state = DeltaEncoder({'gps': 0}), DeltaState()
+    for phone_id in (1, 2):
+        state.apply(encoder.delta(packet(phone_id, gps={'latitude': 0.0}), 0.0))
+    # Phone 1's second delta is lost
+    encoder.delta(packet(1, gps={'latitude': 1.0}), 1.0)
+    assert state.apply(encoder.delta(packet(1, gps={'latitude': 2.0}), 2.0)) is None
+    assert state.resync_pending(1) and state.gaps == 1
+    assert state.resync_age(1) >= 0.0 and state.resync_age(2) == 0.0
+
+    data, _changed = state.apply(encoder.delta(packet(2, gps={'latitude': 5.0}), 2.0))
+    assert data['gps'] == {'latitude': 5.0}
+    # Until its snapshot arrives, phone 1's deltas are dropped without counting new gaps
+    assert state.apply(encoder.delta(packet(1, gps={'latitude': 3.0}), 3.0)) is None
+    assert state.gaps == 1
+
+
+def test_resync_snapshot_restarts_the_phone():
+    encoder, state = DeltaEncoder({'gps': 0, 'battery': 0}), DeltaState()
+    state.apply(encoder.delta(packet(1, gps={'latitude': 0.0}), 0.0))
+    encoder.delta(packet(1, gps={'latitude': 1.0}), 1.0)
+    assert state.apply(encoder.delta(packet(1, gps={'latitude': 2.0}), 2.0)) is None
+
+    # The server's 'resync' handler forgets what it sent that phone
+    encoder.resync(1)
+    snapshot = encoder.delta(packet(1, gps={'latitude': 2.0}, battery={'level': 0.7}), 3.0)
+    assert snapshot['full'] and snapshot['seq'] == 1
+    data, changed = state.apply(snapshot)
+    assert not state.resync_pending(1)
+    assert data == {'connectionId': 1, 'gps': {'latitude': 2.0}, 'battery': {'level': 0.7},
+                    'timestamp': '2025-06-15T05:51:04.859Z'}
+    assert state.apply(encoder.delta(packet(1, gps={'latitude': 4.0}, battery={'level': 0.7}), 4.0)) is not None
+
+
+def test_reset_drops_every_phone():
+    encoder, state = DeltaEncoder({'gps': 0}), DeltaState()
+    state.apply(encoder.delta(packet(1, gps={'latitude': 0.0}), 0.0))
+    state.reset()
+    # A delta after a resubscribe without its snapshot is a gap
+    assert state.apply(encoder.delta(packet(1, gps={'latitude': 1.0}), 1.0)) is None
@@ -0,0 +1,53 @@
+"""Device admission and eviction of fleet_bridge.py"""
+
+import pytest
+
+rclpy = pytest.importorskip('rclpy')
+pytest.importorskip('socketio')
+
+from rclpy.parameter import Parameter  # noqa: E402
+
+from phone_sensor_bridge.fleet_bridge import PhoneFleetBridge  # noqa: E402
+
+PACKET = {'timestamp': '2025-06-15T05:51:04.859Z', 'battery': {'level': 0.5, 'charging': False}}
+
+
+@pytest.fixture
+def fleet():
+    rclpy.init()
+    node = PhoneFleetBridge(parameter_overrides=[
+        Parameter('max_devices', value=2), Parameter('device_timeout', value=10.0)])
+    yield node
+    node.destroy_node()
+    rclpy.shutdown()
+
+
+def send(fleet, connection_id):
+    fleet.dispatch(0, 'process_sensor_data', dict(PACKET, connectionId=connection_id))
+
+
+def test_eviction_destroys_the_device_publishers(fleet):
+    baseline = len(list(fleet.publishers))
+    send(fleet, 1)
+    assert len(list(fleet.publishers)) > baseline
+    device = fleet.devices[(0, 1)]
+
+    with fleet.devices_lock:
+        fleet.evict_stale(device.last_seen + 5.0)
+    assert (0, 1) in fleet.devices
+    with fleet.devices_lock:
+        fleet.evict_stale(device.last_seen + 11.0)
+    assert fleet.devices == {} and fleet.evicted == 1
+    assert len(list(fleet.publishers)) == baseline
+
+
+def test_full_fleet_evicts_silent_devices_before_rejecting(fleet):
+    send(fleet, 1)
+    send(fleet, 2)
+    send(fleet, 3)
+    assert fleet.rejected == 1 and (0, 3) not in fleet.devices
+
+    fleet.devices[(0, 1)].last_seen -= 11.0
+    send(fleet, 3)
+    assert set(fleet.devices) == {(0, 2), (0, 3)}
+    assert (fleet.evicted, fleet.rejected) == (1, 1)
@@ -0,0 +1,70 @@
+"""Shared-memory camera ring of frame_ring.py"""
+
+import os
+from multiprocessing import shared_memory
+
+import pytest
+
+from phone_sensor_bridge.frame_ring import (
+    FrameRingReader, FrameRingWriter, FrameTooLarge, decode_descriptor, encode_descriptor,
+)
+
+
+@pytest.fixture
+def ring(request):
+    writer = FrameRingWriter(f'frame_ring_test_{os.getpid()}_{request.node.name}', slots=3, slot_size=32)
+    yield writer
+    writer.close()
+
+
+def test_round_trip_through_the_descriptor(ring):
+    descriptor = decode_descriptor(encode_descriptor(ring.write(memoryview(b'jpeg'), 42, 'camera')))
+    reader = FrameRingReader(ring.name)
+    try:
+        assert descriptor['stamp_ns'] == 42 and descriptor['frame_id'] == 'camera'
+        view = reader.read(descriptor)
+        assert bytes(view) == b'jpeg'
+        view.release()
+        assert reader.copy(descriptor) == b'jpeg'
+        assert reader.latest_frame == 1
+    finally:
+        reader.close()
+
+
+def test_overwritten_slot_is_invalid(ring):
+    reader = FrameRingReader(ring.name)
+    try:
+        first = ring.write(b'frame 1', 1)
+        for i in range(2, 5):
+            latest = ring.write(b'frame %d' % i, i)
+        assert not reader.valid(first)
+        assert reader.read(first) is None and reader.copy(first) is None
+        assert reader.copy(latest) == b'frame 4'
+    finally:
+        reader.close()
+
+
+def test_frame_larger_than_a_slot_is_refused(ring):
+    with pytest.raises(FrameTooLarge):
+        ring.write(bytes(33), 0)
+    assert ring.frames == 0
+
+
+def test_closing_a_reader_leaves_the_ring_mapped(ring):
+    descriptor = ring.write(b'kept', 1)
+    FrameRingReader(ring.name).close()
+    reader = FrameRingReader(ring.name)
+    try:
+        assert reader.copy(descriptor) == b'kept'
+    finally:
+        reader.close()
+
+
+def test_reader_refuses_other_shared_memory():
+    block = shared_memory.SharedMemory(name=f'frame_ring_test_{os.getpid()}_other', create=True, size=128)
+    try:
+        with pytest.raises(ValueError):
+            FrameRingReader(block.name)
+    finally:
+        block.close()
+        block.unlink()
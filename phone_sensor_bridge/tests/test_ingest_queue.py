@@ -0,0 +1,84 @@
+"""Lane policies and the blocking/polling hand-off of ingest_queue.py"""
+
+import threading
+import time
+
+from phone_sensor_bridge.ingest_queue import DropOldestLane, IngestQueue, LatestLane, OnChangeLane
+
+
+def test_drop_oldest_lane_keeps_the_newest_samples():
+    lane = DropOldestLane(3)
+    for i in range(5):
+        lane.put(i)
+    assert (lane.depth, lane.dropped) == (3, 2)
+    assert lane.take(0.0) == [2, 3, 4]
+    assert lane.next_due(0.0) is None
+
+
+def test_latest_lane_coalesces_and_limits_the_rate():
+    lane = LatestLane(max_rate=2.0)
+    lane.put('a')
+    lane.put('b')
+    assert lane.dropped == 1
+    assert lane.take(10.0) == ['b']
+    lane.put('c')
+    # Held until half a second after the previous release
+    assert lane.take(10.2) == []
+    assert lane.next_due(10.2) == 10.5
+    assert lane.take(10.5) == ['c']
+    assert lane.next_due(10.6) is None
+
+
+def test_on_change_lane_drops_repeated_keys():
+    lane = OnChangeLane()
+    for item, key in (('a', 1), ('b', 1), ('c', 2)):
+        lane.put(item, key)
+    assert lane.dropped == 2  # 'b' repeated key 1, 'c' replaced the unreleased 'a'
+    assert lane.take(0.0) == ['c']
+    lane.put('d', 2)
+    assert lane.take(1.0) == []
+
+
+def test_take_returns_ready_items_of_every_lane():
+    queue = IngestQueue({'imu': DropOldestLane(10), 'battery': LatestLane()})
+    queue.put('imu', 1)
+    queue.put('battery', 'b')
+    queue.put('imu', 2)
+    assert sorted(queue.take(timeout=0.1), key=str) == [1, 2, 'b']
+    assert queue.stats() == {'imu': (0, 0), 'battery': (0, 0)}
+    assert queue.take(timeout=0.01) == []
+
+
+def test_take_waits_for_a_rate_limited_item():
+    queue = IngestQueue({'battery': LatestLane(max_rate=20.0)})
+    queue.put('battery', 1)
+    assert queue.take(timeout=0.1) == [1]
+    queue.put('battery', 2)
+    start = time.monotonic()
+    assert queue.take(timeout=1.0) == [2]
+    assert time.monotonic() - start >= 0.04
+
+
+def test_close_wakes_a_waiting_consumer():
+    queue = IngestQueue({'imu': DropOldestLane(10)})
+    taken = []
+    consumer = threading.Thread(target=lambda: taken.append(queue.take()))
+    consumer.start()
+    time.sleep(0.05)
+    queue.close()
+    consumer.join(1.0)
+    assert not consumer.is_alive() and taken == [[]]
+
+
+def test_poll_reports_when_held_items_fall_due():
+    queue = IngestQueue({'imu': DropOldestLane(10), 'battery': LatestLane(max_rate=2.0)})
+    puts = []
+    queue.on_put = lambda: puts.append(True)
+    queue.put('battery', 'a')
+    queue.put('imu', 1)
+    assert sorted(queue.poll()[0], key=str) == [1, 'a']
+    queue.put('battery', 'b')
+    items, due = queue.poll()
+    assert items == [] and 0.4 < due <= 0.5
+    assert len(puts) == 3
+    assert IngestQueue({'imu': DropOldestLane(10)}).poll() == ([], None)
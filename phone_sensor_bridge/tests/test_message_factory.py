@@ -0,0 +1,21 @@
+"""Preallocated message templates of message_factory.py (needs the ROS 2 message packages)"""
+
+import pytest
+
+pytest.importorskip('sensor_msgs.msg')
+
+from phone_sensor_bridge.message_factory import ImuTemplate, ZERO_COVARIANCE  # noqa: E402
+
+
+def test_imu_without_orientation_is_marked_unknown():
+    template = ImuTemplate('phone', orientation_covariance=ZERO_COVARIANCE)
+    msg = template.fill(1, 0.0, 0.0, 9.81, 0.0, 0.0, 0.0, (0.0, 0.0, 0.6, 0.8))
+    assert msg.orientation_covariance[0] == 0.0
+    assert (msg.orientation.z, msg.orientation.w) == (0.6, 0.8)
+
+    msg = template.fill(2, 0.0, 0.0, 9.81, 0.0, 0.0, 0.0)
+    assert msg.orientation_covariance[0] == -1.0
+    assert (msg.orientation.x, msg.orientation.y, msg.orientation.z, msg.orientation.w) == (0.0, 0.0, 0.0, 1.0)
+
+    msg = template.fill(3, 0.0, 0.0, 9.81, 0.0, 0.0, 0.0, (0.0, 0.0, 0.0, 1.0))
+    assert msg.orientation_covariance[0] == 0.0
@@ -0,0 +1,49 @@
+"""Multipart parsing of mjpeg_stream.py"""
+
+from phone_sensor_bridge.mjpeg_stream import MjpegDemuxer, boundary_from_content_type, header_value
+
+# JPEG-like payloads; the second embeds an EOI marker (an EXIF thumbnail)
+FRAMES = [b'\xff\xd8first frame\xff\xd9', b'\xff\xd8thumb\xff\xd9 then the image\xff\xd9', b'\xff\xd8' + bytes(3000)]
+
+
+def stream(frames, content_length=True, boundary=b'frame'):
+    parts = [b'preamble\r\n']
+    for frame in frames:
+        headers = b'Content-Type: image/jpeg\r\n'
+        if content_length:
+            headers += b'Content-Length: %d\r\n' % len(frame)
+        parts.append(b'--' + boundary + b'\r\n' + headers + b'\r\n' + frame + b'\r\n')
+    return b''.join(parts)
+
+
+def demux(data, chunk_size, **kwargs):
+    demuxer = MjpegDemuxer(capacity=64, **kwargs)
+    chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+    # Views are only valid until the next feed
+    return [bytes(frame) for frame in demuxer.iter_frames(chunks)], demuxer
+
+
+def test_frames_split_across_any_chunk_size():
+    data = stream(FRAMES)
+    for chunk_size in (1, 2, 7, 64, len(data)):
+        frames, demuxer = demux(data, chunk_size)
+        assert frames == FRAMES
+        assert demuxer.frame_count == 3 and demuxer.byte_count == len(data)
+
+
+def test_parts_without_content_length_end_at_the_next_boundary():
+    data = stream(FRAMES, content_length=False)
+    for chunk_size in (1, 5, len(data)):
+        frames, _demuxer = demux(data, chunk_size)
+        # The last part is only complete at the end of the stream (flush)
+        assert frames == FRAMES
+
+
+def test_boundary_and_headers():
+    assert boundary_from_content_type('multipart/x-mixed-replace; boundary="--camera"') == 'camera'
+    assert boundary_from_content_type(None) == 'frame'
+    data = stream(FRAMES[:1], boundary=b'camera')
+    demuxer = MjpegDemuxer.from_content_type('multipart/x-mixed-replace;boundary=camera')
+    assert [bytes(frame) for frame in demuxer.feed(data)] == FRAMES[:1]
+    assert header_value(demuxer.headers, 'content-length') == str(len(FRAMES[0]))
+    assert header_value(demuxer.headers, 'X-Timestamp') is None
@@ -0,0 +1,68 @@
+"""Incremental columnar conversion of sensor_store.py"""
+
+import json
+import math
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from phone_sensor_bridge.sensor_store import SensorStore, convert_log  # noqa: E402
+
+
+def record(second, x, **data):
+    data.setdefault('accelerometer', {'x': x, 'y': 0.0, 'z': 1.0})
+    return json.dumps({'timestamp': f'2025-06-15T05:51:{second:02d}.000Z', 'data': data}) + '\n'
+
+
+@pytest.fixture
+def log(tmp_path):
+    return tmp_path / 'sensors_2025-06-15.jsonl'
+
+
+def convert(log, tmp_path):
+    return SensorStore(convert_log(str(log), str(tmp_path / 'columnar')))
+
+
+def test_only_new_complete_lines_are_appended(log, tmp_path):
+    log.write_text(record(0, 0.0) + record(1, 1.0))
+    assert list(convert(log, tmp_path)['accel_x']) == [0.0, 1.0]
+
+    # A line still being written is left for the next run
+    with open(log, 'a') as f:
+        f.write(record(2, 2.0) + record(3, 3.0)[:20])
+    store = convert(log, tmp_path)
+    assert len(store) == 3 and store.meta['offset'] < log.stat().st_size
+
+    with open(log, 'a') as f:
+        f.write(record(3, 3.0)[20:])
+    store = convert(log, tmp_path)
+    assert list(store['accel_x']) == [0.0, 1.0, 2.0, 3.0]
+    assert store.sorted
+    assert store.time_slice('2025-06-15T05:51:01Z', '2025-06-15T05:51:03Z') == slice(1, 3)
+    assert list(store.range('2025-06-15T05:51:02Z', columns=['accel_x'])['accel_x']) == [2.0, 3.0]
+
+
+def test_missing_fields_are_nan_and_minus_one(log, tmp_path):
+    log.write_text(record(0, 0.5, gps={'latitude': 48.1}, connectionId=7) + record(1, 1.5))
+    store = convert(log, tmp_path)
+    assert store['gps_latitude'][0] == 48.1 and math.isnan(store['gps_latitude'][1])
+    assert list(store['connection_id']) == [7, -1]
+
+
+def test_truncated_log_is_converted_again(log, tmp_path):
+    log.write_text(record(0, 0.0) + record(1, 1.0) + record(2, 2.0))
+    convert(log, tmp_path)
+    # Rotated in place: shorter than what was converted
+    log.write_text(record(5, 5.0))
+    store = convert(log, tmp_path)
+    assert list(store['accel_x']) == [5.0]
+
+
+def test_out_of_order_rows_fall_back_to_masks(log, tmp_path):
+    log.write_text(record(1, 1.0) + record(0, 0.0) + record(2, 2.0))
+    store = convert(log, tmp_path)
+    assert not store.sorted
+    with pytest.raises(ValueError):
+        store.time_slice('2025-06-15T05:51:01Z')
+    assert list(store.range('2025-06-15T05:51:01Z', columns=['accel_x'])['accel_x']) == [1.0, 2.0]
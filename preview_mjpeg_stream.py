@@ -1,30 +1,234 @@
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import cv2
 import requests
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'phone_sensor_bridge'))
+from phone_sensor_bridge.mjpeg_stream import MjpegDemuxer, header_value  # noqa: E402
+
 # MJPEG stream URL
-url = 'https://192.168.1.11:3000/camera/stream.mjpg'
-
-# Disable SSL verification (like --no-check-certificate)
-stream = requests.get(url, stream=True, verify=False)
-
-bytes_data = b''
-window_name = 'Camera Stream Preview'
-cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
-
-try:
-    for chunk in stream.iter_content(chunk_size=1024):
-        bytes_data += chunk
-        a = bytes_data.find(b'\xff\xd8')  # JPEG start
-        b = bytes_data.find(b'\xff\xd9')  # JPEG end
-        if a != -1 and b != -1 and b > a:
-            jpg = bytes_data[a:b+2]
-            bytes_data = bytes_data[b+2:]
-            img = cv2.imdecode(np.frombuffer(jpg, dtype=np.uint8), cv2.IMREAD_COLOR)
+DEFAULT_URL = 'https://192.168.1.11:3000/camera/stream.mjpg'
+
+WINDOW_NAME = 'Camera Stream Preview'
+
+# Decode at full, half or quarter resolution (the JPEG decoder skips the work)
+DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+}
+
+
+class LatestQueue:
+    """Bounded queue that drops the oldest item instead of blocking the producer"""
+
+    def __init__(self, maxsize=1):
+        self.maxsize = maxsize
+        self.items = []
+        self.dropped = 0
+        self.closed = False
+        self.cond = threading.Condition()
+
+    def put(self, item):
+        with self.cond:
+            if len(self.items) >= self.maxsize:
+                del self.items[0]
+                self.dropped += 1
+            self.items.append(item)
+            self.cond.notify()
+
+    def get(self, timeout=None):
+        """Return the oldest queued item, or None on timeout/close"""
+        with self.cond:
+            if not self.items and not self.closed:
+                self.cond.wait(timeout)
+            return self.items.pop(0) if self.items else None
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+
+class PreviewStats:
+    """Frame counters and latency samples, printed and reset periodically"""
+
+    def __init__(self, interval=5.0):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.reset(time.time())
+
+    def reset(self, now):
+        self.window_start = now
+        self.shown = 0
+        self.stale = 0
+        self.pipeline_ms = []
+        self.glass_ms = []
+
+    def record(self, received, captured_ms, now):
+        with self.lock:
+            self.shown += 1
+            self.pipeline_ms.append((now - received) * 1000.0)
+            if captured_ms is not None:
+                # Phone and host clocks are not synchronized; offset is included
+                self.glass_ms.append(now * 1000.0 - captured_ms)
+
+    def add_stale(self):
+        with self.lock:
+            self.stale += 1
+
+    def maybe_report(self, now, dropped):
+        if now - self.window_start < self.interval:
+            return
+        with self.lock:
+            elapsed = now - self.window_start
+            line = f"display {self.shown / elapsed:5.1f} fps, dropped {dropped}, out-of-order {self.stale}"
+            line += self.format_latency(' pipeline', self.pipeline_ms)
+            line += self.format_latency(' glass-to-glass', self.glass_ms)
+            self.reset(now)
+        print(line)
+
+    @staticmethod
+    def format_latency(label, samples):
+        if not samples:
+            return ''
+        samples.sort()
+        p50 = samples[len(samples) // 2]
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        return f",{label} p50 {p50:.0f} ms p95 {p95:.0f} ms"
+
+
+def capture_time(demuxer):
+    """Phone capture time (ms since epoch) from the X-Timestamp part header"""
+    value = header_value(demuxer.headers, 'X-Timestamp')
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def show(img):
+    """Display a frame; returns False once ESC is pressed"""
+    cv2.imshow(WINDOW_NAME, img)
+    return cv2.waitKey(1) != 27  # ESC to exit
+
+
+def run_serial(stream, demuxer, flags, stats):
+    """Read, decode and display on the calling thread"""
+    for jpg in demuxer.iter_frames(stream.iter_content(chunk_size=16384)):
+        received = time.time()
+        img = cv2.imdecode(np.frombuffer(jpg, dtype=np.uint8), flags)
+        if img is not None:
+            if not show(img):
+                break
+            now = time.time()
+            stats.record(received, capture_time(demuxer), now)
+            stats.maybe_report(now, 0)
+
+
+def run_pipelined(stream, demuxer, flags, stats, decoders):
+    """
+    Reader thread -> decoder pool -> display (main thread), linked by
+    latest-wins queues so a slow stage drops stale frames instead of
+    accumulating latency. cv2.imdecode releases the GIL, so decoders
+    run in parallel.
+    """
+    encoded = LatestQueue(maxsize=decoders)
+    decoded = LatestQueue(maxsize=1)
+    stop = threading.Event()
+
+    def reader():
+        try:
+            seq = 0
+            for jpg in demuxer.iter_frames(stream.iter_content(chunk_size=16384)):
+                if stop.is_set():
+                    break
+                seq += 1
+                # Copy out of the demuxer buffer before handing to another thread
+                encoded.put((seq, time.time(), capture_time(demuxer), bytes(jpg)))
+        finally:
+            encoded.close()
+
+    def decoder():
+        while not stop.is_set():
+            item = encoded.get(timeout=0.5)
+            if item is None:
+                if encoded.closed:
+                    break
+                continue
+            seq, received, captured, jpg = item
+            img = cv2.imdecode(np.frombuffer(jpg, dtype=np.uint8), flags)
             if img is not None:
-                cv2.imshow(window_name, img)
-                if cv2.waitKey(1) == 27:  # ESC to exit
+                decoded.put((seq, received, captured, img))
+
+    reader_thread = threading.Thread(target=reader, daemon=True)
+    reader_thread.start()
+    pool = ThreadPoolExecutor(max_workers=decoders, thread_name_prefix='mjpeg-decode')
+    for _ in range(decoders):
+        pool.submit(decoder)
+
+    last_seq = 0
+    try:
+        while reader_thread.is_alive() or decoded.items:
+            item = decoded.get(timeout=0.1)
+            now = time.time()
+            if item is not None:
+                seq, received, captured, img = item
+                if seq < last_seq:
+                    # A slower decoder finished an older frame; never go backwards
+                    stats.add_stale()
+                    continue
+                last_seq = seq
+                if not show(img):
                     break
-finally:
-    cv2.destroyAllWindows()
-    stream.close()
+                now = time.time()
+                stats.record(received, captured, now)
+            else:
+                cv2.waitKey(1)
+            stats.maybe_report(now, encoded.dropped + decoded.dropped)
+    finally:
+        stop.set()
+        encoded.close()
+        pool.shutdown(wait=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Preview the phone MJPEG camera stream')
+    parser.add_argument('--url', default=DEFAULT_URL)
+    parser.add_argument('--pipelined', action='store_true',
+                        help='decode on a thread pool and drop stale frames')
+    parser.add_argument('--decoders', type=int, default=2,
+                        help='decoder threads in pipelined mode')
+    parser.add_argument('--reduce', type=int, choices=sorted(DECODE_FLAGS), default=1,
+                        help='decode at 1/1, 1/2 or 1/4 resolution')
+    parser.add_argument('--stats-interval', type=float, default=5.0)
+    args = parser.parse_args()
+
+    # Disable SSL verification (like --no-check-certificate)
+    stream = requests.get(args.url, stream=True, verify=False)
+
+    # Parts are split on the multipart boundary/Content-Length sent by server.js
+    demuxer = MjpegDemuxer.from_content_type(stream.headers.get('Content-Type'))
+    stats = PreviewStats(args.stats_interval)
+    cv2.namedWindow(WINDOW_NAME, cv2.WINDOW_NORMAL)
+
+    try:
+        if args.pipelined:
+            run_pipelined(stream, demuxer, DECODE_FLAGS[args.reduce], stats, max(1, args.decoders))
+        else:
+            run_serial(stream, demuxer, DECODE_FLAGS[args.reduce], stats)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cv2.destroyAllWindows()
+        stream.close()
+
+
+if __name__ == '__main__':
+    main()
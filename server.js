@@ -10,6 +10,7 @@ process.env.NODE_TLS_REJECT_UNAUTHORIZED = '0';
 const sslConfig = require('./config/ssl');
 const SensorProcessor = require('./classes/SensorProcessor');
 const DataLogger = require('./classes/DataLogger');
+const FieldSubscriptions = require('./classes/FieldSubscriptions');
 const apiRoutes = require('./routes/api');
 const pageRoutes = require('./routes/pages');
 
@@ -84,6 +85,7 @@ const latencyTracker = {
 // Initialize processors
 const sensorProcessor = new SensorProcessor();
 const dataLogger = new DataLogger();
+const fieldSubscriptions = new FieldSubscriptions();
 
 // Store connected clients
 const clients = new Set();
@@ -292,18 +294,34 @@ ws.on('connection', (ws, req) => {
             // Handle camera frames (FIXED - NOW PROPERLY INSIDE MESSAGE HANDLER)
             if (data.type === 'cameraFrame') {
                 // console.log('Camera frame received:');
-                // Broadcast camera frame to all dashboard clients
-                io.emit('cameraFrame', {
-                    data: data.data,
+                const frame = {
                     timestamp: data.timestamp,
                     facingMode: data.facingMode,
                     width: data.width,
-                    height: data.height
-                });
+                    height: data.height,
+                    connectionId: connId
+                };
+                // Broadcast camera frame to all dashboard clients
+                io.except(BINARY_CAMERA_ROOM).emit('cameraFrame', { ...frame, data: data.data });
+                // Clients that asked for binary frames get the decoded JPEG as an attachment
+                const binaryClients = io.sockets.adapter.rooms.get(BINARY_CAMERA_ROOM);
+                if (binaryClients && binaryClients.size > 0 && typeof data.data === 'string') {
+                    io.to(BINARY_CAMERA_ROOM).emit('cameraFrameBinary', { ...frame, data: dataUrlToBuffer(data.data) });
+                }
                 return;
             }
             
             
+            // Relay batched DeviceMotion samples to the ROS bridge as-is
+            if (data.type === 'sensorBatch' && Array.isArray(data.samples)) {
+                io.emit('sensorBatch', {
+                    samples: data.samples,
+                    interval: data.interval,
+                    connectionId: connId
+                });
+                return;
+            }
+            
             // Handle latency measurement
             if (data.type === 'latency') {
                 latencyTracker.addMeasurement(data.latency);
@@ -316,13 +334,17 @@ ws.on('connection', (ws, req) => {
             
             latestSensorData = {
                 ...processedData,
+                // Phone clock at send time; `timestamp` below is the server receive time
+                phoneTimestamp: sanitizedData.timestamp,
                 timestamp: new Date().toISOString(),
                 serverLatency: latencyTracker.getAverageLatency(),
                 connectionId: connId
             };
             
             dataLogger.logSensorData(latestSensorData);
-            io.emit('sensorData', latestSensorData);
+            // Field subscribers (the ROS bridge) get only the fields they use that changed
+            io.except(FIELD_SUBSCRIBER_ROOM).emit('sensorData', latestSensorData);
+            fieldSubscriptions.publish(latestSensorData);
             
         } catch (error) {
             console.error(`Message processing error from ID: ${connId}:`, error.message);
@@ -358,6 +380,16 @@ ws.on('connection', (ws, req) => {
 // Add this to your server.js
 let latestCameraFrame = null;
 
+// Socket.IO room of clients (the ROS bridge) that receive camera frames as binary attachments
+const BINARY_CAMERA_ROOM = 'camera-binary';
+// Socket.IO room of clients receiving sensorDelta instead of sensorData
+const FIELD_SUBSCRIBER_ROOM = 'field-subscribers';
+
+// JPEG bytes of a base64 data URL ("data:image/jpeg;base64,...")
+function dataUrlToBuffer(dataUrl) {
+    return Buffer.from(dataUrl.slice(dataUrl.indexOf(',') + 1), 'base64');
+}
+
 // Store latest camera frame from phone
 ws.on('connection', (ws, req) => {
     ws.on('message', (message) => {
@@ -368,13 +400,13 @@ ws.on('connection', (ws, req) => {
             if (data.type === 'cameraFrame') {
                 latestCameraFrame = {
                     data: data.data,
+                    // Decoded once here instead of once per MJPEG client and tick
+                    buffer: dataUrlToBuffer(data.data),
                     timestamp: data.timestamp,
                     width: data.width,
                     height: data.height
                 };
-                
-                // Also broadcast to dashboard clients
-                io.emit('cameraFrame', latestCameraFrame);
+                // Already broadcast with its connectionId by the main handler
                 return;
             }
             
@@ -392,14 +424,18 @@ app.get('/camera/stream.mjpg', (req, res) => {
     res.setHeader('Connection', 'keep-alive');
     res.setHeader('Access-Control-Allow-Origin', '*');
     
+    let lastSent = null;
     const sendFrame = () => {
-        if (latestCameraFrame && latestCameraFrame.data) {
+        // Only write frames the client has not seen yet
+        if (latestCameraFrame && latestCameraFrame.buffer && latestCameraFrame !== lastSent) {
             try {
-                // Convert base64 to buffer
-                const frameBuffer = Buffer.from(latestCameraFrame.data.split(',')[1], 'base64');
+                const frameBuffer = latestCameraFrame.buffer;
+                lastSent = latestCameraFrame;
                 
                 res.write(`--frame\r\n`);
                 res.write(`Content-Type: image/jpeg\r\n`);
+                // Phone capture time (ms since epoch) for latency measurement
+                res.write(`X-Timestamp: ${latestCameraFrame.timestamp}\r\n`);
                 res.write(`Content-Length: ${frameBuffer.length}\r\n\r\n`);
                 res.write(frameBuffer);
                 res.write('\r\n');
@@ -409,8 +445,8 @@ app.get('/camera/stream.mjpg', (req, res) => {
         }
     };
     
-    // Send frames at 1 FPS (matching phone's rate)
-    const interval = setInterval(sendFrame, 1000);
+    // Poll for new frames; unchanged frames are not resent
+    const interval = setInterval(sendFrame, 50);
     
     req.on('close', () => {
         clearInterval(interval);
@@ -425,9 +461,9 @@ app.get('/camera/stream.mjpg', (req, res) => {
 
 // Single frame endpoint
 app.get('/camera/latest', (req, res) => {
-    if (latestCameraFrame && latestCameraFrame.data) {
+    if (latestCameraFrame && latestCameraFrame.buffer) {
         try {
-            const frameBuffer = Buffer.from(latestCameraFrame.data.split(',')[1], 'base64');
+            const frameBuffer = latestCameraFrame.buffer;
             res.setHeader('Content-Type', 'image/jpeg');
             res.setHeader('Access-Control-Allow-Origin', '*');
             res.send(frameBuffer);
@@ -470,6 +506,29 @@ io.on('connection', (socket) => {
         });
     });
     
+    // Opt in/out of binary camera frames instead of base64 data URLs
+    socket.on('cameraBinary', (enabled) => {
+        if (enabled) {
+            socket.join(BINARY_CAMERA_ROOM);
+        } else {
+            socket.leave(BINARY_CAMERA_ROOM);
+        }
+    });
+    
+    // Receive only the named sensorData fields, as deltas (see classes/FieldSubscriptions.js);
+    // subscribing again resets the stream to a snapshot
+    socket.on('subscribe', (request) => {
+        const subscriber = fieldSubscriptions.subscribe(socket, request);
+        socket.join(FIELD_SUBSCRIBER_ROOM);
+        socket.emit('subscribed', {
+            fields: Object.keys(subscriber.fields),
+            encoding: subscriber.encoding
+        });
+        if (Object.keys(latestSensorData).length > 0) {
+            fieldSubscriptions.send(subscriber, latestSensorData);
+        }
+    });
+    
     // Send latest data to newly connected client
     if (Object.keys(latestSensorData).length > 0) {
         socket.emit('sensorData', latestSensorData);
@@ -486,6 +545,7 @@ io.on('connection', (socket) => {
     socket.on('disconnect', () => {
         console.log('Web client disconnected');
         clients.delete(socket);
+        fieldSubscriptions.unsubscribe(socket);
     });
 });
 